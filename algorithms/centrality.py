@@ -0,0 +1,284 @@
+from array import array
+
+from algorithms.errors import ConvergenceException, InvalidParameterException
+from data_structures.graphs import CSRGraph
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""
+Centrality measures for graphs from data_structures.graphs.
+
+Everything here works on the compressed sparse row arrays of the graph (see
+CSRGraph), which are exported once per call. The iterative methods go through
+every edge once per iteration: with NumPy as a handful of vectorized
+operations over the whole arrays, without it in plain loops.
+
+All measures return dictionaries with the nodes of the graph as keys.
+"""
+
+class _ListKernel(object):
+    """
+    The vector operations the power iterations need, on plain lists.
+    """
+
+    @staticmethod
+    def vector(values):
+        return list(values)
+
+    @staticmethod
+    def spread(values, node_count, sources, targets, shares):
+        """
+        Returns a vector where entry t is the sum of values[s] * shares[e] over
+        every edge e from s to t. shares may be None for all ones.
+        """
+        spread = [0.0] * node_count
+
+        if shares is None:
+            for edge in range(len(targets)):
+                spread[targets[edge]] += values[sources[edge]]
+        else:
+            for edge in range(len(targets)):
+                spread[targets[edge]] += values[sources[edge]] * shares[edge]
+
+        return spread
+
+    @staticmethod
+    def affine(vector, scale, offset):
+        return [value * scale + offset for value in vector]
+
+    @staticmethod
+    def total(vector):
+        return sum(vector)
+
+    @staticmethod
+    def masked_total(vector, mask):
+        return sum(value for value, masked in zip(vector, mask) if masked)
+
+    @staticmethod
+    def distance(v1, v2):
+        return sum(abs(a - b) for a, b in zip(v1, v2))
+
+class _NumpyKernel(object):
+    """
+    Same as _ListKernel, on NumPy arrays.
+    """
+
+    @staticmethod
+    def vector(values):
+        return numpy.array(values, dtype=numpy.float64)
+
+    @staticmethod
+    def spread(values, node_count, sources, targets, shares):
+        weights = values[sources]
+
+        if shares is not None:
+            weights *= shares
+
+        return numpy.bincount(targets, weights=weights, minlength=node_count)
+
+    @staticmethod
+    def affine(vector, scale, offset):
+        return vector * scale + offset
+
+    @staticmethod
+    def total(vector):
+        return float(vector.sum())
+
+    @staticmethod
+    def masked_total(vector, mask):
+        return float(vector[mask].sum())
+
+    @staticmethod
+    def distance(v1, v2):
+        return float(numpy.abs(v1 - v2).sum())
+
+class _EdgeArrays(object):
+    """
+    The CSR arrays of a graph, plus the source of every edge so that the
+    kernels can go through the edges without looking at the offsets.
+    """
+
+    def __init__(self, graph):
+        csr = graph if isinstance(graph, CSRGraph) else CSRGraph.from_graph(graph)
+        self.nodes, offsets, targets, weights = csr.export_arrays()
+        node_count = len(self.nodes)
+        self.out_degrees = [offsets[i + 1] - offsets[i] for i in range(node_count)]
+
+        if numpy is not None:
+            self.kernel = _NumpyKernel
+            self.targets = numpy.frombuffer(targets, dtype=numpy.int64)
+            self.weights = numpy.frombuffer(weights, dtype=numpy.float64)
+            self.sources = numpy.repeat(numpy.arange(node_count, dtype=numpy.int64), self.out_degrees)
+        else:
+            self.kernel = _ListKernel
+            self.targets = targets
+            self.weights = weights
+            self.sources = array("q")
+
+            for i in range(node_count):
+                self.sources.extend(array("q", (i,)) * self.out_degrees[i])
+
+    def start_vector(self, start):
+        """
+        The vector to start iterating from: the values in the start dictionary,
+        zero for the nodes it leaves out, scaled to sum up to 1. Uniform if no
+        start is given or it sums up to 0.
+        """
+        node_count = len(self.nodes)
+        values = [0.0] * node_count
+
+        if start is not None:
+            values = [float(start.get(node, 0)) for node in self.nodes]
+
+        total = sum(values)
+
+        if total <= 0:
+            values = [1.0 / node_count] * node_count
+        else:
+            values = [value / total for value in values]
+
+        return self.kernel.vector(values)
+
+    def scores(self, vector):
+        return dict((node, float(value)) for node, value in zip(self.nodes, vector))
+
+def degree_centrality(g, normalized=True):
+    """
+    Returns an (in-degree, out-degree) pair of dictionaries, in O(V + E)
+    overall. If normalized, every degree is divided by V - 1, the most
+    neighbors a node can have.
+    """
+    edges = _EdgeArrays(g)
+    node_count = len(edges.nodes)
+
+    if edges.kernel is _NumpyKernel:
+        in_degrees = numpy.bincount(edges.targets, minlength=node_count).tolist()
+    else:
+        in_degrees = [0] * node_count
+
+        for target in edges.targets:
+            in_degrees[target] += 1
+
+    scale = 1.0 / (node_count - 1) if normalized and node_count > 1 else 1
+    in_centrality = dict((node, in_degrees[i] * scale) for i, node in enumerate(edges.nodes))
+    out_centrality = dict((node, edges.out_degrees[i] * scale) for i, node in enumerate(edges.nodes))
+
+    return in_centrality, out_centrality
+
+def pagerank(g, damping=0.85, tolerance=1e-10, max_iterations=100, start=None, weighted=False):
+    """
+    PageRank by power iteration. Each iteration a node keeps 1 - damping of
+    its rank as a uniform jump to any node and passes the rest on to its
+    neighbors, in proportion to the edge weights if weighted and evenly
+    otherwise. Nodes with nowhere to go (dangling nodes), or whose out-edges
+    all weigh 0 when weighted, jump uniformly. Negative weights throw an
+    InvalidParameterException.
+
+    Stops once the ranks move less than tolerance per node, in total, and
+    throws a ConvergenceException if that takes more than max_iterations.
+
+    start, if given, is a dictionary of initial ranks, e.g. the result of a
+    previous run on a graph that has changed a little since, which usually
+    converges in far fewer iterations than starting from scratch.
+
+    Returns a dictionary of ranks that sum up to 1.
+    """
+    if not 0 <= damping <= 1:
+        raise InvalidParameterException(damping)
+
+    edges = _EdgeArrays(g)
+    kernel = edges.kernel
+    node_count = len(edges.nodes)
+
+    if not node_count:
+        return {}
+
+    if weighted:
+        out_weights = [0.0] * node_count
+
+        for edge in range(len(edges.targets)):
+            if edges.weights[edge] < 0:
+                raise InvalidParameterException(float(edges.weights[edge]))
+
+            out_weights[edges.sources[edge]] += edges.weights[edge]
+
+        # A node whose out-edges all weigh 0 passes nothing along them and
+        # counts as dangling below.
+        shares = kernel.vector([
+          edges.weights[edge] / out_weights[edges.sources[edge]] if out_weights[edges.sources[edge]] else 0.0
+          for edge in range(len(edges.targets))
+        ])
+    else:
+        out_weights = edges.out_degrees
+        shares = kernel.vector(
+          [1.0 / out_weights[edges.sources[edge]] for edge in range(len(edges.targets))]
+        )
+
+    dangling = [weight == 0 for weight in out_weights]
+
+    if kernel is _NumpyKernel:
+        dangling = numpy.array(dangling, dtype=bool)
+
+    ranks = edges.start_vector(start)
+
+    for _ in range(max_iterations):
+        spread = kernel.spread(ranks, node_count, edges.sources, edges.targets, shares)
+        jump = (damping * kernel.masked_total(ranks, dangling) + 1 - damping) / node_count
+        new_ranks = kernel.affine(spread, damping, jump)
+
+        if kernel.distance(new_ranks, ranks) < node_count * tolerance:
+            return edges.scores(new_ranks)
+
+        ranks = new_ranks
+
+    raise ConvergenceException(max_iterations)
+
+def hits(g, tolerance=1e-10, max_iterations=100, start=None):
+    """
+    Kleinberg's hubs and authorities by power iteration. A node is a good
+    authority if good hubs point to it and a good hub if it points to good
+    authorities. Both are scaled to sum up to 1 every iteration. Edge weights
+    are ignored.
+
+    Stopping and start are as in pagerank, with start giving the initial hub
+    scores. A start that only weighs nodes without out-edges would leave
+    every score at 0, so the iteration starts uniformly instead.
+
+    Returns a (hubs, authorities) pair of dictionaries.
+    """
+    edges = _EdgeArrays(g)
+    kernel = edges.kernel
+    node_count = len(edges.nodes)
+
+    if not node_count:
+        return {}, {}
+
+    hubs = edges.start_vector(start)
+
+    for _ in range(max_iterations):
+        authorities = kernel.spread(hubs, node_count, edges.sources, edges.targets, None)
+        new_hubs = kernel.spread(authorities, node_count, edges.targets, edges.sources, None)
+        authority_total = kernel.total(authorities)
+        hub_total = kernel.total(new_hubs)
+
+        if not hub_total:
+            if start is not None and len(edges.targets):
+                start = None
+                hubs = edges.start_vector(None)
+                continue
+
+            # No edges: nobody points anywhere.
+            return edges.scores(hubs), edges.scores(authorities)
+
+        authorities = kernel.affine(authorities, 1.0 / authority_total, 0)
+        new_hubs = kernel.affine(new_hubs, 1.0 / hub_total, 0)
+
+        if kernel.distance(new_hubs, hubs) < node_count * tolerance:
+            return edges.scores(new_hubs), edges.scores(authorities)
+
+        hubs = new_hubs
+
+    raise ConvergenceException(max_iterations)
@@ -5,3 +5,17 @@ class InvalidParameterException(Exception):
 
     def __str__(self):
         return "Invalid value for a parameter: " + repr(self.value)
+
+class ConvergenceException(Exception):
+    """
+    Thrown when an iterative method runs out of iterations before converging.
+    """
+
+    def __init__(self, value):
+        """
+        The value is expected to be the number of iterations that were run.
+        """
+        self.value = value
+
+    def __str__(self):
+        return "Did not converge after %s iterations" % self.value
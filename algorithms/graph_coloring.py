@@ -1,38 +1,163 @@
-import sys
+"""
+Greedy vertex coloring of undirected graphs from data_structures.graphs.
 
-sys.path.append("..")
+Colors are the integers 0, 1, 2, ... and there are as many as the graph needs.
+All strategies return a dictionary with the nodes of the graph as keys and the
+assigned colors as values. The colors taken around a node are kept as an
+integer bitmask, bit c being set if color c is taken, so finding the lowest free
+color is a couple of integer operations instead of set differences.
 
-from data_structures.graphs import AdjacencyLists
+The graphs are assumed to be undirected (UndirectedAdjList, AdjacencyMatrix and
+the like): a node's neighbors are all the nodes it conflicts with.
+"""
 
-COLORS = set(("RED", "GREEN", "BLUE", "CYAN", "MAGENTA", "YELLOW"))
+def lowest_free_color(taken):
+    """
+    Returns the lowest color whose bit is not set in the taken bitmask.
+    """
+    # taken + 1 flips the trailing ones, isolating the lowest zero bit.
+    return ((taken + 1) & ~taken).bit_length() - 1
 
-def get_available_color(taken_colors):
+def greedy_color(g, order):
     """
-    taken_colors should be a set
+    Colors the nodes one by one in the given order, giving each the lowest
+    color none of its already-colored neighbors has. O(V + E) plus the bitmask
+    operations.
     """
-    return COLORS.difference(taken_colors)
+    coloring = {}
+
+    for node in order:
+        taken = 0
+
+        for neighbor in g.get_neighbors(node):
+            if neighbor in coloring:
+                taken |= 1 << coloring[neighbor]
 
-def color(g):
+        coloring[node] = lowest_free_color(taken)
+
+    return coloring
+
+def welsh_powell(g):
     """
-    Returns a dictionary with the nodes of the graph as keys and the assigned
-    colors as values.
-    
-    g is assumed to be an instance of AdjacencyLists.
+    Greedy coloring, highest degree first.
+    """
+    degrees = dict((node, g.get_outdegree(node)) for node in g.added_nodes)
+    # Sort on the degrees alone so nodes never need to be comparable.
+    order = sorted(degrees, key=lambda node: degrees[node], reverse=True)
+    return greedy_color(g, order)
+
+def smallest_last_order(g):
+    """
+    Repeatedly takes out a node of least degree among the nodes remaining and
+    returns the nodes in the reverse of the order they were taken out. Degrees
+    are kept in a bucket queue so this runs in O(V + E).
+    """
+    degrees = dict((node, g.get_outdegree(node)) for node in g.added_nodes)
+    buckets = [dict() for _ in range(max(degrees.values(), default=0) + 1)]
+
+    for node, degree in degrees.items():
+        buckets[degree][node] = True
+
+    removal_order = []
+    removed = set()
+    lowest = 0
+
+    for _ in range(len(degrees)):
+        while not buckets[lowest]:
+            lowest += 1
+
+        node, _ = buckets[lowest].popitem()
+        removed.add(node)
+        removal_order.append(node)
+
+        for neighbor in g.get_neighbors(node):
+            if neighbor not in removed:
+                degree = degrees[neighbor]
+                del buckets[degree][neighbor]
+                buckets[degree - 1][neighbor] = True
+                degrees[neighbor] = degree - 1
+
+        # Taking out a node lowers its neighbors' degrees by at most one.
+        lowest = max(lowest - 1, 0)
+
+    removal_order.reverse()
+    return removal_order
+
+def smallest_last(g):
     """
-    nodes = tuple(g.added_nodes)
+    Greedy coloring in smallest-last order. Never needs more colors than one
+    plus the degeneracy of the graph.
+    """
+    return greedy_color(g, smallest_last_order(g))
+
+def dsatur(g):
+    """
+    Brélaz's DSatur: always color next the uncolored node whose neighbors
+    already have the most distinct colors (its saturation degree), starting
+    with the highest-degree node. Exact on bipartite graphs.
+
+    Uncolored nodes sit in buckets keyed by saturation degree. A node only ever
+    moves up one bucket at a time, so finding the next node and updating the
+    neighbors of the one just colored costs O(1) per edge on top of the
+    bitmask operations. Ties within a bucket go to the node that entered it
+    last.
+    """
+    degrees = dict((node, g.get_outdegree(node)) for node in g.added_nodes)
+    # Buckets are dicts so that nodes can be taken out of the middle. Filling
+    # bucket 0 in increasing order of degree means popitem gives the highest
+    # degree node first.
+    buckets = [dict()]
+
+    for node in sorted(degrees, key=lambda node: degrees[node]):
+        buckets[0][node] = True
+
+    saturation = dict((node, 0) for node in degrees)
+    neighbor_colors = dict((node, 0) for node in degrees)
     coloring = {}
+    highest = 0
+
+    for _ in range(len(degrees)):
+        while not buckets[highest]:
+            highest -= 1
+
+        node, _ = buckets[highest].popitem()
+        color = lowest_free_color(neighbor_colors[node])
+        coloring[node] = color
+        color_bit = 1 << color
+
+        for neighbor in g.get_neighbors(node):
+            if neighbor in coloring or neighbor_colors[neighbor] & color_bit:
+                continue
 
-    for node in nodes:
-        neighbors = g.get_neighbors(node)
-        adjacent_colors = set()
+            neighbor_colors[neighbor] |= color_bit
+            level = saturation[neighbor]
+            del buckets[level][neighbor]
+            level += 1
+            saturation[neighbor] = level
 
-        for neighbor in neighbors:  
-            if coloring.get(neighbor):
-                adjacent_colors.add(coloring.get(neighbor))
-        
-        # If no more colors are available, will throw IndexOutOfBounds exception
-        node_color = tuple(get_available_color(adjacent_colors))[0]
-        
-        coloring[node] = node_color
+            if level == len(buckets):
+                buckets.append(dict())
 
-   return coloring
+            buckets[level][neighbor] = True
+            highest = max(highest, level)
+
+    return coloring
+
+STRATEGIES = {
+    "welsh_powell": welsh_powell,
+    "smallest_last": smallest_last,
+    "dsatur": dsatur
+}
+
+def color(g, strategy="dsatur"):
+    """
+    Returns a dictionary with the nodes of the graph as keys and the assigned
+    colors as values, using one of the STRATEGIES.
+    """
+    return STRATEGIES[strategy](g)
+
+def color_count(coloring):
+    """
+    The number of colors used by the given coloring.
+    """
+    return max(coloring.values(), default=-1) + 1
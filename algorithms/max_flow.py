@@ -0,0 +1,246 @@
+from array import array
+from collections import deque
+
+from algorithms.errors import InvalidParameterException
+from data_structures.errors import NotInNodesException
+
+"""
+Maximum flows and minimum cuts of directed graphs from data_structures.graphs,
+with get_weight giving the capacity of every edge.
+"""
+
+INT64_MAX = 2 ** 63 - 1
+
+class FlowResult(object):
+    """
+    The outcome of max_flow. value is the total flow out of the source and
+    flows maps every (n1, n2) edge of the graph to the flow through it. Flows
+    are net: of two opposite edges, as every edge of an undirected graph is,
+    at most one carries any flow.
+    source_side is the set of nodes still reachable from the source in the
+    residual network and sink_side the rest; cut_edges are the edges going
+    from the former to the latter, which are all saturated and whose
+    capacities add up to value.
+    """
+
+    def __init__(self, value, flows, source_side, sink_side, cut_edges):
+        self.value = value
+        self.flows = flows
+        self.source_side = source_side
+        self.sink_side = sink_side
+        self.cut_edges = cut_edges
+
+class ResidualNetwork(object):
+    """
+    The residual network of a graph, laid out in flat arrays.
+
+    Nodes are numbered in the order of nodes. Every edge of the graph becomes
+    a pair of residual edges: edge 2k goes forward with the capacity of the
+    edge and edge 2k + 1 goes backward with none, so the partner of edge e is
+    always e ^ 1. heads[e] is the node edge e goes into and residual[e] how
+    much more can be pushed through it. The edges leaving node i are
+    edge_ids[offsets[i]:offsets[i + 1]].
+
+    If every capacity is an int that fits in 64 bits the residual capacities
+    are kept as ints, otherwise as floats.
+    """
+
+    def __init__(self, graph, nodes):
+        self.nodes = nodes
+        node_index = dict((node, index) for index, node in enumerate(nodes))
+        self.node_index = node_index
+        heads = array("q")
+        capacities = []
+
+        for node in nodes:
+            tail = node_index[node]
+
+            for neighbor in graph.get_neighbors(node):
+                capacity = graph.get_weight(node, neighbor)
+
+                if capacity < 0:
+                    raise InvalidParameterException(capacity)
+
+                heads.append(node_index[neighbor])
+                heads.append(tail)
+                capacities.append(capacity)
+                capacities.append(0)
+
+        if all(type(capacity) is int and capacity <= INT64_MAX for capacity in capacities):
+            residual = array("q", capacities)
+        else:
+            residual = array("d", capacities)
+
+        node_count = len(nodes)
+        edge_total = len(heads)
+        # Counting sort the residual edges by the node they leave.
+        offsets = array("q", bytes(8 * (node_count + 1)))
+
+        for edge in range(edge_total):
+            offsets[heads[edge ^ 1] + 1] += 1
+
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        edge_ids = array("q", bytes(8 * edge_total))
+        cursor = offsets[0:node_count]
+
+        for edge in range(edge_total):
+            tail = heads[edge ^ 1]
+            edge_ids[cursor[tail]] = edge
+            cursor[tail] += 1
+
+        self.heads = heads
+        self.residual = residual
+        self.capacities = array(residual.typecode, residual)
+        self.offsets = offsets
+        self.edge_ids = edge_ids
+
+    def levels(self, source):
+        """
+        BFS over the edges with residual capacity left. Returns the distance,
+        in edges, of every node from the source, -1 for the unreachable ones.
+        """
+        heads = self.heads
+        residual = self.residual
+        offsets = self.offsets
+        edge_ids = self.edge_ids
+        level = array("q", (-1,)) * len(self.nodes)
+        level[source] = 0
+        queue = deque((source,))
+
+        while queue:
+            node = queue.popleft()
+            next_level = level[node] + 1
+
+            for position in range(offsets[node], offsets[node + 1]):
+                edge = edge_ids[position]
+                head = heads[edge]
+
+                if level[head] < 0 and residual[edge] > 0:
+                    level[head] = next_level
+                    queue.append(head)
+
+        return level
+
+    def blocking_flow(self, source, sink, level):
+        """
+        Pushes flow from source to sink along shortest paths in the level graph
+        until every one of them has a saturated edge, and returns how much was
+        pushed. Iterative DFS: every node remembers the position of the first
+        edge it has not given up on yet, so every edge is given up on at most
+        once and every augmenting path costs O(V) on top of that.
+        """
+        heads = self.heads
+        residual = self.residual
+        offsets = self.offsets
+        edge_ids = self.edge_ids
+        cursor = offsets[0:len(self.nodes)]
+        pushed = 0
+        path = []
+        node = source
+
+        while True:
+            if node == sink:
+                bottleneck = min(residual[edge] for edge in path)
+                saturated = None
+
+                for k, edge in enumerate(path):
+                    residual[edge] -= bottleneck
+                    residual[edge ^ 1] += bottleneck
+
+                    if saturated is None and residual[edge] <= 0:
+                        saturated = k
+
+                pushed += bottleneck
+                # Back up to just before the first edge we saturated.
+                del path[saturated:]
+                node = heads[path[-1]] if path else source
+                continue
+
+            end = offsets[node + 1]
+            position = cursor[node]
+            next_level = level[node] + 1
+
+            while position < end:
+                edge = edge_ids[position]
+
+                if residual[edge] > 0 and level[heads[edge]] == next_level:
+                    break
+
+                position += 1
+
+            cursor[node] = position
+
+            if position < end:
+                path.append(edge_ids[position])
+                node = heads[path[-1]]
+            elif not path:
+                return pushed
+            else:
+                # Dead end. Nothing goes through here anymore in this phase.
+                level[node] = -1
+                node = heads[path.pop() ^ 1]
+                cursor[node] += 1
+
+def max_flow(graph, source, sink):
+    """
+    Dinic's algorithm. Alternates a BFS building the level graph of the
+    residual network with a blocking flow over it, until the sink can't be
+    reached. There are at most V phases so this is O(V^2 E), and much faster
+    in practice, especially on unit capacities.
+
+    The capacities are given by graph.get_weight and must be nonnegative.
+    Flows come back as ints if all the capacities are ints. Undirected graphs
+    work too: every edge can carry its capacity either way, but only one way
+    at a time.
+
+    Returns a FlowResult.
+    """
+    for node in (source, sink):
+        if node not in graph.added_nodes:
+            raise NotInNodesException(node)
+
+    if source == sink:
+        raise InvalidParameterException(sink)
+
+    nodes = list(graph.added_nodes)
+    network = ResidualNetwork(graph, nodes)
+    source_index = network.node_index[source]
+    sink_index = network.node_index[sink]
+    value = 0
+
+    while True:
+        level = network.levels(source_index)
+
+        if level[sink_index] < 0:
+            break
+
+        value += network.blocking_flow(source_index, sink_index, level)
+
+    heads = network.heads
+    flows = {}
+    cut_edges = []
+
+    for edge in range(0, len(heads), 2):
+        n1 = nodes[heads[edge + 1]]
+        n2 = nodes[heads[edge]]
+        flows[(n1, n2)] = network.capacities[edge] - network.residual[edge]
+
+        if level[heads[edge + 1]] >= 0 and level[heads[edge]] < 0:
+            cut_edges.append((n1, n2))
+
+    # Flow going both ways between two nodes cancels out. That changes
+    # neither the value nor the cut: nothing flows back into the source side.
+    for (n1, n2), flow in flows.items():
+        back = flows.get((n2, n1), 0)
+
+        if n1 != n2 and flow and back:
+            cancelled = min(flow, back)
+            flows[(n1, n2)] -= cancelled
+            flows[(n2, n1)] -= cancelled
+
+    source_side = set(node for index, node in enumerate(nodes) if level[index] >= 0)
+    sink_side = set(node for index, node in enumerate(nodes) if level[index] < 0)
+
+    return FlowResult(value, flows, source_side, sink_side, cut_edges)
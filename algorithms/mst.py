@@ -1,39 +1,139 @@
-from data_structures.graphs import  AdjacencyMatrix
 from data_structures.forests import ListForest
-from queue import PriorityQueue
+from data_structures.indexed_heap import IndexedMinHeap
+from data_structures.union_find import UnionFind
 
-import random
+"""
+Minimum spanning trees (forests, really, if the graph has islands) of
+undirected weighted graphs.
+"""
 
 class MSTAlgorithm(object):
     """
     A single MSTAlgorithm object should be able to compute MSTs repeatedly.
+
+    compute_mst takes an undirected Graph whose get_weight gives the cost of
+    each edge and returns a Forest holding every node of the graph. A tree edge
+    from u to v is recorded as link_child(u, v), where u is closer to the root
+    of its tree. After a computation, self.forest is the same forest and
+    self.weight is its total weight.
     """
-    
-    def compute_mst(g):
+
+    def compute_mst(self, g):
         raise NotImplementedError("compute_mst must be implemented")
 
-class PrimsAlgorithm(object):
-    
-    class __init__(self):
-        self.__reset()
+    def _reset(self):
+        self.forest = ListForest()
+        self.weight = 0
+
+class PrimsAlgorithm(MSTAlgorithm):
+    """
+    Grows each tree from a single node by repeatedly adding the cheapest edge
+    leaving it. The candidates are kept in an indexed heap so that a cheaper
+    edge to a non-tree vertex replaces the old one in place. O(E log V), and
+    only ever touches the heap when a key actually improves, which is what
+    makes it the better choice for dense graphs.
+    """
+
+    def __init__(self):
+        self._reset()
 
     def compute_mst(self, g):
-        self.__reset()
+        self._reset()
+        in_tree = set()
+        parent = {}
 
-        all_nodes = g.added_nodes()
-        deciderq = PriorityQueue()
-        limit = len(all_nodes)
+        for node in g.added_nodes:
+            self.forest.add_node(node)
 
-        while len(self.forest.get_nodes()) != limit:
-            # FIXME should get from nontree vertices instead
-            node = all_nodes.pop()
-            neighbors = g.get_neighbors(node)
+        for root in g.added_nodes:
+            if root in in_tree:
+                continue
 
-            for n in neighbors:
-                deciderq.put((g.get_weight(node, n), n))
+            candidates = IndexedMinHeap()
+            candidates.push(root, 0)
+            parent[root] = None
 
-            min_nontree = deciderq.get()
-            self.forest.link_child(node, min_nontree)
+            while len(candidates):
+                node, cost = candidates.pop()
+                in_tree.add(node)
 
-    def __reset(self):
-        self.forest = ListForest()
+                if parent[node] is not None:
+                    self.forest.link_child(parent[node], node)
+                    self.weight += cost
+
+                for neighbor in g.get_neighbors(node):
+                    if neighbor in in_tree:
+                        continue
+
+                    weight = g.get_weight(node, neighbor)
+
+                    if neighbor not in candidates:
+                        candidates.push(neighbor, weight)
+                        parent[neighbor] = node
+                    elif weight < candidates.key_of(neighbor):
+                        candidates.decrease_key(neighbor, weight)
+                        parent[neighbor] = node
+
+        return self.forest
+
+class KruskalsAlgorithm(MSTAlgorithm):
+    """
+    Goes through all the edges from cheapest to most expensive, keeping those
+    that join two different trees. Trees are tracked with a union-find.
+    O(E log E), dominated by the sort, which makes it the better choice for
+    sparse graphs.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def compute_mst(self, g):
+        self._reset()
+        trees = UnionFind()
+        edges = []
+
+        for node in g.added_nodes:
+            trees.add_object(node)
+
+            for neighbor in g.get_neighbors(node):
+                edges.append((g.get_weight(node, neighbor), node, neighbor))
+
+        # Don't let the sort fall back to comparing nodes.
+        edges.sort(key=lambda edge: edge[0])
+        tree_neighbors = dict((node, []) for node in g.added_nodes)
+
+        for weight, n1, n2 in edges:
+            if not trees.is_equal(n1, n2):
+                trees.make_equal(n1, n2)
+                tree_neighbors[n1].append(n2)
+                tree_neighbors[n2].append(n1)
+                self.weight += weight
+
+        self.__build_forest(tree_neighbors)
+        return self.forest
+
+    def __build_forest(self, tree_neighbors):
+        """
+        The edges Kruskal picks have no direction. Root each tree somewhere and
+        link the nodes in the order a DFS from the root finds them.
+        """
+        for node in tree_neighbors:
+            self.forest.add_node(node)
+
+        linked = set()
+
+        for root in tree_neighbors:
+            if root in linked:
+                continue
+
+            linked.add(root)
+            stack = [root]
+
+            while stack:
+                node = stack.pop()
+
+                for neighbor in tree_neighbors[node]:
+                    if neighbor not in linked:
+                        linked.add(neighbor)
+                        self.forest.link_child(node, neighbor)
+                        stack.append(neighbor)
@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+from algorithms.mst import PrimsAlgorithm, KruskalsAlgorithm
+from data_structures.graphs import UndirectedAdjList
+from stats.avg import mean
+
+import argparse
+import random
+import time
+
+"""
+Times Prim's against Kruskal's algorithm on random connected graphs of
+increasing density, to see where one overtakes the other.
+
+Run from the repository root as
+
+    python -m algorithms.mst_stats
+"""
+
+def random_connected_graph(node_count, density, rng):
+    """
+    A random spanning tree, to make sure the graph is connected, plus every
+    other possible edge with probability density. Weights are uniform in
+    [1, 1000].
+    """
+    graph = UndirectedAdjList()
+    graph.add_nodes(range(node_count))
+
+    for node in range(1, node_count):
+        graph.make_neighbor(node, rng.randrange(node), rng.randint(1, 1000))
+
+    for n1 in range(node_count):
+        for n2 in range(n1 + 1, node_count):
+            if rng.random() < density:
+                graph.make_neighbor(n1, n2, rng.randint(1, 1000))
+
+    return graph
+
+def time_mst(algorithm, graph, runs):
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        algorithm.compute_mst(graph)
+        timings.append(time.perf_counter() - start)
+
+    return mean(timings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prim's vs Kruskal's algorithm.")
+    parser.add_argument(
+        "--nodes", "-n", type=int, default=400, required=False,
+        help="The number of nodes in each graph."
+    )
+    parser.add_argument(
+        "--densities", "-d", type=float, nargs="+", required=False,
+        default=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0),
+        help="The edge probabilities to try."
+    )
+    parser.add_argument(
+        "--runs", "-r", type=int, default=3, required=False,
+        help="How many times each algorithm is run on each graph."
+    )
+    parser.add_argument(
+        "--seed", "-s", type=int, default=0, required=False,
+        help="Seed for generating the graphs."
+    )
+
+    args = parser.parse_args()
+    if args.nodes <= 0 or args.runs <= 0:
+        print("nodes and runs should both be greater than 0")
+        exit(1)
+
+    rng = random.Random(args.seed)
+    prim = PrimsAlgorithm()
+    kruskal = KruskalsAlgorithm()
+
+    print("%10s %10s %12s %12s %10s" % ("density", "edges", "prim (s)", "kruskal (s)", "winner"))
+    for density in args.densities:
+        graph = random_connected_graph(args.nodes, density, rng)
+        prim_time = time_mst(prim, graph, args.runs)
+        kruskal_time = time_mst(kruskal, graph, args.runs)
+
+        if prim.weight != kruskal.weight:
+            print("Disagreement on MST weight: %s vs %s" % (prim.weight, kruskal.weight))
+            exit(1)
+
+        winner = "prim" if prim_time < kruskal_time else "kruskal"
+        print("%10s %10s %12.4f %12.4f %10s" %
+          (density, graph.edge_count, prim_time, kruskal_time, winner))
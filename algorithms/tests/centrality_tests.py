@@ -0,0 +1,162 @@
+from ..centrality import degree_centrality, pagerank, hits
+from ..errors import ConvergenceException, InvalidParameterException
+from .. import centrality
+
+from data_structures.graphs import AdjacencyLists, AdjacencyMatrix, CSRGraph
+
+from unittest import mock
+
+import random
+import unittest
+
+class CentralityTests(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(19)
+        self.graph = AdjacencyLists()
+        self.graph.add_nodes(range(50))
+
+        for _ in range(200):
+            self.graph.make_neighbor(rng.randrange(50), rng.randrange(50), rng.randint(1, 5))
+
+        # Make sure there is a dangling node.
+        self.graph.add_node("sink")
+        self.graph.make_neighbor(0, "sink", 1)
+
+    def __check_pagerank(self, graph, ranks, damping=0.85, weighted=False):
+        """
+        The ranks sum up to 1 and are a fixed point of one PageRank step.
+        """
+        self.assertAlmostEqual(1, sum(ranks.values()))
+        node_count = len(graph.added_nodes)
+        expected = dict((node, 0) for node in graph.added_nodes)
+        dangling = 0
+
+        for node in graph.added_nodes:
+            neighbors = graph.get_neighbors(node)
+
+            if weighted:
+                weights = [graph.get_weight(node, neighbor) for neighbor in neighbors]
+            else:
+                weights = [1] * len(neighbors)
+
+            if not sum(weights):
+                dangling += ranks[node]
+                continue
+
+            for neighbor, weight in zip(neighbors, weights):
+                expected[neighbor] += damping * ranks[node] * weight / sum(weights)
+
+        for node in graph.added_nodes:
+            jump = (damping * dangling + 1 - damping) / node_count
+            self.assertAlmostEqual(expected[node] + jump, ranks[node], places=8)
+
+    def __check_all(self):
+        ranks = pagerank(self.graph)
+        self.__check_pagerank(self.graph, ranks)
+        self.__check_pagerank(self.graph, pagerank(self.graph, weighted=True), weighted=True)
+
+        # Warm-started from a converged run, one more iteration is enough.
+        self.assertEqual(ranks.keys(), pagerank(self.graph, start=ranks, max_iterations=1).keys())
+        self.assertRaises(ConvergenceException, pagerank, self.graph, max_iterations=1)
+
+        hubs, authorities = hits(self.graph)
+        self.assertAlmostEqual(1, sum(hubs.values()))
+        self.assertAlmostEqual(1, sum(authorities.values()))
+        self.assertEqual(0, hubs["sink"])
+
+        for node in self.graph.added_nodes:
+            if not self.graph.get_predecessors(node):
+                self.assertEqual(0, authorities[node])
+
+        # Starting on the sink alone reaches nobody, so HITS starts over
+        # uniformly.
+        sink_hubs, sink_authorities = hits(self.graph, start={"sink": 1})
+
+        for node in self.graph.added_nodes:
+            self.assertAlmostEqual(hubs[node], sink_hubs[node], places=6)
+            self.assertAlmostEqual(authorities[node], sink_authorities[node], places=6)
+
+    def test_pure_python(self):
+        with mock.patch.object(centrality, "numpy", None):
+            self.__check_all()
+
+    @unittest.skipIf(centrality.numpy is None, "needs NumPy")
+    def test_numpy(self):
+        self.__check_all()
+
+    def test_symmetric(self):
+        """
+        Every node looks the same in a cycle or a complete graph.
+        """
+        cycle = CSRGraph.from_edges((i, (i + 1) % 5) for i in range(5))
+        complete = AdjacencyMatrix()
+        complete.add_nodes(range(4))
+
+        for i in range(4):
+            for j in range(i + 1, 4):
+                complete.make_neighbor(i, j, 1)
+
+        for graph in (cycle, complete):
+            node_count = len(graph.added_nodes)
+
+            for rank in pagerank(graph).values():
+                self.assertAlmostEqual(1.0 / node_count, rank)
+
+            for scores in hits(graph):
+                for score in scores.values():
+                    self.assertAlmostEqual(1.0 / node_count, score)
+
+    def __check_degree_centrality(self):
+        in_degrees, out_degrees = degree_centrality(self.graph, normalized=False)
+
+        for node in self.graph.added_nodes:
+            self.assertEqual(self.graph.get_indegree(node), in_degrees[node])
+            self.assertEqual(self.graph.get_outdegree(node), out_degrees[node])
+
+        in_degrees, _ = degree_centrality(self.graph)
+        self.assertEqual(1.0 / 50, in_degrees["sink"])
+
+    def test_degree_centrality(self):
+        with mock.patch.object(centrality, "numpy", None):
+            self.__check_degree_centrality()
+
+        if centrality.numpy is not None:
+            self.__check_degree_centrality()
+
+    def __check_zero_weights(self):
+        graph = AdjacencyLists()
+        graph.add_nodes(range(4))
+        graph.make_neighbor(0, 1)
+        graph.make_neighbor(0, 2)
+        graph.make_neighbor(1, 2, 3)
+        graph.make_neighbor(2, 3, 1)
+        graph.make_neighbor(3, 0, 2)
+        self.__check_pagerank(graph, pagerank(graph, weighted=True), weighted=True)
+
+    def test_zero_weights(self):
+        """
+        Out-edges that all weigh 0, as make_neighbor adds by default, make a
+        node dangling when weighted.
+        """
+        with mock.patch.object(centrality, "numpy", None):
+            self.__check_zero_weights()
+
+        if centrality.numpy is not None:
+            self.__check_zero_weights()
+
+    def test_edge_cases(self):
+        self.assertEqual({}, pagerank(AdjacencyLists()))
+        self.assertRaises(InvalidParameterException, pagerank, self.graph, damping=2)
+
+        islands = AdjacencyLists()
+        islands.add_nodes("ab")
+        self.assertEqual({"a": 0.5, "b": 0.5}, pagerank(islands))
+        self.assertEqual({"a": 0, "b": 0}, hits(islands)[1])
+
+        islands.make_neighbor("a", "b", -1)
+        self.assertRaises(InvalidParameterException, pagerank, islands, weighted=True)
+        self.assertAlmostEqual(1, sum(pagerank(islands).values()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+from ..graph_coloring import color, color_count, dsatur, lowest_free_color, smallest_last_order, \
+  STRATEGIES
+
+from data_structures.graphs import AdjacencyMatrix, UndirectedAdjList
+
+import random
+import unittest
+
+class GraphColoringTests(unittest.TestCase):
+
+    def __assert_proper(self, g, coloring):
+        self.assertEqual(g.added_nodes, set(coloring))
+
+        for node in g.added_nodes:
+            for neighbor in g.get_neighbors(node):
+                self.assertNotEqual(coloring[node], coloring[neighbor])
+
+    def __random_graph(self, node_count, density, seed):
+        rng = random.Random(seed)
+        g = UndirectedAdjList()
+        g.add_nodes(range(node_count))
+        g.add_edges((n1, n2) for n1 in range(node_count) for n2 in range(n1 + 1, node_count)
+          if rng.random() < density)
+        return g
+
+    def test_lowest_free_color(self):
+        self.assertEqual(0, lowest_free_color(0))
+        self.assertEqual(1, lowest_free_color(0b1))
+        self.assertEqual(0, lowest_free_color(0b110))
+        self.assertEqual(3, lowest_free_color(0b10111))
+        self.assertEqual(100, lowest_free_color((1 << 100) - 1))
+
+    def test_proper_colorings(self):
+        for seed, density in ((1, 0.05), (2, 0.3), (3, 0.9)):
+            g = self.__random_graph(80, density, seed)
+
+            for strategy in STRATEGIES:
+                self.__assert_proper(g, color(g, strategy))
+
+    def test_complete_graph(self):
+        """
+        Needs as many colors as there are nodes, more than the old palette had.
+        """
+        g = AdjacencyMatrix()
+        g.add_nodes(range(10))
+        g.add_edges((n1, n2) for n1 in range(10) for n2 in range(n1 + 1, 10))
+
+        for strategy in STRATEGIES:
+            coloring = color(g, strategy)
+            self.__assert_proper(g, coloring)
+            self.assertEqual(10, color_count(coloring))
+
+    def test_dsatur_bipartite(self):
+        """
+        A crown graph: greedy in a bad order needs n colors, DSatur needs 2.
+        """
+        g = UndirectedAdjList()
+        size = 8
+        g.add_nodes([("u", i) for i in range(size)] + [("v", i) for i in range(size)])
+        g.add_edges((("u", i), ("v", j)) for i in range(size) for j in range(size) if i != j)
+        coloring = dsatur(g)
+        self.__assert_proper(g, coloring)
+        self.assertEqual(2, color_count(coloring))
+
+    def test_smallest_last_order(self):
+        """
+        On a tree, every node but the first has at most one neighbor before it.
+        """
+        g = UndirectedAdjList()
+        g.add_nodes(range(1, 32))
+        g.add_edges((i // 2, i) for i in range(2, 32))
+        order = smallest_last_order(g)
+        self.assertEqual(g.added_nodes, set(order))
+        seen = set()
+
+        for node in order:
+            self.assertTrue(len(seen.intersection(g.get_neighbors(node))) <= 1)
+            seen.add(node)
+
+        self.assertEqual(2, color_count(color(g, "smallest_last")))
+
+    def test_empty_graph(self):
+        for strategy in STRATEGIES:
+            self.assertEqual({}, color(UndirectedAdjList(), strategy))
@@ -0,0 +1,115 @@
+from ..errors import InvalidParameterException
+from ..max_flow import max_flow
+
+from data_structures.errors import NotInNodesException
+from data_structures.graphs import AdjacencyLists, UndirectedAdjList
+
+import random
+import unittest
+
+class MaxFlowTests(unittest.TestCase):
+
+    def setUp(self):
+        """
+        The flow network from CLRS 3e Figure 26.1. Its maximum flow is 23.
+        """
+        self.clrs = AdjacencyLists()
+        self.clrs.add_nodes(("s", "v1", "v2", "v3", "v4", "t"))
+        self.clrs.add_edges((("s", "v1", 16), ("s", "v2", 13), ("v1", "v3", 12),
+          ("v2", "v1", 4), ("v2", "v4", 14), ("v3", "v2", 9), ("v3", "t", 20),
+          ("v4", "v3", 7), ("v4", "t", 4)))
+
+    def __check_flow(self, graph, source, sink, result):
+        """
+        The flow respects the capacities and is conserved everywhere but at
+        the source and the sink, and the cut is as big as the flow.
+        """
+        balance = dict((node, 0) for node in graph.added_nodes)
+
+        for (n1, n2), flow in result.flows.items():
+            self.assertTrue(0 <= flow <= graph.get_weight(n1, n2))
+            balance[n1] -= flow
+            balance[n2] += flow
+
+        self.assertEqual(-result.value, balance.pop(source))
+        self.assertEqual(result.value, balance.pop(sink))
+        self.assertTrue(all(flow == 0 for flow in balance.values()))
+
+        self.assertTrue(source in result.source_side)
+        self.assertTrue(sink in result.sink_side)
+        self.assertEqual(graph.added_nodes, result.source_side.union(result.sink_side))
+
+        cut = 0
+
+        for n1 in result.source_side:
+            for n2 in graph.get_neighbors(n1):
+                if n2 in result.sink_side:
+                    self.assertTrue((n1, n2) in result.cut_edges)
+                    cut += graph.get_weight(n1, n2)
+
+        self.assertEqual(result.value, cut)
+
+    def test_clrs(self):
+        result = max_flow(self.clrs, "s", "t")
+        self.assertEqual(23, result.value)
+        self.__check_flow(self.clrs, "s", "t", result)
+        self.assertEqual(set(("s", "v1", "v2", "v4")), result.source_side)
+        self.assertTrue(type(result.value) is int)
+        self.assertTrue(all(type(flow) is int for flow in result.flows.values()))
+
+        self.clrs.make_neighbor("v2", "t", 0.5)
+        result = max_flow(self.clrs, "s", "t")
+        self.assertEqual(23.5, result.value)
+        self.assertTrue(type(result.value) is float)
+        self.__check_flow(self.clrs, "s", "t", result)
+
+    def test_random(self):
+        rng = random.Random(18)
+
+        for _ in range(20):
+            graph = AdjacencyLists()
+            graph.add_nodes(range(30))
+
+            for _ in range(120):
+                graph.make_neighbor(rng.randrange(30), rng.randrange(30), rng.randint(0, 20))
+
+            self.__check_flow(graph, 0, 29, max_flow(graph, 0, 29))
+
+    def test_undirected(self):
+        graph = UndirectedAdjList()
+        graph.add_nodes("abcd")
+        graph.add_edges((("a", "b", 3), ("b", "d", 2), ("a", "c", 1), ("c", "b", 5)))
+        result = max_flow(graph, "d", "a")
+        self.assertEqual(2, result.value)
+        self.assertEqual(set(("d",)), result.source_side)
+
+        rng = random.Random(18)
+
+        for _ in range(10):
+            graph = UndirectedAdjList()
+            graph.add_nodes(range(20))
+            graph.add_edges(
+              (rng.randrange(20), rng.randrange(20), rng.randint(1, 9)) for _ in range(60)
+            )
+            result = max_flow(graph, 0, 19)
+            self.__check_flow(graph, 0, 19, result)
+
+            for (n1, n2), flow in result.flows.items():
+                if n1 != n2:
+                    self.assertTrue(flow == 0 or result.flows[(n2, n1)] == 0)
+
+    def test_disconnected(self):
+        self.clrs.add_node("island")
+        result = max_flow(self.clrs, "s", "island")
+        self.assertEqual(0, result.value)
+        self.assertEqual(set(("island",)), result.sink_side)
+        self.assertEqual([], result.cut_edges)
+
+    def test_bad_parameters(self):
+        self.assertRaises(InvalidParameterException, max_flow, self.clrs, "s", "s")
+        self.assertRaises(NotInNodesException, max_flow, self.clrs, "s", "x")
+        self.clrs.make_neighbor("t", "s", -1)
+        self.assertRaises(InvalidParameterException, max_flow, self.clrs, "s", "t")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from ..mst import PrimsAlgorithm, KruskalsAlgorithm
+
+from data_structures.graphs import AdjacencyMatrix, UndirectedAdjList
+
+import random
+import unittest
+
+class MSTTests(unittest.TestCase):
+
+    def setUp(self):
+        """
+        The example from CLRS 3e Figure 23.1. Its MST weighs 37.
+        """
+        self.clrs_edges = (("a", "b", 4), ("a", "h", 8), ("b", "c", 8),
+          ("b", "h", 11), ("c", "d", 7), ("c", "f", 4), ("c", "i", 2),
+          ("d", "e", 9), ("d", "f", 14), ("e", "f", 10), ("f", "g", 2),
+          ("g", "h", 1), ("g", "i", 6), ("h", "i", 7))
+        self.algorithms = (PrimsAlgorithm(), KruskalsAlgorithm())
+
+    def __make_graph(self, GraphType, edges):
+        graph = GraphType()
+        graph.add_nodes(set(edge[0] for edge in edges).union(edge[1] for edge in edges))
+        graph.add_edges(edges)
+        return graph
+
+    def __check_forest(self, graph, forest, tree_count):
+        """
+        Every node is in the forest, every link is an edge of the graph and
+        there are as many roots as there should be trees.
+        """
+        nodes = forest.get_nodes()
+        self.assertEqual(graph.added_nodes, set(nodes))
+        roots = 0
+
+        for node in nodes:
+            parents = forest.get_parents(node)
+            self.assertTrue(len(parents) <= 1)
+
+            if parents:
+                self.assertTrue(graph.is_reachable(parents[0], node))
+            else:
+                roots += 1
+
+        self.assertEqual(tree_count, roots)
+
+    def test_clrs(self):
+        for GraphType in (UndirectedAdjList, AdjacencyMatrix):
+            graph = self.__make_graph(GraphType, self.clrs_edges)
+
+            for algorithm in self.algorithms:
+                forest = algorithm.compute_mst(graph)
+                self.assertEqual(37, algorithm.weight)
+                self.__check_forest(graph, forest, 1)
+
+    def test_islands(self):
+        edges = self.clrs_edges + (("x", "y", 3), ("y", "z", 1), ("x", "z", 5))
+        graph = self.__make_graph(UndirectedAdjList, edges)
+        graph.add_node("lonely")
+
+        for algorithm in self.algorithms:
+            forest = algorithm.compute_mst(graph)
+            self.assertEqual(41, algorithm.weight)
+            self.__check_forest(graph, forest, 3)
+
+    def test_agreement(self):
+        """
+        Both algorithms should come up with the same total weight on random
+        graphs. Running them twice also checks that they reset properly.
+        """
+        rng = random.Random(23)
+        nodes = range(60)
+        edges = [(u, v, rng.randint(1, 50)) for u in nodes for v in nodes
+          if u < v and rng.random() < 0.2]
+        graph = self.__make_graph(UndirectedAdjList, edges)
+        prim, kruskal = self.algorithms
+
+        for _ in range(2):
+            prim.compute_mst(graph)
+            kruskal.compute_mst(graph)
+            self.assertEqual(prim.weight, kruskal.weight)
@@ -0,0 +1,69 @@
+from ..triangles import triangles, count_triangles, clustering_coefficients, average_clustering
+
+from data_structures.graphs import AdjacencyMatrix, UndirectedAdjList
+
+import itertools
+import random
+import unittest
+
+class TrianglesTests(unittest.TestCase):
+
+    def __make_graph(self, GraphType, node_count, edges):
+        graph = GraphType()
+        graph.add_nodes(range(node_count))
+
+        for n1, n2 in edges:
+            graph.make_neighbor(n1, n2, 1)
+
+        return graph
+
+    def __brute_force(self, graph):
+        """
+        Tries every triple of nodes.
+        """
+        counts = dict((node, 0) for node in graph.added_nodes)
+
+        for triple in itertools.combinations(graph.added_nodes, 3):
+            a, b, c = triple
+
+            if graph.is_reachable(a, b) and graph.is_reachable(b, c) and graph.is_reachable(a, c):
+                for node in triple:
+                    counts[node] += 1
+
+        return counts
+
+    def test_random(self):
+        rng = random.Random(20)
+        edges = [(rng.randrange(25), rng.randrange(25)) for _ in range(90)]
+
+        for GraphType in (UndirectedAdjList, AdjacencyMatrix):
+            graph = self.__make_graph(GraphType, 25, edges)
+            expected = self.__brute_force(graph)
+            self.assertEqual(expected, triangles(graph))
+            self.assertEqual(sum(expected.values()) // 3, count_triangles(graph))
+
+            for node, coefficient in clustering_coefficients(graph).items():
+                degree = len([n for n in graph.get_neighbors(node) if n != node])
+
+                if degree < 2:
+                    self.assertEqual(0, coefficient)
+                else:
+                    self.assertAlmostEqual(expected[node] / (degree * (degree - 1) / 2), coefficient)
+
+    def test_complete(self):
+        for GraphType in (UndirectedAdjList, AdjacencyMatrix):
+            graph = self.__make_graph(GraphType, 6, itertools.combinations(range(6), 2))
+            self.assertEqual(20, count_triangles(graph))
+            self.assertEqual(dict((node, 10) for node in range(6)), triangles(graph))
+            self.assertEqual(1, average_clustering(graph))
+
+    def test_no_triangles(self):
+        # A square with a tail.
+        graph = self.__make_graph(UndirectedAdjList, 5, ((0, 1), (1, 2), (2, 3), (3, 0), (3, 4)))
+        graph.make_neighbor(4, 4)
+        self.assertEqual(0, count_triangles(graph))
+        self.assertEqual(0, average_clustering(graph))
+        self.assertEqual(0, average_clustering(UndirectedAdjList()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -188,3 +188,269 @@ class NaiveBinaryTree(BinaryTree):
                 return True
 
         return False
+
+class AVLNode(BinaryTree):
+    """
+    A node of an AVLTree. node_data is the key; value is what it maps to and
+    height is the number of nodes on the longest path down to a leaf, this
+    node included.
+    """
+
+    def __init__(self, node_data, value=None):
+        super(AVLNode, self).__init__(node_data)
+        self.value = value
+        self.height = 1
+
+    def search(self, query, search_type=Traversals.INORDER):
+        """
+        Goes down the tree comparing keys, O(log n). search_type is ignored:
+        the order of the keys already says where query must be.
+        """
+        node = self
+
+        while node is not None:
+            if query == node.node_data:
+                return True
+
+            node = node.left_son if query < node.node_data else node.right_son
+
+        return False
+
+def _height(node):
+    return node.height if node is not None else 0
+
+def _update_height(node):
+    node.height = 1 + max(_height(node.left_son), _height(node.right_son))
+
+def _rotate_right(node):
+    pivot = node.left_son
+    node.left_son = pivot.right_son
+    pivot.right_son = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+def _rotate_left(node):
+    pivot = node.right_son
+    node.right_son = pivot.left_son
+    pivot.left_son = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+def _rebalance(node):
+    """
+    Restores the AVL property at node, whose subtrees are balanced and differ
+    in height by at most 2. Returns the root of the subtree.
+    """
+    _update_height(node)
+    balance = _height(node.left_son) - _height(node.right_son)
+
+    if balance > 1:
+        if _height(node.left_son.left_son) < _height(node.left_son.right_son):
+            node.left_son = _rotate_left(node.left_son)
+
+        return _rotate_right(node)
+
+    if balance < -1:
+        if _height(node.right_son.right_son) < _height(node.right_son.left_son):
+            node.right_son = _rotate_right(node.right_son)
+
+        return _rotate_left(node)
+
+    return node
+
+class AVLTree(object):
+    """
+    An ordered map on top of AVLNodes. The heights of the two subtrees of any
+    node differ by at most one, so the tree is always O(log n) deep and
+    insert, delete, search, floor and ceiling are all O(log n). Keys only need
+    to be comparable with each other.
+
+    Iterating over the tree gives the keys in order, through the same
+    InorderIterator the other trees use.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def __contains__(self, key):
+        return self.root is not None and self.root.search(key)
+
+    def __iter__(self):
+        for node in self.nodes():
+            yield node.node_data
+
+    def nodes(self):
+        """
+        The AVLNodes of the tree, in key order.
+        """
+        if self.root is None:
+            return iter(())
+
+        return InorderIterator(self.root)
+
+    def items(self):
+        for node in self.nodes():
+            yield node.node_data, node.value
+
+    def __find(self, key):
+        node = self.root
+
+        while node is not None and key != node.node_data:
+            node = node.left_son if key < node.node_data else node.right_son
+
+        return node
+
+    def get(self, key, default=None):
+        node = self.__find(key)
+        return node.value if node is not None else default
+
+    def __getitem__(self, key):
+        node = self.__find(key)
+
+        if node is None:
+            raise KeyError(key)
+
+        return node.value
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def insert(self, key, value=None):
+        """
+        Maps key to value, replacing whatever it was mapped to before.
+        """
+        self.root = self.__insert(self.root, key, value)
+
+    def __insert(self, node, key, value):
+        if node is None:
+            self.__size += 1
+            return AVLNode(key, value)
+
+        if key == node.node_data:
+            node.value = value
+            return node
+
+        if key < node.node_data:
+            node.left_son = self.__insert(node.left_son, key, value)
+        else:
+            node.right_son = self.__insert(node.right_son, key, value)
+
+        return _rebalance(node)
+
+    def delete(self, key):
+        """
+        Removes key from the tree. Throws a KeyError if it is not there.
+        """
+        self.root = self.__delete(self.root, key)
+        self.__size -= 1
+
+    def __delete(self, node, key):
+        if node is None:
+            raise KeyError(key)
+
+        if key == node.node_data:
+            if node.left_son is None:
+                return node.right_son
+
+            if node.right_son is None:
+                return node.left_son
+
+            # Put the smallest key of the right subtree here instead.
+            successor = node.right_son
+
+            while successor.left_son is not None:
+                successor = successor.left_son
+
+            node.right_son = self.__delete_min(node.right_son)
+            successor.left_son = node.left_son
+            successor.right_son = node.right_son
+            return _rebalance(successor)
+
+        if key < node.node_data:
+            node.left_son = self.__delete(node.left_son, key)
+        else:
+            node.right_son = self.__delete(node.right_son, key)
+
+        return _rebalance(node)
+
+    def __delete_min(self, node):
+        if node.left_son is None:
+            return node.right_son
+
+        node.left_son = self.__delete_min(node.left_son)
+        return _rebalance(node)
+
+    def floor(self, key):
+        """
+        Returns the largest key in the tree that is at most key, or None if
+        there is none.
+        """
+        node = self.root
+        best = None
+
+        while node is not None:
+            if key == node.node_data:
+                return node.node_data
+
+            if key < node.node_data:
+                node = node.left_son
+            else:
+                best = node.node_data
+                node = node.right_son
+
+        return best
+
+    def ceiling(self, key):
+        """
+        Returns the smallest key in the tree that is at least key, or None if
+        there is none.
+        """
+        node = self.root
+        best = None
+
+        while node is not None:
+            if key == node.node_data:
+                return node.node_data
+
+            if key > node.node_data:
+                node = node.right_son
+            else:
+                best = node.node_data
+                node = node.left_son
+
+        return best
+
+    def range(self, low=None, high=None):
+        """
+        Yields the (key, value) pairs with low <= key <= high, in key order.
+        Either bound may be None for no bound. Only the subtrees that can hold
+        such keys are visited, so this is O(log n + the number of pairs).
+        """
+        stack = []
+        node = self.root
+
+        while stack or node is not None:
+            if node is not None:
+                if low is not None and node.node_data < low:
+                    # Everything on the left is too small too.
+                    node = node.right_son
+                else:
+                    stack.append(node)
+                    node = node.left_son
+            else:
+                node = stack.pop()
+
+                if high is not None and node.node_data > high:
+                    return
+
+                yield node.node_data, node.value
+                node = node.right_son
@@ -18,6 +18,43 @@ class DuplicateNodeException(Exception):
     def __str__(self):
         return "Already added to the structure: " + repr(self.value)
 
+class CyclicGraphException(Exception):
+    """
+    Thrown when an operation needs an acyclic graph but got one with a cycle.
+    """
+
+    def __init__(self, value):
+        """
+        The value is expected to be the offending cycle, as a list of nodes.
+        """
+        self.value = value
+
+    def __str__(self):
+        return "Graph has a cycle: " + repr(self.value)
+
+class SnapshotFormatException(Exception):
+    """
+    Thrown when a file does not hold a graph snapshot we can read.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return "Can't read graph snapshot: " + str(self.value)
+
+class GraphFormatException(Exception):
+    """
+    Thrown when a line of an edge file can't be read as an edge.
+    """
+
+    def __init__(self, line_number, value):
+        self.line_number = line_number
+        self.value = value
+
+    def __str__(self):
+        return "Can't read line %d of graph file: %s" % (self.line_number, self.value)
+
 class CorruptedStructureException(Exception):
     """
     Thrown when suddenly a given invariant for a structure fails to hold.
@@ -59,10 +59,26 @@ class ListForest(Forest):
 
     def __init__(self):
         self.__nodes = []
+        # node -> index of its first copy, for nodes that can be hashed
+        self.__node_index = {}
     
     def add_node(self, node_contents):
+        try:
+            self.__node_index.setdefault(node_contents, len(self.__nodes))
+        except TypeError:
+            pass
+
         self.__nodes.append([node_contents])
 
+    def __index_of(self, node):
+        """
+        O(1) for hashable nodes. Otherwise we'll search for them.
+        """
+        try:
+            return self.__node_index[node]
+        except (KeyError, TypeError):
+            return self.get_nodes().index(node)
+
     def get_nodes(self):
         """
         Returns all the nodes inserted so far in this tree. This returns
@@ -81,9 +97,8 @@ class ListForest(Forest):
         
         TODO Test with deep and shallow copies.
         """
-        nodelist = self.get_nodes()
-        parent_index = nodelist.index(parent)
-        child_index = nodelist.index(child)
+        parent_index = self.__index_of(parent)
+        child_index = self.__index_of(child)
 
         self.__nodes[parent_index].append(child_index)
 
@@ -91,8 +106,7 @@ class ListForest(Forest):
         """
         Returns all the children of parent as a list of objects.
         """
-        all_nodes = self.get_nodes()
-        parent_index = all_nodes.index(parent)
+        parent_index = self.__index_of(parent)
         parent_family = self.__nodes[parent_index]
         children = parent_family[1:len(parent_family)]
         
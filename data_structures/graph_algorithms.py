@@ -1,97 +1,847 @@
 #! /usr/bin/env python3
 
-from .graphs import Graph, AdjacencyLists, DFSIterator
+from .errors import CyclicGraphException, NotInNodesException
+from .graphs import Graph, AdjacencyLists, AdjacencyMatrix, DFSIterator, GridGraph
 from .json_parser import GraphParser
 
+from array import array
+import heapq
+import itertools
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def is_acyclic(graph):
     """
-    Loop through the graph via DFS. Take note of each node visited. Get the
-    neighbors of each visited node and, if one of the neighbors has been
-    visited previously, the graph is acyclic (we have found a "back edge").
-
     Return True is the graph is acyclic ("no cycles"). Otherwise False.
+
+    Note that this treats the graph as directed. An undirected edge goes both
+    ways and so counts as a cycle.
+    """
+    return find_cycle(graph) is None
+
+def _postorder_or_cycle(graph):
+    """
+    Iterative DFS over the whole graph, coloring nodes as it goes: a node is
+    "gray" while it is on the DFS path and "black" once all its descendants
+    are done. An edge to a gray node is a back edge and means we've found a
+    cycle.
+
+    Returns a (postorder, cycle) pair. If a back edge is found the search stops
+    and cycle lists the nodes in it, in order, with the last node connecting
+    back to the first. Otherwise cycle is None and postorder lists every node
+    in the order they were finished. O(V + E).
     """
-    visited = []
-    dfs_seq = DFSIterator(graph)
+    GRAY, BLACK = 0, 1
+    color = {}
+    parent = {}
+    postorder = []
+
+    for root in graph.added_nodes:
+        if root in color:
+            continue
+
+        color[root] = GRAY
+        parent[root] = None
+        work = [(root, iter(graph.get_neighbors(root)))]
+
+        while work:
+            node, neighbors = work[-1]
+
+            for neighbor in neighbors:
+                neighbor_color = color.get(neighbor)
+
+                if neighbor_color is None:
+                    color[neighbor] = GRAY
+                    parent[neighbor] = node
+                    work.append((neighbor, iter(graph.get_neighbors(neighbor))))
+                    break
+                elif neighbor_color == GRAY:
+                    # Back edge. Walk the DFS path back up to neighbor.
+                    cycle = [node]
+
+                    while cycle[-1] != neighbor:
+                        cycle.append(parent[cycle[-1]])
 
-    for node in dfs_seq:
-        visited.insert(0, node)
-        node_neighbors = graph.get_neighbors(node)
-        
-        for neighbor in node_neighbors:
-            if neighbor in visited:
-                return False
+                    cycle.reverse()
+                    return postorder, cycle
+            else:
+                work.pop()
+                color[node] = BLACK
+                postorder.append(node)
 
-    return True
+    return postorder, None
 
-# Lifted from algorithms/snippets/grids.py
-def __get_adjacent_4c(p, row_limit, col_limit):
+def find_cycle(graph):
     """
-    Get the adjacent cells of the given point p assuming adjacency is 4-connected.
+    Returns the nodes of some cycle in the graph, in order, where the last node
+    connects back to the first. Returns None if the graph is acyclic. O(V + E).
     """
-    rows = []
-    cols = []
+    return _postorder_or_cycle(graph)[1]
 
-    if p[0] == 0:
-        rows.append(p[0] + 1)
-    elif p[0] == (row_limit - 1):
-        rows.append(p[0] - 1)
-    else:
-        rows.extend([p[0] + 1, p[0] - 1])
+def topological_sort(graph):
+    """
+    Returns a list of all the nodes in the graph such that every node comes
+    before all the nodes it can reach. Throws a CyclicGraphException, carrying
+    a cycle as found by find_cycle, if there is no such ordering. O(V + E).
+    """
+    postorder, cycle = _postorder_or_cycle(graph)
 
-    if p[1] == 0:
-        cols.append(p[1] + 1)
-    elif p[1] == (col_limit - 1):
-        cols.append(p[1] - 1)
-    else:
-        cols.extend([p[1] + 1, p[1] - 1])
+    if cycle is not None:
+        raise CyclicGraphException(cycle)
 
-    adjacent = []
-    adjacent.extend([(r, p[1]) for r in rows])
-    adjacent.extend([(p[0], c) for c in cols])
+    postorder.reverse()
+    return postorder
 
-    return adjacent
+def strongly_connected_components(graph):
+    """
+    Tarjan's algorithm, without recursion. Returns a list of the strongly
+    connected components of the graph, each a list of nodes. Components come
+    in reverse topological order: no component can reach one listed after it.
+    O(V + E).
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
 
-def dijkstra(map):
+    for root in graph.added_nodes:
+        if root in index:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get_neighbors(root)))]
+
+        while work:
+            node, neighbors = work[-1]
+
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph.get_neighbors(neighbor))))
+                    break
+                elif neighbor in on_stack and index[neighbor] < lowlink[node]:
+                    lowlink[node] = index[neighbor]
+            else:
+                work.pop()
+
+                if work:
+                    caller = work[-1][0]
+                    lowlink[caller] = min(lowlink[caller], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member)
+                        component.append(member)
+
+                        if member == node:
+                            break
+
+                    components.append(component)
+
+    return components
+
+class ReachabilityIndex(object):
     """
-    This is Dijkstra's algorithm on a grid.
+    Answers whether there is a path from one node to another in O(1), after
+    O(V + E) preprocessing plus whatever labelling needs.
 
-    TODO Rewrite for a generic graph.
+    The graph is condensed into its strongly connected components, which form
+    a DAG. If that DAG is a forest (every component is entered from at most
+    one other component, as in trees), each component gets an interval from a
+    DFS over the forest and a component reaches exactly those whose intervals
+    nest inside its own; this costs O(V) memory. Otherwise every component
+    gets a bitset of the components it can reach, built by OR-ing the bitsets
+    of its successors in reverse topological order, which costs O(V^2 / 8)
+    bytes in the worst case. labelling says which one was picked.
+
+    The index remembers the version of the graph it was built at and rebuilds
+    itself on the first query after the graph changes.
     """
-    width = len(map[0])
-    height = len(map)
 
-    is_in_tree = [[False for _ in range(width)] for _ in range(height)]
-    distance = [[MAXINT for _ in range(width)] for _ in range(height)]
-    parent = [[None for _ in range(width)] for _ in range(height)]
-    distance[0][0] = 0
+    INTERVAL = "interval"
+    BITSET = "bitset"
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.__build()
+
+    def __build(self):
+        graph = self.graph
+        self.__version = graph.version
+        components = strongly_connected_components(graph)
+        component_of = {}
+
+        for component_index, component in enumerate(components):
+            for node in component:
+                component_of[node] = component_index
+
+        # Tarjan lists a component after every component it can reach, so
+        # successors always have smaller indices.
+        successors = [set() for _ in components]
+        entered_from = [set() for _ in components]
+
+        for node, component_index in component_of.items():
+            for neighbor in graph.get_neighbors(node):
+                neighbor_component = component_of[neighbor]
+
+                if neighbor_component != component_index:
+                    successors[component_index].add(neighbor_component)
+                    entered_from[neighbor_component].add(component_index)
+
+        self.__component_of = component_of
+
+        if all(len(sources) <= 1 for sources in entered_from):
+            self.labelling = ReachabilityIndex.INTERVAL
+            self.__label_intervals(successors, entered_from)
+        else:
+            self.labelling = ReachabilityIndex.BITSET
+            self.__label_bitsets(successors)
+
+    def __label_intervals(self, successors, entered_from):
+        """
+        Numbers the components in DFS preorder. A component reaches another iff
+        the other's number falls between its own and the last number given out
+        in its subtree.
+        """
+        component_count = len(successors)
+        first = [0] * component_count
+        last = [0] * component_count
+        counter = 0
+
+        for root in range(component_count - 1, -1, -1):
+            if entered_from[root]:
+                continue
+
+            first[root] = counter
+            counter += 1
+            work = [(root, iter(successors[root]))]
+
+            while work:
+                component, children = work[-1]
+
+                for child in children:
+                    first[child] = counter
+                    counter += 1
+                    work.append((child, iter(successors[child])))
+                    break
+                else:
+                    work.pop()
+                    last[component] = counter - 1
+
+        self.__first = first
+        self.__last = last
+        self.__bitsets = None
+
+    def __label_bitsets(self, successors):
+        """
+        Builds the set of components each component reaches as a Python int,
+        so that the unions are word-parallel, and then freezes them into bytes
+        for constant-time bit tests.
+        """
+        component_count = len(successors)
+        byte_count = (component_count + 7) // 8
+        reaches = []
+
+        for component_index in range(component_count):
+            reach = 1 << component_index
+
+            for successor in successors[component_index]:
+                reach |= reaches[successor]
+
+            reaches.append(reach)
+
+        self.__bitsets = [reach.to_bytes(byte_count, "little") for reach in reaches]
+        self.__first = self.__last = None
+
+    def __component(self, node):
+        if node not in self.__component_of:
+            raise NotInNodesException(node)
+
+        return self.__component_of[node]
 
-    # (row, col)!!!!
-    curcell = (0, 0)
-    next_cell = None
-    weight = 0
-    best_distance_so_far = MAXINT
+    def has_path(self, n1, n2):
+        """
+        True if n2 can be reached from n1 by following zero or more edges. A
+        node can always reach itself.
+        """
+        if self.__version != self.graph.version:
+            self.__build()
+
+        source = self.__component(n1)
+        target = self.__component(n2)
+
+        if self.__bitsets is not None:
+            return bool(self.__bitsets[source][target >> 3] & (1 << (target & 7)))
+
+        return self.__first[source] <= self.__first[target] <= self.__last[source]
+
+    def same_component(self, n1, n2):
+        """
+        True if n1 and n2 can reach each other.
+        """
+        if self.__version != self.graph.version:
+            self.__build()
+
+        return self.__component(n1) == self.__component(n2)
+
+def _default_weight_fn(graph):
+    """
+    Returns a function giving the cost of going from n1 to n2 in graph. Graphs
+    that are not weighted cost 1 per edge.
+    """
+    def weight_fn(n1, n2):
+        try:
+            return graph.get_weight(n1, n2)
+        except NotImplementedError:
+            return 1
+
+    return weight_fn
+
+def shortest_paths(graph, source, targets=None, weight_fn=None):
+    """
+    Dijkstra's algorithm from a single source. See multi_source_shortest_paths.
+    """
+    return multi_source_shortest_paths(graph, (source,), targets, weight_fn)
+
+def multi_source_shortest_paths(graph, sources, targets=None, weight_fn=None):
+    """
+    Dijkstra's algorithm over any Graph, starting from every node in sources at
+    once (as if they were a single node at distance 0). Weights are taken from
+    graph.get_weight unless a weight_fn(n1, n2) is given, and are assumed to be
+    nonnegative.
+
+    The frontier is a binary heap. Instead of decreasing keys, a node is pushed
+    again whenever its distance improves and stale entries are skipped when
+    popped. This runs in O((V + E) log V).
+
+    If targets is given, the search stops as soon as every target is settled.
+
+    Returns a (distances, predecessors) pair of dicts, covering only the nodes
+    settled by the search. The predecessor of a source is None. Use
+    reconstruct_path to get an actual path out of predecessors.
+    """
+    if weight_fn is None:
+        weight_fn = _default_weight_fn(graph)
+
+    distances = {}
+    predecessors = {}
+    best = {}
+    best_predecessor = {}
+    remaining = set(targets) if targets is not None else None
+    # The counter breaks ties so nodes themselves are never compared.
+    counter = itertools.count()
+    frontier = []
+
+    for source in sources:
+        if source not in graph.added_nodes:
+            raise NotInNodesException(source)
+
+        best[source] = 0
+        best_predecessor[source] = None
+        heapq.heappush(frontier, (0, next(counter), source))
+
+    while frontier:
+        distance, _, node = heapq.heappop(frontier)
+
+        if node in distances:
+            continue
+
+        distances[node] = distance
+        predecessors[node] = best_predecessor[node]
+
+        if remaining is not None:
+            remaining.discard(node)
+
+            if not remaining:
+                break
+
+        for neighbor in graph.get_neighbors(node):
+            if neighbor in distances:
+                continue
+
+            candidate = distance + weight_fn(node, neighbor)
+
+            if neighbor not in best or candidate < best[neighbor]:
+                best[neighbor] = candidate
+                best_predecessor[neighbor] = node
+                heapq.heappush(frontier, (candidate, next(counter), neighbor))
+
+    return distances, predecessors
+
+def reconstruct_path(predecessors, target):
+    """
+    Returns the path, as a list of nodes from the source to target, recorded in
+    the predecessors map of a shortest path search. Returns None if target was
+    never reached.
+    """
+    if target not in predecessors:
+        return None
+
+    path = []
+    node = target
+
+    while node is not None:
+        path.append(node)
+        node = predecessors[node]
+
+    path.reverse()
+    return path
+
+class SearchResult(object):
+    """
+    The outcome of a point-to-point search. path is the list of nodes from the
+    source to the target (None if the target can't be reached), distance is
+    its cost (infinity if there is no path) and expanded is the number of nodes
+    the search settled to find it.
+    """
+
+    def __init__(self, path, distance, expanded):
+        self.path = path
+        self.distance = distance
+        self.expanded = expanded
+
+# Heuristics for nodes that are (row, col) cells, as in GridGraph. They
+# estimate the cost of the cheapest path between two cells assuming every cell
+# weighs 1; scale them by the lightest cell weight for weighted grids.
+
+def manhattan(n1, n2):
+    """
+    Admissible for 4-connected grids.
+    """
+    return abs(n1[0] - n2[0]) + abs(n1[1] - n2[1])
+
+def octile(n1, n2):
+    """
+    Admissible for 8-connected grids where diagonal steps cost sqrt(2).
+    """
+    row_distance = abs(n1[0] - n2[0])
+    col_distance = abs(n1[1] - n2[1])
+    return row_distance + col_distance + (math.sqrt(2) - 2) * min(row_distance, col_distance)
+
+def euclidean(n1, n2):
+    """
+    Admissible for any grid, but less informed than the two above.
+    """
+    return math.hypot(n1[0] - n2[0], n1[1] - n2[1])
+
+def astar(graph, source, target, heuristic=None, weight_fn=None):
+    """
+    A* search from source to target. heuristic(node, target) must never
+    overestimate the cost of getting from node to target and should be
+    consistent (a node is never expanded twice); without one, this is
+    Dijkstra's algorithm stopping at the target. Weights are as in
+    multi_source_shortest_paths.
 
-    while not is_in_tree[curcell[0]][curcell[1]]:
-        is_in_tree[curcell[0]][curcell[1]] = True
-        neighbors = [
-            adj for adj in __get_adjacent_4c(curcell, height, width) if map[adj[0]][adj[1]] != 1
+    When two nodes look equally good, the one the heuristic thinks is closer
+    to the target goes first. On grids this avoids fanning out over the many
+    cells that tie with the goal direction.
+
+    Returns a SearchResult.
+    """
+    if weight_fn is None:
+        weight_fn = _default_weight_fn(graph)
+
+    if heuristic is None:
+        heuristic = lambda node, goal: 0
+
+    for node in (source, target):
+        if node not in graph.added_nodes:
+            raise NotInNodesException(node)
+
+    best = {source: 0}
+    predecessors = {source: None}
+    settled = set()
+    counter = itertools.count()
+    source_estimate = heuristic(source, target)
+    frontier = [(source_estimate, source_estimate, next(counter), source)]
+
+    while frontier:
+        _, _, _, node = heapq.heappop(frontier)
+
+        if node in settled:
+            continue
+
+        settled.add(node)
+
+        if node == target:
+            return SearchResult(reconstruct_path(predecessors, target), best[target], len(settled))
+
+        distance = best[node]
+
+        for neighbor in graph.get_neighbors(node):
+            if neighbor in settled:
+                continue
+
+            candidate = distance + weight_fn(node, neighbor)
+
+            if neighbor not in best or candidate < best[neighbor]:
+                best[neighbor] = candidate
+                predecessors[neighbor] = node
+                estimate = heuristic(neighbor, target)
+                heapq.heappush(frontier, (candidate + estimate, estimate, next(counter), neighbor))
+
+    return SearchResult(None, float("inf"), len(settled))
+
+def bidirectional_dijkstra(graph, source, target, weight_fn=None):
+    """
+    Runs Dijkstra's algorithm forward from source and backward from target
+    (over get_predecessors) at the same time, always advancing the side whose
+    frontier is closer. Stops once no path through the unsettled nodes can
+    beat the best meeting point found so far. This settles roughly two balls
+    of half the radius instead of one of the full radius.
+
+    When several shortest paths meet, the one through the node that either
+    search reached first wins, so a graph always gives back the same path.
+    Unlike astar, frontier ties are not broken towards the other side: the
+    search only stops once the two closest unsettled distances add up to the
+    best path, so breaking them differently expands the same nodes.
+
+    The backward search is only as fast as get_predecessors; use a graph that
+    answers it quickly. Weights are as in multi_source_shortest_paths.
+
+    Returns a SearchResult.
+    """
+    if weight_fn is None:
+        weight_fn = _default_weight_fn(graph)
+
+    for node in (source, target):
+        if node not in graph.added_nodes:
+            raise NotInNodesException(node)
+
+    if source == target:
+        return SearchResult([source], 0, 0)
+
+    FORWARD, BACKWARD = 0, 1
+    counter = itertools.count()
+    best = ({source: 0}, {target: 0})
+    predecessors = ({source: None}, {target: None})
+    settled = (set(), set())
+    frontiers = ([(0, next(counter), source)], [(0, next(counter), target)])
+    # The order in which the searches first reach each node, to break ties
+    # between equally short meeting points.
+    reached = {source: 0, target: 1}
+    shortest = float("inf")
+    meeting_node = None
+    meeting_rank = float("inf")
+    expanded = 0
+
+    while frontiers[FORWARD] and frontiers[BACKWARD]:
+        forward_top = frontiers[FORWARD][0][0]
+        backward_top = frontiers[BACKWARD][0][0]
+
+        if forward_top + backward_top >= shortest:
+            break
+
+        side = FORWARD if forward_top <= backward_top else BACKWARD
+        other = BACKWARD if side == FORWARD else FORWARD
+        distance, _, node = heapq.heappop(frontiers[side])
+
+        if node in settled[side]:
+            continue
+
+        settled[side].add(node)
+        expanded += 1
+
+        if side == FORWARD:
+            neighbors = graph.get_neighbors(node)
+        else:
+            neighbors = graph.get_predecessors(node)
+
+        for neighbor in neighbors:
+            if neighbor in settled[side]:
+                continue
+
+            if side == FORWARD:
+                candidate = distance + weight_fn(node, neighbor)
+            else:
+                candidate = distance + weight_fn(neighbor, node)
+
+            if neighbor not in best[side] or candidate < best[side][neighbor]:
+                best[side][neighbor] = candidate
+                predecessors[side][neighbor] = node
+                heapq.heappush(frontiers[side], (candidate, next(counter), neighbor))
+                reached.setdefault(neighbor, len(reached))
+
+            if neighbor in best[other]:
+                through_neighbor = best[side][neighbor] + best[other][neighbor]
+
+                if through_neighbor < shortest or (through_neighbor == shortest
+                  and reached[neighbor] < meeting_rank):
+                    shortest = through_neighbor
+                    meeting_node = neighbor
+                    meeting_rank = reached[neighbor]
+
+    if meeting_node is None:
+        return SearchResult(None, float("inf"), expanded)
+
+    # The backward predecessors point towards the target.
+    path = reconstruct_path(predecessors[FORWARD], meeting_node)
+    path.extend(reversed(reconstruct_path(predecessors[BACKWARD], meeting_node)[:-1]))
+
+    return SearchResult(path, shortest, expanded)
+
+class AllPairsDistances(object):
+    """
+    The result of all_pairs_shortest_paths. nodes lists the nodes in matrix
+    order and matrix[i][j] is the length of a shortest path from the i-th to
+    the j-th node (infinity if there is none). With NumPy, matrix is a 2D
+    float64 array; otherwise it is a list of lists.
+
+    If next hops were asked for, next_hops[i][j] is the index of the node right
+    after the i-th one on a shortest path to the j-th, or -1 if there is no
+    path, and path() can rebuild the paths.
+    """
+
+    def __init__(self, nodes, matrix, next_hops=None):
+        self.nodes = nodes
+        self.matrix = matrix
+        self.next_hops = next_hops
+        self.__node_index = dict((node, index) for index, node in enumerate(nodes))
+
+    def __index_of(self, node):
+        if node not in self.__node_index:
+            raise NotInNodesException(node)
+
+        return self.__node_index[node]
+
+    def distance(self, n1, n2):
+        """
+        The length of a shortest path from n1 to n2, in O(1).
+        """
+        return float(self.matrix[self.__index_of(n1)][self.__index_of(n2)])
+
+    def path(self, n1, n2):
+        """
+        A shortest path from n1 to n2 as a list of nodes, or None if there is no
+        path. O(length of the path).
+        """
+        if self.next_hops is None:
+            raise ValueError("computed without next hops.")
+
+        current = self.__index_of(n1)
+        target = self.__index_of(n2)
+
+        if self.next_hops[current][target] < 0:
+            return None
+
+        path = [self.nodes[current]]
+
+        while current != target:
+            current = int(self.next_hops[current][target])
+            path.append(self.nodes[current])
+
+        return path
+
+def _dense_weights(graph):
+    """
+    Returns the nodes of the graph and a row-major array("d") of the weights
+    between them, DISCONNECTED marking missing edges.
+    """
+    if isinstance(graph, AdjacencyMatrix):
+        return graph.export_matrix()
+
+    nodes = list(graph.added_nodes)
+    node_index = dict((node, index) for index, node in enumerate(nodes))
+    node_count = len(nodes)
+    weights = array("d", (AdjacencyMatrix.DISCONNECTED,)) * (node_count * node_count)
+    weight_fn = _default_weight_fn(graph)
+
+    for row, node in enumerate(nodes):
+        weights[row * node_count + row] = 0
+
+        for neighbor in graph.get_neighbors(node):
+            if neighbor != node:
+                weights[row * node_count + node_index[neighbor]] = weight_fn(node, neighbor)
+
+    return nodes, weights
+
+def _relax_lists(distances, hops, rows, cols, pivots):
+    """
+    The Floyd-Warshall update restricted to distances[rows][cols], going
+    through the given pivots in order, on lists of lists.
+
+    hops, if given, is a pair of the next hop and edge count matrices. Ties in
+    distance are then broken by edge count, so that following the next hops
+    to a target always takes fewer and fewer edges and can't go around a
+    zero-weight cycle.
+    """
+    next_hops, edge_counts = hops if hops is not None else (None, None)
+
+    for pivot in pivots:
+        pivot_row = distances[pivot]
+
+        for row in rows:
+            to_pivot = distances[row][pivot]
+
+            if to_pivot == math.inf:
+                continue
+
+            current_row = distances[row]
+
+            for col in cols:
+                through_pivot = to_pivot + pivot_row[col]
+
+                if next_hops is None:
+                    if through_pivot < current_row[col]:
+                        current_row[col] = through_pivot
+
+                    continue
+
+                edges_through = edge_counts[row][pivot] + edge_counts[pivot][col]
+
+                if through_pivot < current_row[col] or \
+                  (through_pivot == current_row[col] and edges_through < edge_counts[row][col]):
+                    current_row[col] = through_pivot
+                    edge_counts[row][col] = edges_through
+                    next_hops[row][col] = next_hops[row][pivot]
+
+def _relax_arrays(distances, hops, rows, cols, pivots):
+    """
+    Same as _relax_lists on NumPy arrays, with rows and cols being slices.
+    Every pivot costs a single broadcast of its column against its row.
+    """
+    block = distances[rows, cols]
+
+    if hops is not None:
+        next_hops, edge_counts = hops
+        hop_block = next_hops[rows, cols]
+        count_block = edge_counts[rows, cols]
+
+    for pivot in pivots:
+        through_pivot = distances[rows, pivot, None] + distances[pivot, None, cols]
+
+        if hops is None:
+            numpy.minimum(block, through_pivot, out=block)
+            continue
+
+        edges_through = edge_counts[rows, pivot, None] + edge_counts[pivot, None, cols]
+        improved = (through_pivot < block) | ((through_pivot == block) & (edges_through < count_block))
+        block[improved] = through_pivot[improved]
+        count_block[improved] = edges_through[improved]
+        hop_block[improved] = numpy.broadcast_to(next_hops[rows, pivot, None], hop_block.shape)[improved]
+
+def all_pairs_shortest_paths(graph, block_size=None, next_hops=False):
+    """
+    Floyd-Warshall over the dense weight matrix of the graph, O(V^3) time and
+    O(V^2) memory. Weights must be nonnegative. An AdjacencyMatrix is exported
+    as is; any other graph is turned into a matrix first, weighing its edges
+    like multi_source_shortest_paths does.
+
+    With NumPy installed each pivot is a single vectorized update of the whole
+    matrix. Without it this falls back to plain lists, which is fine for a few
+    hundred nodes.
+
+    If block_size is given, the matrix is processed in block_size square tiles
+    (blocked Floyd-Warshall), so that each pivot only sweeps over a tile that
+    fits in cache instead of the whole matrix. Pays off for matrices that are
+    much larger than the cache.
+
+    Returns an AllPairsDistances, with next hops if next_hops is True.
+    """
+    if block_size is not None and block_size <= 0:
+        raise ValueError("block_size should be positive.")
+
+    nodes, weights = _dense_weights(graph)
+    node_count = len(nodes)
+
+    if numpy is not None:
+        distances = numpy.frombuffer(weights, dtype=numpy.float64).reshape(node_count, node_count).copy()
+        missing = distances < 0
+        distances[missing] = numpy.inf
+
+        if next_hops:
+            hop_matrix = numpy.tile(numpy.arange(node_count, dtype=numpy.int64), (node_count, 1))
+            hop_matrix[missing] = -1
+            edge_counts = numpy.ones((node_count, node_count))
+            edge_counts[missing] = numpy.inf
+            numpy.fill_diagonal(edge_counts, 0)
+            hops = (hop_matrix, edge_counts)
+        else:
+            hops = None
+
+        relax = _relax_arrays
+        span = slice
+    else:
+        distances = [
+            [math.inf if weight < 0 else weight for weight in weights[row:row + node_count]]
+            for row in range(0, node_count * node_count, node_count)
+        ]
+
+        if next_hops:
+            hops = (
+                [
+                    [-1 if weight == math.inf else col for col, weight in enumerate(row)]
+                    for row in distances
+                ],
+                [
+                    [math.inf if weight == math.inf else int(row != col) for col, weight in enumerate(weights)]
+                    for row, weights in enumerate(distances)
+                ]
+            )
+        else:
+            hops = None
+
+        relax = _relax_lists
+        span = range
+
+    if block_size is None or block_size >= node_count:
+        relax(distances, hops, span(0, node_count), span(0, node_count), range(node_count))
+    else:
+        blocks = [
+            (start, min(start + block_size, node_count))
+            for start in range(0, node_count, block_size)
         ]
 
-        for n in neighbors:
-            cand_distance = distance[curcell[0]][curcell[1]] + 1
-            if distance[n[0]][n[1]] > cand_distance:
-                distance[n[0]][n[1]] = cand_distance
-                parent[n[0]][n[1]] = curcell
-
-        # Find the closest non-tree node---at least one would've been "relaxed"
-        # by the loop above. Could be improved by a priority queue.
-        best_distance_so_far = MAXINT
-        for row in range(height):
-            for col in range(width):
-                node_dist = distance[row][col]
-                if not is_in_tree[row][col] and best_distance_so_far > node_dist:
-                    best_distance_so_far = node_dist
-                    curcell = (row, col)
-
-    return distance[height - 1][width - 1] + 1
+        for pivot_start, pivot_end in blocks:
+            pivots = range(pivot_start, pivot_end)
+            pivot_span = span(pivot_start, pivot_end)
+            # The pivot tile depends only on itself, the tiles in its row and
+            # column only on themselves and the pivot tile, and the rest on the
+            # tiles in the pivot row and column.
+            relax(distances, hops, pivot_span, pivot_span, pivots)
+
+            for start, end in blocks:
+                if start != pivot_start:
+                    relax(distances, hops, pivot_span, span(start, end), pivots)
+                    relax(distances, hops, span(start, end), pivot_span, pivots)
+
+            for row_start, row_end in blocks:
+                if row_start == pivot_start:
+                    continue
+
+                for col_start, col_end in blocks:
+                    if col_start != pivot_start:
+                        relax(distances, hops, span(row_start, row_end), span(col_start, col_end), pivots)
+
+    return AllPairsDistances(nodes, distances, hops[0] if hops is not None else None)
+
+def dijkstra(map):
+    """
+    Shortest paths on a grid: map is a list of rows where 1 marks a wall.
+    Returns the number of cells in a shortest 4-connected path from the
+    top-left to the bottom-right cell, or infinity if there is none. Despite
+    the name this is now A* with the Manhattan distance, so it only explores
+    the cells that could lie on a shortest path.
+    """
+    grid = GridGraph(len(map), len(map[0]), obstacles=[[cell == 1 for cell in row] for row in map])
+    goal = (grid.height - 1, grid.width - 1)
+
+    if not grid.is_open((0, 0)) or not grid.is_open(goal):
+        return float("inf")
+
+    return astar(grid, (0, 0), goal, manhattan).distance + 1
@@ -0,0 +1,246 @@
+#! /usr/bin/env python3
+
+from .graphs import Graph
+
+"""
+Structural hashing and isomorphism of graphs, for telling apart graphs that
+have the same shape no matter what their nodes are.
+
+Both go by Weisfeiler-Lehman color refinement: every node starts with a color
+made of its degrees, and every round a node's new color is made of its old
+color and the multisets of the colors of its neighbors and predecessors (and
+the weights of the edges to them, if the graph is weighted). Isomorphic graphs
+always end up with the same multiset of colors. The converse is not always
+true, so is_isomorphic backs the colors up with an actual search for a
+mapping, which only needs to try nodes of the same color.
+"""
+
+def _adjacency(g):
+    """
+    Returns a pair of dicts mapping every node to a dict of its neighbors and
+    to a dict of its predecessors, each mapping to the weight of the edge or
+    None if the graph is not weighted. O(V + E) calls into g.
+    """
+    successors = dict((node, {}) for node in g.added_nodes)
+    predecessors = dict((node, {}) for node in g.added_nodes)
+
+    for node in successors:
+        for neighbor in g.get_neighbors(node):
+            try:
+                weight = g.get_weight(node, neighbor)
+            except NotImplementedError:
+                weight = None
+
+            successors[node][neighbor] = weight
+            predecessors[neighbor][node] = weight
+
+    return successors, predecessors
+
+def _refine(successors, predecessors, iterations=None):
+    """
+    Runs color refinement until the colors stop splitting the nodes further,
+    or for the given number of rounds. Colors are hashes of ints and weights
+    only, so they mean the same thing across graphs. Returns a dict mapping
+    every node to its color.
+    """
+    colors = dict(
+      (node, hash((len(successors[node]), len(predecessors[node])))) for node in successors
+    )
+    class_count = len(set(colors.values()))
+    rounds = 0
+
+    while iterations is None or rounds < iterations:
+        refined = {}
+
+        for node in successors:
+            out_signature = sorted((colors[n], w if w is not None else 0) for n, w in successors[node].items())
+            in_signature = sorted((colors[n], w if w is not None else 0) for n, w in predecessors[node].items())
+            refined[node] = hash((colors[node], tuple(out_signature), tuple(in_signature)))
+
+        rounds += 1
+        refined_class_count = len(set(refined.values()))
+        colors = refined
+
+        if refined_class_count == class_count:
+            break
+
+        class_count = refined_class_count
+
+    return colors
+
+def _color_histogram(colors):
+    histogram = {}
+
+    for color in colors.values():
+        histogram[color] = histogram.get(color, 0) + 1
+
+    return histogram
+
+def structural_hash(g, iterations=None):
+    """
+    A hash of the shape of the graph, ignoring what its nodes are. Isomorphic
+    graphs always hash the same. O((V + E) log V) per round of refinement; by
+    default refinement goes on until it stops telling nodes apart, which is at
+    most V rounds and usually a handful.
+    """
+    successors, predecessors = _adjacency(g)
+    colors = _refine(successors, predecessors, iterations)
+    return hash((len(colors), tuple(sorted(_color_histogram(colors).items()))))
+
+def _degree_sequence(successors, predecessors):
+    return sorted((len(successors[node]), len(predecessors[node])) for node in successors)
+
+def find_isomorphism(g1, g2):
+    """
+    Returns a dict mapping every node of g1 to a node of g2 such that there is
+    an edge between two nodes of g1 iff there is one, of the same weight,
+    between the nodes they map to. Returns None if there is no such mapping.
+
+    Gives up early if the node counts, the degree sequences or the color
+    refinements differ. Otherwise backtracks, trying to map each node only to
+    the nodes of its color. That is exponential in the worst case but nearly
+    linear on graphs whose nodes refinement can tell apart, which is most of
+    them.
+    """
+    if len(g1.added_nodes) != len(g2.added_nodes):
+        return None
+
+    successors1, predecessors1 = _adjacency(g1)
+    successors2, predecessors2 = _adjacency(g2)
+
+    if _degree_sequence(successors1, predecessors1) != _degree_sequence(successors2, predecessors2):
+        return None
+
+    colors1 = _refine(successors1, predecessors1)
+    colors2 = _refine(successors2, predecessors2)
+
+    if _color_histogram(colors1) != _color_histogram(colors2):
+        return None
+
+    candidates = {}
+
+    for node, color in colors2.items():
+        candidates.setdefault(color, []).append(node)
+
+    # Map the nodes with the fewest candidates first, and then keep to the
+    # neighborhood of what has been mapped so that mistakes show up early.
+    order = []
+    placed = set()
+
+    for root in sorted(successors1, key=lambda node: len(candidates[colors1[node]])):
+        if root in placed:
+            continue
+
+        placed.add(root)
+        order.append(root)
+        position = len(order) - 1
+
+        while position < len(order):
+            node = order[position]
+            position += 1
+
+            for neighbor in list(successors1[node]) + list(predecessors1[node]):
+                if neighbor not in placed:
+                    placed.add(neighbor)
+                    order.append(neighbor)
+
+    mapping = {}
+    used = set()
+
+    if not order:
+        return mapping
+
+    def consistent(node, image):
+        for neighbor, weight in successors1[node].items():
+            if neighbor in mapping or neighbor == node:
+                target = image if neighbor == node else mapping[neighbor]
+
+                if target not in successors2[image] or successors2[image][target] != weight:
+                    return False
+
+        for neighbor, weight in predecessors1[node].items():
+            if neighbor in mapping:
+                if mapping[neighbor] not in predecessors2[image] or \
+                  predecessors2[image][mapping[neighbor]] != weight:
+                    return False
+
+        # Edges among the mapped nodes in g2 must come from edges in g1. The
+        # degrees match, so counting the mapped ones is enough.
+        mapped_out = sum(1 for n in successors1[node] if n in mapping or n == node)
+        mapped_in = sum(1 for n in predecessors1[node] if n in mapping)
+        image_out = sum(1 for n in successors2[image] if n in used or n == image)
+        image_in = sum(1 for n in predecessors2[image] if n in used)
+
+        return mapped_out == image_out and mapped_in == image_in
+
+    # Iterative backtracking: choices[k] is the position, among its
+    # candidates, of the image currently tried for order[k].
+    choices = [0]
+
+    while choices:
+        depth = len(choices) - 1
+        node = order[depth]
+        options = candidates[colors1[node]]
+
+        if len(mapping) > depth:
+            # Coming back to this depth: undo its current choice.
+            used.discard(mapping.pop(node))
+            choices[-1] += 1
+
+        while choices[-1] < len(options):
+            image = options[choices[-1]]
+
+            if image not in used and consistent(node, image):
+                break
+
+            choices[-1] += 1
+
+        if choices[-1] == len(options):
+            choices.pop()
+            continue
+
+        mapping[node] = image
+        used.add(image)
+
+        if len(mapping) == len(order):
+            return mapping
+
+        choices.append(0)
+
+    return None
+
+def is_isomorphic(g1, g2):
+    """
+    True if g1 and g2 have the same shape. See find_isomorphism.
+    """
+    return find_isomorphism(g1, g2) is not None
+
+class GraphKey(object):
+    """
+    Wraps a graph so it can be used as a dict key or put in a set, with graphs
+    of the same shape counting as the same key. The structural hash is
+    computed once; equality is only checked, with is_isomorphic, when the
+    hashes collide. So
+
+        unique = {}
+        for graph in graphs:
+            unique.setdefault(GraphKey(graph), graph)
+
+    keeps one graph per shape. Don't change a graph while it is in a key.
+    """
+
+    def __init__(self, graph):
+        if not isinstance(graph, Graph):
+            raise TypeError("GraphKey needs a Graph, got %s" % type(graph))
+
+        self.graph = graph
+        self.__hash = structural_hash(graph)
+
+    def __hash__(self):
+        return self.__hash
+
+    def __eq__(self, other):
+        if not isinstance(other, GraphKey):
+            return NotImplemented
+
+        return self.__hash == hash(other) and is_isomorphic(self.graph, other.graph)
@@ -0,0 +1,247 @@
+#! /usr/bin/env python3
+
+from .errors import SnapshotFormatException
+from .graphs import CSRGraph
+from .json_parser import tuplify
+
+from array import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+"""
+A compact binary on-disk format for graphs, and a loader that memory-maps it.
+
+Layout (all little-endian, every section starts at a multiple of 8 bytes):
+
+    header      magic "PYDGRAPH", then version, node kind, node count and edge
+                count (see HEADER below)
+    node table  if the node kind is INT_NODES, node count int64s.
+                If it is JSON_NODES, (node count + 1) int64 offsets into a blob
+                of UTF-8 JSON, one document per node, followed by the blob.
+    offsets     (node count + 1) int64s
+    targets     edge count int64s
+    weights     edge count float64s
+
+which is exactly a CSRGraph plus a node table. Loading maps the file and hands
+memoryviews over the sections to CSRGraph.from_arrays, so nothing is read until
+it is used and the OS pages things in as needed. JSON nodes are only decoded
+when looked at. The file stays mapped until the graph is closed.
+
+Weights are stored as float64, so whatever they were they come back as floats,
+and they must be numbers to be written at all.
+"""
+
+MAGIC = b"PYDGRAPH"
+VERSION = 1
+# magic, version, node kind, node count, edge count
+HEADER = struct.Struct("<8sIIQQ")
+
+INT_NODES = 0
+JSON_NODES = 1
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+def _padding(length):
+    return b"\0" * (-length % 8)
+
+def _is_int64(node):
+    # bool is an int but would not survive the round trip.
+    return type(node) is int and INT64_MIN <= node <= INT64_MAX
+
+def _little_endian(typecode, values):
+    """
+    Returns the bytes of the given values as a little-endian array.
+    """
+    packed = array(typecode, values)
+
+    if sys.byteorder != "little":
+        packed.byteswap()
+
+    return packed.tobytes()
+
+def write_snapshot(graph, filename):
+    """
+    Write graph to filename. Any Graph will do but CSRGraphs are written
+    without an intermediate copy of their edges. Nodes must either all be ints that fit in 64
+    bits or be JSON-serializable (tuples come back as tuples).
+    """
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.from_graph(graph)
+
+    nodes, offsets, targets, weights = graph.export_arrays()
+    node_kind = INT_NODES if all(_is_int64(node) for node in nodes) else JSON_NODES
+
+    with open(filename, "wb") as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, VERSION, node_kind, len(nodes), len(targets)))
+        snapshot.write(_padding(HEADER.size))
+
+        if node_kind == INT_NODES:
+            snapshot.write(_little_endian("q", nodes))
+        else:
+            encoded = [json.dumps(node).encode("utf-8") for node in nodes]
+            node_offsets = [0]
+
+            for document in encoded:
+                node_offsets.append(node_offsets[-1] + len(document))
+
+            snapshot.write(_little_endian("q", node_offsets))
+            snapshot.write(b"".join(encoded))
+            snapshot.write(_padding(node_offsets[-1]))
+
+        snapshot.write(_little_endian(CSRGraph.INDEX_TYPE, offsets))
+        snapshot.write(_little_endian(CSRGraph.INDEX_TYPE, targets))
+        snapshot.write(_little_endian(CSRGraph.WEIGHT_TYPE, weights))
+
+class JSONNodeTable(object):
+    """
+    A read-only sequence over the JSON node table of a snapshot. Nodes are
+    decoded every time they are asked for.
+    """
+
+    def __init__(self, offsets, blob):
+        self.__offsets = offsets
+        self.__blob = blob
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        document = self.__blob[self.__offsets[index]:self.__offsets[index + 1]]
+        return tuplify(json.loads(bytes(document).decode("utf-8")))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class _SectionReader(object):
+    """
+    Hands out consecutive, 8-byte aligned sections of a buffer.
+    """
+
+    def __init__(self, buffer, position):
+        self.buffer = buffer
+        self.position = position
+        # Every memoryview handed out, so they can be released.
+        self.views = []
+
+    def take(self, length, typecode=None):
+        end = self.position + length
+        if end > len(self.buffer):
+            raise SnapshotFormatException("file is truncated")
+
+        section = self.buffer[self.position:end]
+        self.position = end + (-length % 8)
+
+        if typecode is None:
+            self.views.append(section)
+            return section
+        elif sys.byteorder == "little":
+            self.views.append(section.cast(typecode))
+            return self.views[-1]
+        else:
+            # No zero-copy for you, I'm afraid.
+            swapped = array(typecode, bytes(section))
+            swapped.byteswap()
+            return swapped
+
+def _unmap(mapped, views):
+    """
+    mmap refuses to close while memoryviews over it are alive.
+    """
+    for view in reversed(views):
+        view.release()
+
+    mapped.close()
+
+class SnapshotGraph(CSRGraph):
+    """
+    A CSRGraph over a memory-mapped snapshot, as returned by load_snapshot.
+    close() unmaps the file, after which the graph can't be used; so does
+    leaving a with block over the graph.
+    """
+
+    def __init__(self):
+        super(SnapshotGraph, self).__init__()
+        self.__mapped = None
+        self.__views = []
+
+    def _hold(self, mapped, views):
+        self.__mapped = mapped
+        self.__views = views
+
+    def close(self):
+        """
+        Unmaps the file. Throws a BufferError if memoryviews over it that came
+        from this graph, like those from neighbor_indices, are still around.
+        """
+        if self.__mapped is None:
+            return
+
+        _unmap(self.__mapped, self.__views)
+        self.__mapped = None
+        self.__views = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def load_snapshot(filename):
+    """
+    Memory-map a snapshot written by write_snapshot and return it as a
+    SnapshotGraph. This costs O(1) regardless of the size of the graph; the
+    first lookup by node builds the node index in O(V). Changing the graph
+    copies the arrays into memory first; the file is never written to.
+    """
+    with open(filename, "rb") as snapshot:
+        # mmap can't map an empty file.
+        if os.fstat(snapshot.fileno()).st_size < HEADER.size:
+            raise SnapshotFormatException("file is truncated")
+
+        mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(mapped)
+    reader = _SectionReader(buffer, HEADER.size + (-HEADER.size % 8))
+
+    try:
+        graph = _read_sections(buffer, reader)
+    except Exception:
+        _unmap(mapped, [buffer] + reader.views)
+        raise
+
+    graph._hold(mapped, [buffer] + reader.views)
+    return graph
+
+def _read_sections(buffer, reader):
+    magic, version, node_kind, node_count, edge_count = HEADER.unpack_from(buffer)
+
+    if magic != MAGIC:
+        raise SnapshotFormatException("not a graph snapshot")
+
+    if version != VERSION:
+        raise SnapshotFormatException("unsupported version %s" % version)
+
+    if node_kind == INT_NODES:
+        nodes = reader.take(8 * node_count, "q")
+    elif node_kind == JSON_NODES:
+        node_offsets = reader.take(8 * (node_count + 1), "q")
+        nodes = JSONNodeTable(node_offsets, reader.take(node_offsets[-1]))
+    else:
+        raise SnapshotFormatException("unknown node kind %s" % node_kind)
+
+    offsets = reader.take(8 * (node_count + 1), CSRGraph.INDEX_TYPE)
+    targets = reader.take(8 * edge_count, CSRGraph.INDEX_TYPE)
+    weights = reader.take(8 * edge_count, CSRGraph.WEIGHT_TYPE)
+
+    return SnapshotGraph.from_arrays(nodes, offsets, targets, weights)
@@ -0,0 +1,322 @@
+#! /usr/bin/env python3
+from data_structures.graphs import AdjacencyLists, AdjacencyMatrix, UndirectedAdjList, DFSIterator
+
+import argparse
+import json
+import math
+import platform
+import random
+import time
+
+"""
+Times the basic operations of the graph backends on a few families of
+generated graphs, to catch regressions and to see at which sizes one backend
+overtakes another.
+
+Run from the repository root as
+
+    python -m data_structures.graph_stats --output run.json
+
+and later, to compare against that run,
+
+    python -m data_structures.graph_stats --compare run.json
+"""
+
+BACKENDS = {
+    "AdjacencyLists": AdjacencyLists,
+    "UndirectedAdjList": UndirectedAdjList,
+    "AdjacencyMatrix": AdjacencyMatrix,
+}
+
+# How many nodes get_indegree and remove_node are timed on. These are O(V)
+# per call on some backends so doing every node would take O(V^2).
+SAMPLE_SIZE = 100
+
+# Every generator takes a node count and a random.Random and returns a
+# (node count, edges) pair. The node count may differ from the one asked for
+# (grids are square) and counts isolated nodes that no edge mentions.
+
+def erdos_renyi(node_count, rng, average_degree=8):
+    """
+    G(n, m): node_count * average_degree / 2 distinct edges between nodes
+    picked uniformly at random.
+    """
+    edge_total = min(node_count * average_degree // 2, node_count * (node_count - 1) // 2)
+    edges = set()
+
+    while len(edges) < edge_total:
+        n1 = rng.randrange(node_count)
+        n2 = rng.randrange(node_count)
+
+        if n1 != n2 and (n2, n1) not in edges:
+            edges.add((n1, n2))
+
+    return node_count, sorted(edges)
+
+def power_law(node_count, rng, attachments=4):
+    """
+    Barabasi-Albert preferential attachment: every new node connects to
+    attachments distinct older nodes picked with probability proportional to
+    their degrees, which makes the degrees follow a power law.
+    """
+    edges = []
+    # Every node appears once per edge end it has, so picking uniformly from
+    # here is picking proportionally to the degrees.
+    ends = list(range(min(attachments, node_count)))
+
+    for node in range(attachments, node_count):
+        targets = set()
+
+        while len(targets) < attachments:
+            targets.add(rng.choice(ends))
+
+        for target in targets:
+            edges.append((node, target))
+            ends.extend((node, target))
+
+    return node_count, edges
+
+def grid(node_count, rng=None):
+    """
+    A 4-connected square lattice with about node_count nodes, numbered row by
+    row. rng is unused; it is there to match the other generators.
+    """
+    side = max(1, math.isqrt(node_count))
+    edges = []
+
+    for row in range(side):
+        for col in range(side):
+            node = row * side + col
+
+            if col + 1 < side:
+                edges.append((node, node + 1))
+
+            if row + 1 < side:
+                edges.append((node, node + side))
+
+    return side * side, edges
+
+def complete(node_count, rng=None):
+    """
+    Every pair of nodes. rng is unused.
+    """
+    return node_count, [(n1, n2) for n1 in range(node_count) for n2 in range(n1 + 1, node_count)]
+
+FAMILIES = {
+    "erdos_renyi": erdos_renyi,
+    "power_law": power_law,
+    "grid": grid,
+    "complete": complete,
+}
+
+def time_operations(GraphType, node_count, edges, rng):
+    """
+    Builds a graph and runs every operation on it once. Returns a dict from
+    operation names to (seconds, operation count) pairs.
+    """
+    timings = {}
+    nodes = list(range(node_count))
+    weighted_edges = [(n1, n2, rng.randint(1, 100)) for n1, n2 in edges]
+    sample = rng.sample(nodes, min(SAMPLE_SIZE, node_count))
+    graph = GraphType()
+
+    start = time.perf_counter()
+    for node in nodes:
+        graph.add_node(node)
+    timings["add_node"] = (time.perf_counter() - start, node_count)
+
+    start = time.perf_counter()
+    for n1, n2, weight in weighted_edges:
+        graph.make_neighbor(n1, n2, weight)
+    timings["make_neighbor"] = (time.perf_counter() - start, len(edges))
+
+    start = time.perf_counter()
+    for node in nodes:
+        graph.get_neighbors(node)
+    timings["get_neighbors"] = (time.perf_counter() - start, node_count)
+
+    start = time.perf_counter()
+    for node in sample:
+        graph.get_indegree(node)
+    timings["get_indegree"] = (time.perf_counter() - start, len(sample))
+
+    start = time.perf_counter()
+    for n1, n2 in edges:
+        graph.get_weight(n1, n2)
+    timings["get_weight"] = (time.perf_counter() - start, len(edges))
+
+    start = time.perf_counter()
+    for _ in DFSIterator(graph, rng=random.Random(0)):
+        pass
+    timings["dfs"] = (time.perf_counter() - start, 1)
+
+    start = time.perf_counter()
+    graph.get_transpose(GraphType)
+    timings["transpose"] = (time.perf_counter() - start, 1)
+
+    start = time.perf_counter()
+    for node in sample:
+        graph.remove_node(node)
+    timings["remove_node"] = (time.perf_counter() - start, len(sample))
+
+    return timings
+
+def run(families, sizes, backends, runs, seed, max_complete):
+    """
+    Times every backend on every family at every size, runs times, and keeps
+    the best time of each operation. Every backend gets the very same graph.
+    Returns a list of result rows as saved in the JSON output.
+    """
+    results = []
+
+    for family in families:
+        for size in sizes:
+            if family == "complete" and size > max_complete:
+                continue
+
+            node_count, edges = FAMILIES[family](size, random.Random(seed))
+
+            for backend in backends:
+                best = {}
+
+                for run_index in range(runs):
+                    timings = time_operations(BACKENDS[backend], node_count, edges,
+                      random.Random(seed + run_index))
+
+                    for operation, (seconds, count) in timings.items():
+                        if operation not in best or seconds < best[operation][0]:
+                            best[operation] = (seconds, count)
+
+                for operation, (seconds, count) in best.items():
+                    results.append({
+                        "family": family,
+                        "size": node_count,
+                        "edges": len(edges),
+                        "backend": backend,
+                        "operation": operation,
+                        "seconds": seconds,
+                        "per_operation": seconds / count if count else 0,
+                    })
+
+    return results
+
+def result_key(row):
+    return (row["family"], row["size"], row["backend"], row["operation"])
+
+def compare(previous, current, threshold):
+    """
+    Matches up the rows of two runs. Returns a list of (key, previous time,
+    current time, ratio) for every row in both whose time changed by more than
+    threshold times either way, slowest first.
+    """
+    previous_times = dict((result_key(row), row["seconds"]) for row in previous)
+    changes = []
+
+    for row in current:
+        key = result_key(row)
+
+        if key not in previous_times or not previous_times[key]:
+            continue
+
+        ratio = row["seconds"] / previous_times[key]
+
+        if ratio > threshold or ratio < 1.0 / threshold:
+            changes.append((key, previous_times[key], row["seconds"], ratio))
+
+    changes.sort(key=lambda change: change[3], reverse=True)
+    return changes
+
+def fastest_backends(results):
+    """
+    Returns a dict from (family, size, operation) to the backend that was the
+    fastest at it. Reading it by increasing size shows the crossover points.
+    """
+    fastest = {}
+
+    for row in results:
+        key = (row["family"], row["size"], row["operation"])
+
+        if key not in fastest or row["seconds"] < fastest[key][1]:
+            fastest[key] = (row["backend"], row["seconds"])
+
+    return dict((key, backend) for key, (backend, _) in fastest.items())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Graph backend benchmarks.")
+    parser.add_argument(
+        "--families", "-f", nargs="+", choices=sorted(FAMILIES), default=sorted(FAMILIES),
+        required=False, help="The kinds of graphs to generate."
+    )
+    parser.add_argument(
+        "--sizes", "-n", type=int, nargs="+", default=(100, 300, 1000), required=False,
+        help="The number of nodes in each graph."
+    )
+    parser.add_argument(
+        "--backends", "-b", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS),
+        required=False, help="The graph classes to time."
+    )
+    parser.add_argument(
+        "--runs", "-r", type=int, default=3, required=False,
+        help="How many times each graph is built and timed. The best time counts."
+    )
+    parser.add_argument(
+        "--seed", "-s", type=int, default=0, required=False,
+        help="Seed for generating the graphs."
+    )
+    parser.add_argument(
+        "--max-complete", type=int, default=300, required=False,
+        help="Complete graphs bigger than this are skipped."
+    )
+    parser.add_argument(
+        "--output", "-o", required=False,
+        help="Save the results to this JSON file."
+    )
+    parser.add_argument(
+        "--compare", "-c", required=False,
+        help="A JSON file from a previous run to compare against."
+    )
+    parser.add_argument(
+        "--threshold", "-t", type=float, default=1.25, required=False,
+        help="Report changes of more than this factor when comparing."
+    )
+
+    args = parser.parse_args()
+    if args.runs <= 0 or min(args.sizes) <= 0 or args.threshold < 1:
+        print("runs and sizes should be greater than 0 and threshold at least 1")
+        exit(1)
+
+    results = run(args.families, args.sizes, args.backends, args.runs, args.seed, args.max_complete)
+
+    print("%12s %6s %8s %18s %14s %14s" %
+      ("family", "nodes", "edges", "backend", "operation", "per op (us)"))
+    for row in results:
+        print("%12s %6s %8s %18s %14s %14.3f" % (row["family"], row["size"], row["edges"],
+          row["backend"], row["operation"], row["per_operation"] * 1e6))
+
+    print()
+    print("Fastest backend:")
+    for (family, size, operation), backend in sorted(fastest_backends(results).items()):
+        print("%12s %6s %14s %18s" % (family, size, operation, backend))
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({
+                "meta": {"seed": args.seed, "runs": args.runs, "python": platform.python_version()},
+                "results": results,
+            }, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)["results"]
+
+        changes = compare(previous, results, args.threshold)
+        print()
+        print("Changes beyond %sx against %s:" % (args.threshold, args.compare))
+
+        for (family, size, backend, operation), before, after, ratio in changes:
+            verdict = "slower" if ratio > 1 else "faster"
+            print("%12s %6s %18s %14s %10.4f -> %10.4f s  %5.2fx %s" %
+              (family, size, backend, operation, before, after, ratio, verdict))
+
+        if not changes:
+            print("none")
@@ -1,13 +1,54 @@
 #! /usr/bin/env python3
 
 from .errors import NotInNodesException, DuplicateNodeException, CorruptedStructureException
+from .union_find import UnionFind
 
+from array import array
+from collections import deque, OrderedDict
+from collections.abc import Set
+from operator import countOf
+import math
 import random
 
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    # Before Python 3.10.
+    _popcount = lambda bits: bin(bits).count("1")
+
 """
 Package for graph data structures.
 """
 
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+def _is_int64(value):
+    # bool is an int but would come back as one.
+    return type(value) is int and INT64_MIN <= value <= INT64_MAX
+
+def _weight_cells(weights):
+    """
+    Storage for the given weights: an int64 array while they are all ints
+    that fit, so nothing is lost, or else a list of them as they are.
+    """
+    weights = list(weights)
+
+    if all(_is_int64(weight) for weight in weights):
+        return array("q", weights)
+
+    return weights
+
+def _weight_or_zero(graph, n1, n2):
+    """
+    The weight of the edge from n1 to n2, or 0 if the graph is not weighted.
+    For copying a graph into a representation that always has weights.
+    """
+    try:
+        return graph.get_weight(n1, n2)
+    except NotImplementedError:
+        return 0
+
 # TODO Be able to remove connections
 class Graph(object):
     """
@@ -23,14 +64,63 @@ class Graph(object):
     representing directed graphs and one representing undirected graphs is the
     make_neighbor method. Extending a directed/undirected graph for an
     undirected/directed graph should be trivial.
+
+    Implementations that can be modified should bump _version whenever they
+    gain or lose a node or an edge. See version.
     """
 
+    _version = 0
+
     def __eq__(self, g2):
         """
         Two graphs are equal if and only if they are topographically similar and
-        if their corresponding nodes contain the same data.
+        if their corresponding nodes contain the same data: they have the same
+        nodes, and the same edges between them with the same weights if both
+        are weighted. The representations may differ.
+
+        Gives up as soon as the node counts, the node sets or the degrees of
+        some node differ, before comparing any neighbors. To compare graphs
+        by shape alone, whatever their nodes, see graph_hashing.
         """
-        raise NotImplementedError("equality must be defined for Graph objects.")
+        if self is g2:
+            return True
+
+        if not isinstance(g2, Graph):
+            return NotImplemented
+
+        nodes = self.added_nodes
+        other_nodes = g2.added_nodes
+
+        if len(nodes) != len(other_nodes):
+            return False
+
+        if type(self) is type(g2) and self.edge_count != g2.edge_count:
+            return False
+
+        if any(node not in other_nodes for node in nodes):
+            return False
+
+        if any(self.get_outdegree(node) != g2.get_outdegree(node) for node in nodes):
+            return False
+
+        for node in nodes:
+            neighbors = self.get_neighbors(node)
+
+            if set(neighbors) != set(g2.get_neighbors(node)):
+                return False
+
+            for neighbor in neighbors:
+                try:
+                    if self.get_weight(node, neighbor) != g2.get_weight(node, neighbor):
+                        return False
+                except NotImplementedError:
+                    # At least one of them is not weighted.
+                    break
+
+        return True
+
+    # Graphs can change, so they can't be hashed. See graph_hashing.GraphKey.
+    __hash__ = None
 
     def is_reachable(self, n1, n2):
         """
@@ -39,7 +129,9 @@ class Graph(object):
         might not always mean is_reachable(n2, n1) .
 
         Mathematically, the call is_reachable(n1, n2) will
-        return true iff n2 is in get_neighbors(n1) .
+        return true iff n2 is in get_neighbors(n1) . To ask whether
+        there is a path from n1 to n2, see
+        graph_algorithms.ReachabilityIndex .
         """
         pass
 
@@ -67,6 +159,33 @@ class Graph(object):
         for node in nodes:
             self.add_node(node)
 
+    def add_edges(self, edges):
+        """
+        Convenience method that connects every edge in the edges iterable. Each
+        edge is either an (n1, n2) or an (n1, n2, weight) tuple. As with
+        add_nodes, nothing is connected if any of the endpoints is not in the
+        graph. This has a default implementation.
+        """
+        edges = tuple(edges)
+        self._check_endpoints(edges)
+
+        for edge in edges:
+            self.make_neighbor(*edge)
+
+    def _check_endpoints(self, edges):
+        """
+        Raises a NotInNodesException for the first endpoint in edges that is not
+        in the graph.
+        """
+        added_nodes = self.added_nodes
+
+        for edge in edges:
+            if edge[0] not in added_nodes:
+                raise NotInNodesException(edge[0])
+
+            if edge[1] not in added_nodes:
+                raise NotInNodesException(edge[1])
+
     @property
     def added_nodes(self):
         """
@@ -80,6 +199,25 @@ class Graph(object):
         Must return a count of all the edges in this graph.
         """
         raise NotImplementedError("edge_count is not supported by this implementation.")
+
+    def _shuffled_nodes(self, rng):
+        """
+        The nodes in random order, for GraphTraversal to start islands from.
+        Graphs too big to list every node should override this with something
+        lazy.
+        """
+        nodes = list(self.added_nodes)
+        rng.shuffle(nodes)
+        return nodes
+
+    @property
+    def version(self):
+        """
+        A counter that goes up every time a node or an edge is added to or
+        removed from the graph. Anything computed from the graph can remember
+        the version it was computed at to tell when it has gone stale.
+        """
+        return self._version
     
     def remove_node(self, node):
         """
@@ -103,6 +241,17 @@ class Graph(object):
         """
         raise NotImplementedError("This does not represent a weighted graph.")
 
+    def get_predecessors(self, n1):
+        """
+        Returns all nodes that can reach n1. For undirected graphs this is the
+        same as get_neighbors. This has a default implementation which asks
+        every node in the graph, so implementations are encouraged to do better.
+        """
+        if n1 not in self.added_nodes:
+            raise NotInNodesException(n1)
+
+        return [node for node in self.added_nodes if self.is_reachable(node, n1)]
+
     def get_indegree(self, n1):
         """
         For a directed graph, the number of vertices which can
@@ -130,6 +279,9 @@ class Graph(object):
 
         GraphType - A concrete implementation of the Graph class which will be
         used by this method to construct the transpose.
+
+        This copies every edge. If you only need to read the transpose, a
+        TransposedView is much cheaper.
         """
         transpose_graph = GraphType()
 
@@ -153,19 +305,30 @@ class AdjacencyLists(Graph):
     The graph created by default is directed.
 
     Convention:
-    The graph is represented as a list-of-lists. The first element in each list
-    is a specific node in the graph. The rest of the list represents nodes
-    immediately reachable from the node represented by the first element.
+    The graph is represented as a dict-of-dicts. Each node in the graph maps to
+    a dict of the nodes immediately reachable from it, which in turn map to the
+    weight of the connection. Neighbors are kept in the order they were made.
+
+    If constructed with reverse_index=True, the graph also maintains the same
+    structure for incoming connections. This makes get_indegree O(1) and
+    get_predecessors and remove_node O(in-degree + out-degree), at the cost of
+    twice the memory for edges.
 
     This can represent a directed, possibly weighted, graph.
     """
 
-    def __init__(self):
+    def __init__(self, reverse_index=False):
         # self.__nodes is the adjacency list
         self.__nodes = dict()
+        # node -> {predecessor: weight}, only if asked for
+        self.__predecessors = dict() if reverse_index else None
         self.__added_nodes = set()
         self._edge_count = 0
 
+    @property
+    def has_reverse_index(self):
+        return self.__predecessors is not None
+
     def get_neighbors(self, n1):
         """
         Returns a list of all the nodes reachable via n1. Returns an 
@@ -173,13 +336,28 @@ class AdjacencyLists(Graph):
         if n1 is not even in the graph.
         """
         if n1 in self.added_nodes:
-            return list(map(lambda x: x[0], self.__nodes[n1]))
+            return list(self.__nodes[n1])
         else:
             raise NotInNodesException(n1)
 
+    def get_predecessors(self, n1):
+        """
+        Returns a list of all the nodes that can reach n1. This is O(V) unless
+        the graph keeps a reverse index.
+        """
+        if n1 not in self.added_nodes:
+            raise NotInNodesException(n1)
+
+        if self.__predecessors is not None:
+            return list(self.__predecessors[n1])
+        else:
+            return [node for node in self.__nodes if n1 in self.__nodes[node]]
+
     def is_reachable(self, n1, n2):
-        n1_neighbors = self.get_neighbors(n1)
-        return n1_neighbors and n2 in n1_neighbors
+        if n1 not in self.added_nodes:
+            raise NotInNodesException(n1)
+
+        return n2 in self.__nodes[n1]
     
     @property
     def added_nodes(self):
@@ -198,7 +376,11 @@ class AdjacencyLists(Graph):
             raise DuplicateNodeException(node)
         else:
             self.__added_nodes.add(node)
-            self.__nodes[node] = []
+            self.__nodes[node] = {}
+            self._version += 1
+
+            if self.__predecessors is not None:
+                self.__predecessors[node] = {}
 
     def make_neighbor(self, n1, n2, weight = 0):
         """
@@ -206,7 +388,8 @@ class AdjacencyLists(Graph):
         reachable from n1 but n1 will not be necessarily
         reachable from n2.
 
-        You can't represent self-loops here, unfortunately.
+        Making an existing connection again does nothing, not even update its
+        weight.
         """
         if n1 not in self.added_nodes:
             raise NotInNodesException(n1)
@@ -214,47 +397,89 @@ class AdjacencyLists(Graph):
         if n2 not in self.added_nodes:
             raise NotInNodesException(n2)
 
-        n1_list = self.__nodes[n1]
-        if n2 not in n1_list:
-            n1_list.append((n2, weight))
-            self.__nodes[n1] = n1_list
-            self._edge_count += 1
+        self._connect(n1, n2, weight)
+
+    def add_edges(self, edges):
+        """
+        Checks all the endpoints in edges in one pass and then connects them
+        without checking again.
+        """
+        edges = tuple(edges)
+        self._check_endpoints(edges)
+
+        for edge in edges:
+            self._connect(*edge)
+
+    def _connect(self, n1, n2, weight=0):
+        """
+        Makes n2 reachable from n1, assuming both are in the graph. Returns
+        True if this is a new connection, False if it already exists.
+        """
+        n1_neighbors = self.__nodes[n1]
+        if n2 in n1_neighbors:
+            return False
+
+        n1_neighbors[n2] = weight
+        self._edge_count += 1
+        self._version += 1
+
+        if self.__predecessors is not None:
+            self.__predecessors[n2][n1] = weight
+
+        return True
 
     def get_weight(self, n1, n2):
-        if n2 not in self.get_neighbors(n1):
+        if n1 not in self.added_nodes:
+            raise NotInNodesException(n1)
+
+        n1_neighbors = self.__nodes[n1]
+        if n2 not in n1_neighbors:
             raise NotInNodesException(n2)
         else:
-            n1_neighbors = self.__nodes[n1]
-            # Find n2 and return its weight
-            for node_weight in n1_neighbors:
-                if node_weight[0] == n2:
-                    return node_weight[1]
+            return n1_neighbors[n2]
 
     def remove_node(self, node):
         """
-        Requirement: list must not be acyclic.
+        Removes the node together with its incoming and outgoing connections.
+        Without a reverse index, the incoming connections are found through
+        get_predecessors, which checks every node in the graph.
         """
+        if node not in self.added_nodes:
+            raise NotInNodesException(node)
+
+        if self.__predecessors is not None:
+            incoming = self.__predecessors.pop(node)
+        else:
+            incoming = self.get_predecessors(node)
+
         # Remove from added_nodes
         self.__added_nodes.remove(node)
+        self._version += 1
 
         # Remove outgoing connections
-        self.__nodes.pop(node)
+        outgoing = self.__nodes.pop(node)
+        self._edge_count -= len(outgoing)
 
-        # Remove incoming connections
-        for n in tuple(self.__added_nodes):
-            n_neighbors = self.__nodes[n]
+        if self.__predecessors is not None:
+            for n in outgoing:
+                if n != node:
+                    self.__predecessors[n].pop(node)
 
-            if node in n_neighbors:
-                n_neighbors.remove(node)
-                self.__nodes[n] = n_neighbors
+        # Remove incoming connections
+        for n in incoming:
+            if n != node:
+                self.__nodes[n].pop(node)
+                self._edge_count -= 1
 
     def get_outdegree(self, n1):
         """
         Returns the number of nodes reachable from n1. Throws a
         NotInNodesException if n1 is not in the graph.
         """
-        neighbors = self.get_neighbors(n1)
-        return len(neighbors)
+        if n1 in self.added_nodes:
+            return len(self.__nodes[n1])
+        else:
+            raise NotInNodesException(n1)
 
     def get_indegree(self, n1):
         """
@@ -262,10 +487,13 @@ class AdjacencyLists(Graph):
         a NotInNodesException if n1 is not in the graph.
         """
         if n1 in self.added_nodes:
+            if self.__predecessors is not None:
+                return len(self.__predecessors[n1])
+
             outcount = 0
             
             for node in self.added_nodes:
-                outcount += 1 if self.is_reachable(node, n1) else 0
+                outcount += 1 if n1 in self.__nodes[node] else 0
 
             return outcount
         else:
@@ -275,17 +503,36 @@ class AdjacencyMatrix(Graph):
     """
     An AdjacenyMatrix representation of an _undirected_ graph. Usage of this
     class for weighted connections is valid as long as the weights are
-    nonnegative.
+    nonnegative numbers.
+
+    Convention:
+    Every node is hashed to a slot. The matrix is a single flat sequence, row
+    by row, with room for capacity slots per row. Cell (i, j) holds the weight
+    between the nodes at slots i and j, or DISCONNECTED. While every weight is
+    an int that fits in 64 bits the matrix is a compact array of int64s; the
+    first other weight (a float, a Fraction, anything) turns it into a list,
+    so get_weight always gives back exactly what was put in.
+
+    When the matrix runs out of slots its capacity doubles, so adding n nodes
+    costs O(n^2) overall. Removed nodes leave a tombstone in their slot; once
+    tombstones outnumber the live slots, the matrix is compacted.
     """
 
     # Because all nonnegative weights are go.
     # Does "zero" weight really make sense.
     DISCONNECTED = -1
+    INITIAL_CAPACITY = 4
+    # Marks the slot of a removed node.
+    TOMBSTONE = object()
     
     def __init__(self):
-        self.__adjmat = []
+        self.__capacity = 0
+        self.__adjmat = array("q")
         self.__added_nodes = set()
-        self.__node_sequence = []
+        # node -> slot and slot -> node
+        self.__node_index = {}
+        self.__slot_nodes = []
+        self.__tombstones = 0
         self.__edge_count = 0
 
     @property
@@ -296,40 +543,125 @@ class AdjacencyMatrix(Graph):
     def edge_count(self):
         return self.__edge_count
 
+    def __new_cells(self, values):
+        """
+        A sequence of the given cells of the same kind as the matrix.
+        """
+        if isinstance(self.__adjmat, array):
+            return array(self.__adjmat.typecode, values)
+
+        return list(values)
+
+    def __resize(self, capacity):
+        """
+        Move the live slots, in order, into a fresh matrix that has room for
+        the given number of slots per row. This drops all tombstones.
+        """
+        live_slots = [
+            slot for slot, node in enumerate(self.__slot_nodes)
+            if node is not AdjacencyMatrix.TOMBSTONE
+        ]
+        live_count = len(live_slots)
+        resized = self.__new_cells((AdjacencyMatrix.DISCONNECTED,)) * (capacity * capacity)
+
+        for new_row, old_row in enumerate(live_slots):
+            old_start = old_row * self.__capacity
+            new_start = new_row * capacity
+
+            if self.__tombstones:
+                old_row_cells = self.__adjmat[old_start:old_start + len(self.__slot_nodes)]
+                resized[new_start:new_start + live_count] = self.__new_cells(
+                  [old_row_cells[old_col] for old_col in live_slots]
+                )
+            else:
+                resized[new_start:new_start + live_count] = \
+                  self.__adjmat[old_start:old_start + live_count]
+
+        self.__slot_nodes = [self.__slot_nodes[slot] for slot in live_slots]
+        self.__node_index = dict((node, slot) for slot, node in enumerate(self.__slot_nodes))
+        self.__tombstones = 0
+        self.__capacity = capacity
+        self.__adjmat = resized
+
+    def export_matrix(self):
+        """
+        Returns the nodes in slot order and a fresh, densely packed row-major
+        array("d") of their n * n cells, without the spare capacity or the
+        tombstones. Cell (i, j) is the weight between the i-th and the j-th
+        node or DISCONNECTED. The weights must hence be numbers.
+        """
+        live_slots = [
+            slot for slot, node in enumerate(self.__slot_nodes)
+            if node is not AdjacencyMatrix.TOMBSTONE
+        ]
+        live_count = len(live_slots)
+        exported = array("d")
+
+        for slot in live_slots:
+            row_start = slot * self.__capacity
+
+            if self.__tombstones:
+                row = self.__adjmat[row_start:row_start + len(self.__slot_nodes)]
+                exported.fromlist([row[col] for col in live_slots])
+            else:
+                exported.fromlist(list(self.__adjmat[row_start:row_start + live_count]))
+
+        return [self.__slot_nodes[slot] for slot in live_slots], exported
+
+    def __compact(self):
+        live_count = len(self.__slot_nodes) - self.__tombstones
+        capacity = AdjacencyMatrix.INITIAL_CAPACITY
+
+        while capacity < live_count:
+            capacity *= 2
+
+        self.__resize(capacity)
+
     def add_node(self, node):
         if node in self.added_nodes:
             raise DuplicateNodeException(node)
 
+        if len(self.__slot_nodes) == self.__capacity:
+            if self.__tombstones:
+                self.__compact()
+
+            if len(self.__slot_nodes) == self.__capacity:
+                self.__resize(max(AdjacencyMatrix.INITIAL_CAPACITY, 2 * self.__capacity))
+
+        slot = len(self.__slot_nodes)
+        self.__slot_nodes.append(node)
+        self.__node_index[node] = slot
         self.added_nodes.add(node)
-        self.__node_sequence.insert(0, node)
-        self.__adjmat.insert(0, [AdjacencyMatrix.DISCONNECTED for i in range(len(self.__node_sequence))])
+        self._version += 1
         # Always costs nothing to get to yourself from yourself, at least initially.
-        self.__adjmat[0][0] = 0
-        
-        for index in range(1, len(self.__adjmat)):
-            self.__adjmat[index].insert(0, AdjacencyMatrix.DISCONNECTED)
-            self.__adjmat[index][index] = 0
+        self.__adjmat[slot * self.__capacity + slot] = 0
 
     def __get_index(self, node):
         """
-        Return the index of this node in the matrix.
-
-        (Idea: It might be faster if we implement this as a hash.)
+        Return the slot of this node in the matrix.
         """
-        if node not in self.added_nodes:
+        if node not in self.__node_index:
             raise NotInNodesException(node)
 
-        for idx, n in enumerate(self.__node_sequence):
-            if n == node:
-                return idx
+        return self.__node_index[node]
+
+    def __row_slots(self, node_index):
+        """
+        Iterates over the (slot, cell value) pairs of the row of the given slot
+        that are connections to other nodes.
+        """
+        row_start = node_index * self.__capacity
+        row = self.__adjmat[row_start:row_start + len(self.__slot_nodes)]
+
+        for index, is_adjacent in enumerate(row):
+            if is_adjacent >= 0 and index != node_index:
+                yield index, is_adjacent
     
     def get_indegree(self, node):
         in_count = 0
-        node_index = self.__get_index(node)
 
-        for index, row in enumerate(self.__adjmat):
-            if node_index != index:
-                in_count += 1 if row[node_index] >= 0 else 0
+        for _ in self.__row_slots(self.__get_index(node)):
+            in_count += 1
 
         return in_count
 
@@ -339,20 +671,17 @@ class AdjacencyMatrix(Graph):
         neighbor of the given node if their entry in the adjacency matrix is
         greater than or equal to 0.
         """
-        neighbors = []
         node_index = self.__get_index(node)
-        node_adjacency = self.__adjmat[node_index]
-
-        for index, is_adjacent in enumerate(node_adjacency):
-            if is_adjacent >= 0 and index != node_index:
-                neighbors.insert(0, self.__node_sequence[index])
-
-        return neighbors
+        return [self.__slot_nodes[index] for index, _ in self.__row_slots(node_index)]
 
     def get_outdegree(self, node):
         # This is undirected so this is totally valid
         return self.get_indegree(node)
 
+    def get_predecessors(self, node):
+        # Same reasoning as get_outdegree
+        return self.get_neighbors(node)
+
     def get_weight(self, n1, n2):
         """
         Gets the cost of going to n2 via n1. Returns a negative value if n1 and
@@ -361,158 +690,1448 @@ class AdjacencyMatrix(Graph):
         n1_index = self.__get_index(n1)
         n2_index = self.__get_index(n2)
 
-        n1_adjacency = self.__adjmat[n1_index]
-        return n1_adjacency[n2_index]
+        return self.__adjmat[n1_index * self.__capacity + n2_index]
     
     def is_reachable(self, n1, n2):
         connection = self.get_weight(n1, n2)
         return connection >= 0
     
     def make_neighbor(self, n1, n2, weight=0):
-        if n1 not in self.added_nodes:
-            raise NotInNodesException(n1)
-
-        if n2 not in self.added_nodes:
-            raise NotInNodesException(n2)
-
         n1_index = self.__get_index(n1)
         n2_index = self.__get_index(n2)
+        n1_to_n2 = n1_index * self.__capacity + n2_index
+        n2_to_n1 = n2_index * self.__capacity + n1_index
+
+        if self.__adjmat[n1_to_n2] == self.__adjmat[n2_to_n1] \
+          and self.__adjmat[n1_to_n2] < 0:
+            if isinstance(self.__adjmat, array) and not _is_int64(weight):
+                self.__adjmat = self.__adjmat.tolist()
 
-        if self.__adjmat[n1_index][n2_index] == self.__adjmat[n2_index][n1_index] \
-          and self.__adjmat[n1_index][n2_index] < 0:
             # Since this is undirected, toggling the direction marker should go
             # both ways
-            n1_adjacency = self.__adjmat[n1_index]
-            n1_adjacency[n2_index] = weight
-
-            n2_adjacency = self.__adjmat[n2_index]
-            n2_adjacency[n1_index] = weight
+            self.__adjmat[n1_to_n2] = weight
+            self.__adjmat[n2_to_n1] = weight
             self.__edge_count += 1
-        elif self.__adjmat[n1_index][n2_index] != self.__adjmat[n2_index][n1_index]:
+            self._version += 1
+        elif self.__adjmat[n1_to_n2] != self.__adjmat[n2_to_n1]:
             raise CorruptedStructureException(type(self))
 
     def remove_node(self, node):
+        """
+        Disconnects the node from everything and leaves a tombstone in its slot,
+        O(V). Every so often this compacts the whole matrix but that is paid
+        for by the removals since the last compaction.
+        """
         node_index = self.__get_index(node)
-        self.added_nodes.remove(node)
-        self.__node_sequence.remove(node)
+        capacity = self.__capacity
+
+        for index, _ in self.__row_slots(node_index):
+            self.__adjmat[index * capacity + node_index] = AdjacencyMatrix.DISCONNECTED
+            self.__adjmat[node_index * capacity + index] = AdjacencyMatrix.DISCONNECTED
+            self.__edge_count -= 1
 
-        # Fix the adjmat!
-        # Remove the row
-        temp_adjmat = self.__adjmat[0:node_index]
-        temp_adjmat.extend(self.__adjmat[node_index + 1:len(self.__adjmat)])
-        self.__adjmat = temp_adjmat
+        self.__adjmat[node_index * capacity + node_index] = AdjacencyMatrix.DISCONNECTED
+        self.added_nodes.remove(node)
+        self.__node_index.pop(node)
+        self.__slot_nodes[node_index] = AdjacencyMatrix.TOMBSTONE
+        self.__tombstones += 1
+        self._version += 1
 
-        for i, row in enumerate(self.__adjmat):
-            self.__adjmat[i] = row[0:node_index]
-            self.__adjmat[i].extend(row[node_index + 1:len(row)])
+        if self.__tombstones > len(self.__slot_nodes) - self.__tombstones:
+            self.__compact()
 
 class UndirectedAdjList(AdjacencyLists):
     """
     Creates undirected graphs with an adjacency list
     representation.
 
+    Every edge is stored in the neighbor dicts of both of its endpoints so
+    making, deduplicating and weighing an edge are all O(1). The neighbors of a
+    node are also its predecessors, which keeps remove_node at O(degree).
+
+    If constructed with track_components=True, the graph also keeps its
+    connected components in a union-find that every new node and edge is fed
+    into, so component_of, same_component and component_count are nearly O(1)
+    however the graph is built up. A union-find can't split sets, so after a
+    remove_node the components are rebuilt, in O(V + E), on the next query.
+
     This may represent an undirected, possibly weighted, graph.
     """
 
-    def __init__(self):
+    def __init__(self, track_components=False):
         super(UndirectedAdjList, self).__init__()
         self.__edge_count = 0
-        self.__edge_set = []
+        self.__track_components = track_components
+        self.__components = UnionFind() if track_components else None
+        self.__component_count = 0
 
-    def make_neighbor(self, n1, n2, weight = 0):
-        edge = set((n1, n2))
+    @property
+    def edge_count(self):
+        return self.__edge_count
 
-        if edge in self.__edge_set:
-            pass
-        else:
-            self.__edge_set.append(edge)
-            super(UndirectedAdjList, self).make_neighbor(n1, n2, weight)
-            super(UndirectedAdjList, self).make_neighbor(n2, n1, weight)
+    @property
+    def tracks_components(self):
+        return self.__track_components
+
+    def add_node(self, node):
+        super(UndirectedAdjList, self).add_node(node)
+
+        if self.__components is not None:
+            self.__components.add_object(node)
+            self.__component_count += 1
+
+    def _connect(self, n1, n2, weight=0):
+        if super(UndirectedAdjList, self)._connect(n1, n2, weight):
+            super(UndirectedAdjList, self)._connect(n2, n1, weight)
             self.__edge_count += 1
-            self._edge_count = self.__edge_count
 
-############## HERE BE ITERATORS ##############
+            if self.__components is not None and self.__components.make_equal(n1, n2):
+                self.__component_count -= 1
 
-class DFSIterator(object):
-    """
-    Enumerates all the nodes in the graph via depth-first search. This is not
-    concerened with path finding and so there is no way to specify where to
-    start the search.
+            return True
 
-    Avoid modifying the graph structure while iteration. This will lead to
-    undefined behaviors; it will not be guaranteed that the modifications will
-    be reflected in the graph.
-    """
+        return False
 
-    def __init__(self, graph):
-        self.graph = graph
-        self.visited = set()
-        self.traversal_stack = []
-        self.current_node = None
+    def __up_to_date_components(self):
+        """
+        Returns the union-find of the components, rebuilding it if a node has
+        been removed since it was last built.
+        """
+        if not self.__track_components:
+            raise NotImplementedError("components are only kept with track_components=True.")
 
-    def __iter__(self):
-        return self
+        if self.__components is None:
+            components = UnionFind()
+            self.__component_count = len(self.added_nodes)
 
-    def __next__(self):
+            for node in self.added_nodes:
+                components.add_object(node)
+
+            for node in self.added_nodes:
+                for neighbor in self.get_neighbors(node):
+                    if components.make_equal(node, neighbor):
+                        self.__component_count -= 1
+
+            self.__components = components
+
+        return self.__components
+
+    def component_of(self, node):
         """
-        A DFS driver method, incidentally designed to work for the iterator.
+        Returns a representative node of the connected component node is in.
+        Two nodes are in the same component iff they have the same
+        representative, but the representative of a component may change as
+        the graph changes.
         """
-        if self.visited == self.graph.added_nodes:
-            raise StopIteration
-        elif len(self.traversal_stack): # A current connected node is being traversed.
-            return self._dfs()
-        else:
-            # Randomly pick a node that is not yet visited.
-            unvisited = self.graph.added_nodes.difference(self.visited)
-            random_node = random.choice(tuple(unvisited))
-            return self._dfs(start_node = random_node)
-
-    def _dfs(self, start_node = None):
-        """
-        Where all the magic of this iterator happens.
-
-        Assumes that if start_node is None, traversal_stack is not empty.
-        Otherwise, traversal_stack is empty.
-        """
-        # TODO Beware of possible cycles
-        if start_node and start_node not in self.visited:
-            # FIXME What about nodes reachable from themselves?
-            self.traversal_stack.extend(self.graph.get_neighbors(start_node))
-            self.visited.add(start_node)
-            return start_node
-        elif len(self.traversal_stack):
-            # Note: Would've been an excellent use of a do-while construct
-            next_node = self.traversal_stack.pop()
-            while next_node in self.visited:
-                next_node = self.traversal_stack.pop()
-            self.traversal_stack.extend(self.graph.get_neighbors(next_node))
-            self.visited.add(next_node)
-            return next_node
+        if node not in self.added_nodes:
+            raise NotInNodesException(node)
 
-class DFSIslandIterator(DFSIterator):
+        return self.__up_to_date_components().find(node)
+
+    def same_component(self, n1, n2):
+        """
+        True if there is a path between n1 and n2.
+        """
+        return self.component_of(n1) == self.component_of(n2)
+
+    @property
+    def component_count(self):
+        self.__up_to_date_components()
+        return self.__component_count
+
+    def get_predecessors(self, n1):
+        return self.get_neighbors(n1)
+
+    def get_indegree(self, n1):
+        return self.get_outdegree(n1)
+
+    def remove_node(self, node):
+        degree = self.get_outdegree(node)
+        super(UndirectedAdjList, self).remove_node(node)
+        self.__edge_count -= degree
+
+        if self.__track_components:
+            self.__components = None
+
+class CSRGraph(Graph):
     """
-    Traverses the graph in a depth-first manner and allows you to specify where
-    to start. If the given graph has islands, only the nodes in the start_node's
-    island will be enumerated by this iterator.
+    Compressed sparse row representation of a directed, possibly weighted,
+    graph.
 
-    As with DFIterator, modifications done on the graph while traversal is
-    taking place may or may not reflect in the traversal.
+    Convention:
+    Every node is assigned an integer index in the order it was added. The
+    outgoing edges of the node at index i are stored contiguously in the flat
+    arrays targets and weights, from position offsets[i] up to (but not
+    including) offsets[i + 1]. targets holds node indices, not nodes.
+
+    Weights are kept in an int64 array while they are all ints that fit, and
+    in a list as soon as one is not, so get_weight gives back exactly what was
+    put in. Graphs made by from_arrays keep the weights they are given.
+
+    The arrays are only rebuilt when needed. Edges made through make_neighbor
+    are buffered and merged into the arrays, in O(V + E), on the next query.
+    Build your graph first, then query it; if you already have all your edges,
+    from_edges is the fastest way to get here.
     """
-    
-    #FIXME What if the specified start_node is not in the graph?
 
-    def __init__(self, graph, start_node):
-        super(DFSIslandIterator, self).__init__(graph)
-        self.traversal_stack.append(start_node)
+    INDEX_TYPE = "q"
+    # What export_arrays gives the weights as.
+    WEIGHT_TYPE = "d"
 
-    def __next__(self):
-        if len(self.traversal_stack):
-            self.current_node = self.traversal_stack.pop()
-            # Get the unvisited neighbors
-            node_neighbors = set(self.graph.get_neighbors(self.current_node))
-            # Difference from the visited nodes
-            unvisited = node_neighbors.difference(self.visited)
-            self.visited.add(self.current_node)
-            return self.current_node
+    def __init__(self):
+        self.__node_list = []
+        self.__node_index = {}
+        self.__added_nodes = set()
+        self.__offsets = array(CSRGraph.INDEX_TYPE, (0,))
+        self.__targets = array(CSRGraph.INDEX_TYPE)
+        self.__weights = array("q")
+        # Edges not yet in the arrays, as source index -> {target index: weight}
+        self.__pending = {}
+        self._edge_count = 0
+
+    @classmethod
+    def from_edges(cls, edges, nodes=()):
+        """
+        Build a graph in one go from an iterable of edges, in O(V + E). Each
+        edge is either an (n1, n2) or an (n1, n2, weight) tuple. Nodes are
+        indexed in the order given in nodes and then in the order they first
+        appear in edges. Repeated edges are ignored; the first weight given
+        wins.
+        """
+        graph = cls()
+
+        for node in nodes:
+            graph.add_node(node)
+
+        node_index = graph.__node_index
+        sources = array(CSRGraph.INDEX_TYPE)
+        targets = array(CSRGraph.INDEX_TYPE)
+        weights = []
+
+        for edge in edges:
+            for node in edge[0:2]:
+                if node not in node_index:
+                    graph.add_node(node)
+
+            sources.append(node_index[edge[0]])
+            targets.append(node_index[edge[1]])
+            weights.append(edge[2] if len(edge) > 2 else 0)
+
+        graph.__offsets, graph.__targets, graph.__weights = CSRGraph._build_arrays(
+          len(graph.__node_list), sources, targets, weights, dedupe=True
+        )
+        graph._edge_count = len(graph.__targets)
+
+        return graph
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Copy any Graph into a CSRGraph, weights included if it is weighted.
+        """
+        nodes = list(graph.added_nodes)
+
+        def edges():
+            for node in nodes:
+                for neighbor in graph.get_neighbors(node):
+                    yield node, neighbor, _weight_or_zero(graph, node, neighbor)
+
+        return cls.from_edges(edges(), nodes)
+
+    @classmethod
+    def from_arrays(cls, nodes, offsets, targets, weights):
+        """
+        Wrap already-built arrays, laid out as described in the class docstring,
+        without copying them. The arrays may be anything indexable that holds
+        numbers, memoryviews included, and are never written to; mutating the
+        graph builds new arrays.
+
+        nodes is any sequence of the nodes in index order. The tables for
+        looking up nodes are only built, in O(V), the first time they are
+        needed, so a graph made this way is ready as soon as it is made.
+        """
+        graph = cls()
+        graph.__node_list = nodes
+        graph.__node_index = None
+        graph.__added_nodes = None
+        graph.__offsets = offsets
+        graph.__targets = targets
+        graph.__weights = weights
+        graph._edge_count = len(targets)
+
+        return graph
+
+    @staticmethod
+    def _build_arrays(node_count, sources, targets, weights, dedupe=False):
+        """
+        Counting-sort the given parallel edge arrays by source index. Returns
+        an (offsets, targets, weights) triple, with the weights stored as
+        _weight_cells does. Edges with the same source keep their relative
+        order.
+        """
+        offsets = array(CSRGraph.INDEX_TYPE, bytes(8 * (node_count + 1)))
+
+        for source in sources:
+            offsets[source + 1] += 1
+
+        for i in range(node_count):
+            offsets[i + 1] += offsets[i]
+
+        edge_total = len(sources)
+        sorted_targets = array(CSRGraph.INDEX_TYPE, bytes(8 * edge_total))
+        sorted_weights = _weight_cells(weights)
+        cursor = offsets[0:node_count]
+
+        for k in range(edge_total):
+            source = sources[k]
+            position = cursor[source]
+            sorted_targets[position] = targets[k]
+            sorted_weights[position] = weights[k]
+            cursor[source] = position + 1
+
+        if not dedupe:
+            return offsets, sorted_targets, sorted_weights
+
+        # Squeeze out repeated targets row by row.
+        write = 0
+        row_start = 0
+
+        for i in range(node_count):
+            row_end = offsets[i + 1]
+            seen = set()
+
+            for position in range(row_start, row_end):
+                target = sorted_targets[position]
+
+                if target not in seen:
+                    seen.add(target)
+                    sorted_targets[write] = target
+                    sorted_weights[write] = sorted_weights[position]
+                    write += 1
+
+            row_start = row_end
+            offsets[i + 1] = write
+
+        del sorted_targets[write:]
+        del sorted_weights[write:]
+
+        return offsets, sorted_targets, sorted_weights
+
+    def __compact(self):
+        """
+        Merge the buffered edges into the arrays.
+        """
+        if not self.__pending:
+            return
+
+        node_count = len(self.__node_list)
+        built_rows = len(self.__offsets) - 1
+        sources = array(CSRGraph.INDEX_TYPE)
+        targets = array(CSRGraph.INDEX_TYPE)
+        weights = []
+
+        for i in range(node_count):
+            if i < built_rows:
+                start = self.__offsets[i]
+                end = self.__offsets[i + 1]
+                sources.extend(array(CSRGraph.INDEX_TYPE, (i,)) * (end - start))
+                targets.extend(self.__targets[start:end])
+                weights.extend(self.__weights[start:end])
+
+            for target, weight in self.__pending.get(i, {}).items():
+                sources.append(i)
+                targets.append(target)
+                weights.append(weight)
+
+        self.__offsets, self.__targets, self.__weights = CSRGraph._build_arrays(
+          node_count, sources, targets, weights
+        )
+        self.__pending = {}
+
+    def __lookup_tables(self):
+        """
+        Returns the node -> index dict, building it (and added_nodes) if this
+        graph was made through from_arrays and it has not been needed yet.
+        """
+        if self.__node_index is None:
+            self.__node_index = dict((node, i) for i, node in enumerate(self.__node_list))
+            self.__added_nodes = set(self.__node_index)
+
+        return self.__node_index
+
+    def __writable_nodes(self):
+        """
+        Returns the node list, as a list we can modify.
+        """
+        if not isinstance(self.__node_list, list):
+            self.__node_list = list(self.__node_list)
+
+        return self.__node_list
+
+    def __get_index(self, node):
+        node_index = self.__lookup_tables()
+
+        if node not in node_index:
+            raise NotInNodesException(node)
+
+        return node_index[node]
+
+    def __row_bounds(self, index):
+        """
+        Returns the (start, end) slice of the arrays holding the edges of the
+        node at the given index. Assumes the arrays are up-to-date.
+        """
+        if index + 1 < len(self.__offsets):
+            return self.__offsets[index], self.__offsets[index + 1]
         else:
-            raise StopIteration
+            # Added after the last build and given no edges since.
+            return 0, 0
+
+    @property
+    def added_nodes(self):
+        self.__lookup_tables()
+        return self.__added_nodes
+
+    @property
+    def edge_count(self):
+        return self._edge_count
+
+    def export_arrays(self):
+        """
+        Returns a (nodes, offsets, targets, weights) tuple where nodes is a
+        tuple of the nodes in index order and the rest are read-only
+        memoryviews over the arrays. The weights come as WEIGHT_TYPE floats,
+        copied unless they already are; they must hence be numbers.
+        """
+        self.__compact()
+        weights = self.__weights
+
+        if not isinstance(weights, (array, memoryview)) or \
+          getattr(weights, "typecode", getattr(weights, "format", None)) != CSRGraph.WEIGHT_TYPE:
+            weights = array(CSRGraph.WEIGHT_TYPE, weights)
+
+        return (tuple(self.__node_list), memoryview(self.__offsets).toreadonly(),
+          memoryview(self.__targets).toreadonly(), memoryview(weights).toreadonly())
+
+    def index_of(self, node):
+        """
+        Returns the integer index of the given node in the arrays.
+        """
+        return self.__get_index(node)
+
+    def node_at(self, index):
+        """
+        Returns the node at the given index.
+        """
+        return self.__node_list[index]
+
+    def neighbor_indices(self, node):
+        """
+        Returns the indices of the neighbors of node as a read-only memoryview
+        over the targets array. No copies are made.
+        """
+        index = self.__get_index(node)
+        self.__compact()
+        start, end = self.__row_bounds(index)
+        return memoryview(self.__targets)[start:end].toreadonly()
+
+    def neighbor_weights(self, node):
+        """
+        Returns the weights of the edges leaving node, aligned with
+        neighbor_indices. That is a read-only memoryview, without copies, if
+        the weights are in an array and a tuple if they are in a list.
+        """
+        index = self.__get_index(node)
+        self.__compact()
+        start, end = self.__row_bounds(index)
+
+        if isinstance(self.__weights, list):
+            return tuple(self.__weights[start:end])
+
+        return memoryview(self.__weights)[start:end].toreadonly()
+
+    def iter_neighbors(self, n1):
+        """
+        Yields the nodes reachable via n1 without building a list.
+        """
+        node_list = self.__node_list
+
+        for target in self.neighbor_indices(n1):
+            yield node_list[target]
+
+    def get_neighbors(self, n1):
+        """
+        Returns a list of all the nodes reachable via n1. Prefer iter_neighbors
+        or neighbor_indices if you only need to go through them.
+        """
+        node_list = self.__node_list
+        return [node_list[target] for target in self.neighbor_indices(n1)]
+
+    def is_reachable(self, n1, n2):
+        return self.__get_index(n2) in self.neighbor_indices(n1)
+
+    def add_node(self, node):
+        node_index = self.__lookup_tables()
+
+        if node in node_index:
+            raise DuplicateNodeException(node)
+
+        node_list = self.__writable_nodes()
+        node_index[node] = len(node_list)
+        node_list.append(node)
+        self.__added_nodes.add(node)
+        self._version += 1
+
+    def make_neighbor(self, n1, n2, weight=0):
+        """
+        The connection created is only one-way. Making an existing connection
+        again does nothing, not even update its weight.
+        """
+        n1_index = self.__get_index(n1)
+        n2_index = self.__get_index(n2)
+        n1_pending = self.__pending.get(n1_index, {})
+
+        if n2_index in n1_pending:
+            return
+
+        start, end = self.__row_bounds(n1_index)
+        for position in range(start, end):
+            if self.__targets[position] == n2_index:
+                return
+
+        n1_pending[n2_index] = weight
+        self.__pending[n1_index] = n1_pending
+        self._edge_count += 1
+        self._version += 1
+
+    def get_weight(self, n1, n2):
+        n2_index = self.__get_index(n2)
+        n1_index = self.__get_index(n1)
+        self.__compact()
+        start, end = self.__row_bounds(n1_index)
+
+        for position in range(start, end):
+            if self.__targets[position] == n2_index:
+                return self.__weights[position]
+
+        raise NotInNodesException(n2)
+
+    def remove_node(self, node):
+        """
+        Removes the node and all connections to and from it. This renumbers
+        every node after it and so costs O(V + E).
+        """
+        removed = self.__get_index(node)
+        self.__compact()
+        node_count = len(self.__node_list)
+        sources = array(CSRGraph.INDEX_TYPE)
+        targets = array(CSRGraph.INDEX_TYPE)
+        weights = []
+        renumber = lambda i: i - 1 if i > removed else i
+
+        for i in range(node_count):
+            if i == removed:
+                continue
+
+            start, end = self.__row_bounds(i)
+            for position in range(start, end):
+                target = self.__targets[position]
+
+                if target != removed:
+                    sources.append(renumber(i))
+                    targets.append(renumber(target))
+                    weights.append(self.__weights[position])
+
+        self.__writable_nodes().pop(removed)
+        self.__added_nodes.remove(node)
+        self.__node_index.pop(node)
+
+        for i in range(removed, node_count - 1):
+            self.__node_index[self.__node_list[i]] = i
+
+        self.__offsets, self.__targets, self.__weights = CSRGraph._build_arrays(
+          node_count - 1, sources, targets, weights
+        )
+        self._edge_count = len(self.__targets)
+        self._version += 1
+
+    def get_outdegree(self, n1):
+        return len(self.neighbor_indices(n1))
+
+    def get_predecessors(self, n1):
+        """
+        Finds the rows pointing to n1 in the targets array, O(V + E).
+        """
+        index = self.__get_index(n1)
+        self.__compact()
+        predecessors = []
+
+        for i in range(len(self.__node_list)):
+            start, end = self.__row_bounds(i)
+
+            if index in memoryview(self.__targets)[start:end]:
+                predecessors.append(self.__node_list[i])
+
+        return predecessors
+
+    def get_indegree(self, n1):
+        """
+        Counts the entries pointing to n1 in the targets array, O(E).
+        """
+        index = self.__get_index(n1)
+        self.__compact()
+        return countOf(self.__targets, index)
+
+class BitsetGraph(Graph):
+    """
+    Adjacency matrix of a directed, unweighted graph where every row is a
+    Python int used as a bitset: bit j of the row of the node at slot i is set
+    iff there is an edge from it to the node at slot j. The columns are kept
+    the same way so predecessors are as cheap as neighbors.
+
+    That is one bit per cell instead of the eight bytes of an AdjacencyMatrix,
+    and intersecting, uniting or counting neighbors is done a machine word at
+    a time. See neighbor_bits, common_neighbors and nodes_in.
+
+    Every node is hashed to a slot. Slots of removed nodes are reused.
+    """
+
+    # Marks the slot of a removed node.
+    FREE = object()
+
+    def __init__(self):
+        self.__node_index = {}
+        self.__slot_nodes = []
+        self.__free_slots = []
+        self.__rows = []
+        self.__columns = []
+        self.__added_nodes = set()
+        self._edge_count = 0
+
+    @property
+    def added_nodes(self):
+        return self.__added_nodes
+
+    @property
+    def edge_count(self):
+        return self._edge_count
+
+    def index_of(self, node):
+        """
+        Returns the slot of the given node, that is, its bit in the bitsets.
+        """
+        if node not in self.__node_index:
+            raise NotInNodesException(node)
+
+        return self.__node_index[node]
+
+    def nodes_in(self, bits):
+        """
+        Returns a list of the nodes whose bits are set in the given bitset, in
+        slot order.
+        """
+        slot_nodes = self.__slot_nodes
+        return [slot_nodes[slot] for slot in BitsetGraph.__slots_in(bits)]
+
+    def neighbor_bits(self, node):
+        """
+        Returns the bitset of the nodes reachable via node.
+        """
+        return self.__rows[self.index_of(node)]
+
+    def predecessor_bits(self, node):
+        """
+        Returns the bitset of the nodes that can reach node.
+        """
+        return self.__columns[self.index_of(node)]
+
+    def common_neighbors(self, n1, n2):
+        """
+        Returns a list of the nodes reachable via both n1 and n2.
+        """
+        return self.nodes_in(self.neighbor_bits(n1) & self.neighbor_bits(n2))
+
+    def count_common_neighbors(self, n1, n2):
+        """
+        Returns how many nodes are reachable via both n1 and n2, without
+        listing them.
+        """
+        return _popcount(self.neighbor_bits(n1) & self.neighbor_bits(n2))
+
+    def add_node(self, node):
+        if node in self.__node_index:
+            raise DuplicateNodeException(node)
+
+        if self.__free_slots:
+            slot = self.__free_slots.pop()
+            self.__slot_nodes[slot] = node
+        else:
+            slot = len(self.__slot_nodes)
+            self.__slot_nodes.append(node)
+            self.__rows.append(0)
+            self.__columns.append(0)
+
+        self.__node_index[node] = slot
+        self.__added_nodes.add(node)
+        self._version += 1
+
+    def make_neighbor(self, n1, n2, weight=0):
+        """
+        The connection created is only one-way. This graph is unweighted so
+        weight is ignored.
+        """
+        self._connect(self.index_of(n1), self.index_of(n2))
+
+    def add_edges(self, edges):
+        """
+        Checks all the endpoints in edges in one pass and then connects them
+        without checking again. Weights are ignored.
+        """
+        edges = tuple(edges)
+        self._check_endpoints(edges)
+        node_index = self.__node_index
+
+        for edge in edges:
+            self._connect(node_index[edge[0]], node_index[edge[1]])
+
+    def _connect(self, slot1, slot2):
+        """
+        Sets the bit for the edge between the given slots. Returns True if this
+        is a new connection, False if it already exists.
+        """
+        if self.__rows[slot1] >> slot2 & 1:
+            return False
+
+        self.__rows[slot1] |= 1 << slot2
+        self.__columns[slot2] |= 1 << slot1
+        self._edge_count += 1
+        self._version += 1
+
+        return True
+
+    def get_neighbors(self, n1):
+        return self.nodes_in(self.neighbor_bits(n1))
+
+    def get_predecessors(self, n1):
+        return self.nodes_in(self.predecessor_bits(n1))
+
+    def is_reachable(self, n1, n2):
+        row = self.neighbor_bits(n1)
+        return n2 in self.__node_index and bool(row >> self.__node_index[n2] & 1)
+
+    def get_weight(self, n1, n2):
+        self.index_of(n1)
+        self.index_of(n2)
+        raise NotImplementedError("This does not represent a weighted graph.")
+
+    def get_outdegree(self, n1):
+        return _popcount(self.neighbor_bits(n1))
+
+    def get_indegree(self, n1):
+        return _popcount(self.predecessor_bits(n1))
+
+    def remove_node(self, node):
+        """
+        Clears the row and the column of the node and frees its slot. O(V / w)
+        per connection, w being the bits in a machine word.
+        """
+        slot = self.index_of(node)
+        rows = self.__rows
+        columns = self.__columns
+        row = rows[slot]
+        column = columns[slot]
+        mask = ~(1 << slot)
+        self._edge_count -= _popcount(row) + _popcount(column) - (row >> slot & 1)
+
+        for target in self.__slots_in(row):
+            columns[target] &= mask
+
+        for source in self.__slots_in(column):
+            rows[source] &= mask
+
+        rows[slot] = 0
+        columns[slot] = 0
+        self.__node_index.pop(node)
+        self.__added_nodes.remove(node)
+        self.__slot_nodes[slot] = BitsetGraph.FREE
+        self.__free_slots.append(slot)
+        self._version += 1
+
+    @staticmethod
+    def __slots_in(bits):
+        """
+        Yields the positions of the bits set in bits, lowest first.
+        """
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+class UndirectedBitsetGraph(BitsetGraph):
+    """
+    A BitsetGraph for undirected, unweighted graphs. Every edge sets the bits
+    of both of its endpoints, so rows and columns are the same and neighbors
+    are predecessors.
+    """
+
+    def __init__(self):
+        super(UndirectedBitsetGraph, self).__init__()
+        self.__edge_count = 0
+
+    @property
+    def edge_count(self):
+        return self.__edge_count
+
+    def _connect(self, slot1, slot2):
+        if super(UndirectedBitsetGraph, self)._connect(slot1, slot2):
+            super(UndirectedBitsetGraph, self)._connect(slot2, slot1)
+            self.__edge_count += 1
+            return True
+
+        return False
+
+    def remove_node(self, node):
+        degree = self.get_outdegree(node)
+        super(UndirectedBitsetGraph, self).remove_node(node)
+        self.__edge_count -= degree
+
+class GridNodes(Set):
+    """
+    The open cells of a GridGraph, as a read-only set of (row, col) tuples that
+    are only made when iterated over.
+    """
+
+    def __init__(self, grid):
+        self.__grid = grid
+
+    def __contains__(self, node):
+        return self.__grid.is_open(node)
+
+    def __len__(self):
+        return self.__grid.open_count
+
+    def __iter__(self):
+        grid = self.__grid
+
+        for row in range(grid.height):
+            for col in range(grid.width):
+                if grid.is_open((row, col)):
+                    yield row, col
+
+class GridGraph(Graph):
+    """
+    An implicit height x width lattice. The nodes are the (row, col) tuples of
+    the cells that are not obstacles, and the neighbors of a cell are worked
+    out by arithmetic whenever they are asked for. Nothing is stored per node
+    except for one byte telling whether it is an obstacle and, if the grid is
+    weighted, one float for its weight.
+
+    connectivity is 4 (up, down, left, right) or 8 (diagonals too).
+
+    obstacles, if given, is a height x width nested sequence where truthy
+    entries are cells that can't be entered.
+
+    weights, if given, is a height x width nested sequence of nonnegative cell
+    costs. Going into a cell costs its weight, times sqrt(2) if going in
+    diagonally. Without weights, every cell weighs 1.
+
+    The lattice is fixed: make_neighbor is not supported and add_node can
+    only reopen a cell. remove_node turns a cell into an obstacle.
+    """
+
+    FOUR_CONNECTED = ((-1, 0), (0, -1), (0, 1), (1, 0))
+    EIGHT_CONNECTED = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+    DIAGONAL_FACTOR = math.sqrt(2)
+
+    def __init__(self, height, width, connectivity=4, obstacles=None, weights=None):
+        if connectivity == 4:
+            self.__offsets = GridGraph.FOUR_CONNECTED
+        elif connectivity == 8:
+            self.__offsets = GridGraph.EIGHT_CONNECTED
+        else:
+            raise ValueError("connectivity must be 4 or 8, got %s" % connectivity)
+
+        self.height = height
+        self.width = width
+        self.connectivity = connectivity
+        self.__blocked = bytearray(height * width)
+        self.__weights = None
+        self.open_count = height * width
+
+        if obstacles is not None:
+            for row in range(height):
+                for col in range(width):
+                    if obstacles[row][col]:
+                        self.__blocked[row * width + col] = 1
+                        self.open_count -= 1
+
+        if weights is not None:
+            self.__weights = array("d", (weights[row][col] for row in range(height)
+              for col in range(width)))
+
+    def is_open(self, node):
+        """
+        True if node is a (row, col) inside the lattice that is not an obstacle.
+        """
+        try:
+            row, col = node
+        except (TypeError, ValueError):
+            return False
+
+        return 0 <= row < self.height and 0 <= col < self.width and \
+          not self.__blocked[row * self.width + col]
+
+    def __check(self, node):
+        if not self.is_open(node):
+            raise NotInNodesException(node)
+
+    @property
+    def added_nodes(self):
+        return GridNodes(self)
+
+    @property
+    def edge_count(self):
+        """
+        The number of pairs of adjacent open cells. Counted on every call, in
+        O(height * width).
+        """
+        return sum(self.get_outdegree(node) for node in self.added_nodes) // 2
+
+    def iter_neighbors(self, n1):
+        """
+        Yields the open cells next to n1.
+        """
+        self.__check(n1)
+        row, col = n1
+        height = self.height
+        width = self.width
+        blocked = self.__blocked
+
+        for row_offset, col_offset in self.__offsets:
+            neighbor_row = row + row_offset
+            neighbor_col = col + col_offset
+
+            if 0 <= neighbor_row < height and 0 <= neighbor_col < width and \
+              not blocked[neighbor_row * width + neighbor_col]:
+                yield neighbor_row, neighbor_col
+
+    def get_neighbors(self, n1):
+        return list(self.iter_neighbors(n1))
+
+    def _shuffled_nodes(self, rng):
+        """
+        Goes through the cells in row-major order from a random one, wrapping
+        around, rather than shuffling a list of every cell.
+        """
+        cell_count = self.height * self.width
+
+        if not cell_count:
+            return
+
+        start = rng.randrange(cell_count)
+
+        for position in range(cell_count):
+            index = (start + position) % cell_count
+
+            if not self.__blocked[index]:
+                yield divmod(index, self.width)
+
+    def get_predecessors(self, n1):
+        # Adjacency in a lattice goes both ways.
+        return self.get_neighbors(n1)
+
+    def is_reachable(self, n1, n2):
+        self.__check(n1)
+
+        if not self.is_open(n2):
+            return False
+
+        row_offset = n2[0] - n1[0]
+        col_offset = n2[1] - n1[1]
+        return (row_offset, col_offset) in self.__offsets
+
+    def get_weight(self, n1, n2):
+        if not self.is_reachable(n1, n2):
+            raise NotInNodesException(n2)
+
+        row, col = n2
+        weight = self.__weights[row * self.width + col] if self.__weights is not None else 1
+
+        if row != n1[0] and col != n1[1]:
+            return weight * GridGraph.DIAGONAL_FACTOR
+        else:
+            return weight
+
+    def get_outdegree(self, n1):
+        return sum(1 for _ in self.iter_neighbors(n1))
+
+    def get_indegree(self, n1):
+        return self.get_outdegree(n1)
+
+    def add_node(self, node):
+        """
+        Reopens an obstacle cell.
+        """
+        if self.is_open(node):
+            raise DuplicateNodeException(node)
+
+        row, col = node
+
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise NotImplementedError("a GridGraph can't grow beyond its lattice.")
+
+        self.__blocked[row * self.width + col] = 0
+        self.open_count += 1
+        self._version += 1
+
+    def remove_node(self, node):
+        """
+        Turns the cell into an obstacle.
+        """
+        self.__check(node)
+        row, col = node
+        self.__blocked[row * self.width + col] = 1
+        self.open_count -= 1
+        self._version += 1
+
+    def make_neighbor(self, n1, n2, weight=0):
+        raise NotImplementedError("the neighbors in a GridGraph are fixed by the lattice.")
+
+class GraphView(Graph):
+    """
+    Base class for read-only graphs computed on the fly from another graph.
+    Views copy no edges so they are cheap to make, and changes to the edges of
+    the underlying graph show up in the view. Anything that would change the
+    view throws a NotImplementedError; call materialize for a graph you can
+    modify.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    @property
+    def version(self):
+        return self.graph.version
+
+    def add_node(self, node):
+        raise NotImplementedError("graph views are read-only.")
+
+    def add_nodes(self, nodes):
+        raise NotImplementedError("graph views are read-only.")
+
+    def remove_node(self, node):
+        raise NotImplementedError("graph views are read-only.")
+
+    def make_neighbor(self, n1, n2, weight=0):
+        raise NotImplementedError("graph views are read-only.")
+
+    def add_edges(self, edges):
+        raise NotImplementedError("graph views are read-only.")
+
+    def materialize(self, GraphType):
+        """
+        Copies this view into a new instance of GraphType, weights included if
+        the view is weighted.
+        """
+        graph = GraphType()
+        graph.add_nodes(self.added_nodes)
+
+        for node in self.added_nodes:
+            for neighbor in self.get_neighbors(node):
+                graph.make_neighbor(node, neighbor, _weight_or_zero(self, node, neighbor))
+
+        return graph
+
+class TransposedView(GraphView):
+    """
+    The graph with every edge reversed, without building a new graph. If
+    A -> B in the underlying graph, the view has B -> A.
+
+    The neighbors of a node in the view are its predecessors in the underlying
+    graph, so this is only as fast as the underlying get_predecessors. Use an
+    AdjacencyLists with a reverse index for O(in-degree) neighbor lookups.
+    """
+
+    @property
+    def added_nodes(self):
+        return self.graph.added_nodes
+
+    @property
+    def edge_count(self):
+        return self.graph.edge_count
+
+    def get_neighbors(self, n1):
+        return self.graph.get_predecessors(n1)
+
+    def get_predecessors(self, n1):
+        return self.graph.get_neighbors(n1)
+
+    def is_reachable(self, n1, n2):
+        if n1 not in self.graph.added_nodes:
+            raise NotInNodesException(n1)
+
+        return self.graph.is_reachable(n2, n1)
+
+    def get_weight(self, n1, n2):
+        return self.graph.get_weight(n2, n1)
+
+    def get_indegree(self, n1):
+        return self.graph.get_outdegree(n1)
+
+    def get_outdegree(self, n1):
+        return self.graph.get_indegree(n1)
+
+class InducedSubgraphView(GraphView):
+    """
+    The subgraph induced by the given nodes: those nodes and all the edges of
+    the underlying graph between them. The node set is fixed when the view is
+    made.
+    """
+
+    def __init__(self, graph, nodes):
+        super(InducedSubgraphView, self).__init__(graph)
+        self.__nodes = frozenset(nodes)
+        missing = self.__nodes.difference(graph.added_nodes)
+
+        if missing:
+            raise NotInNodesException(tuple(missing))
+
+    def __check(self, node):
+        if node not in self.__nodes:
+            raise NotInNodesException(node)
+
+    @property
+    def added_nodes(self):
+        return self.__nodes
+
+    @property
+    def edge_count(self):
+        """
+        Counted on every call, in O(sum of the out-degrees of the nodes).
+        """
+        return sum(self.get_outdegree(node) for node in self.__nodes)
+
+    def get_neighbors(self, n1):
+        self.__check(n1)
+        return [node for node in self.graph.get_neighbors(n1) if node in self.__nodes]
+
+    def get_predecessors(self, n1):
+        self.__check(n1)
+        return [node for node in self.graph.get_predecessors(n1) if node in self.__nodes]
+
+    def is_reachable(self, n1, n2):
+        self.__check(n1)
+        return n2 in self.__nodes and self.graph.is_reachable(n1, n2)
+
+    def get_weight(self, n1, n2):
+        self.__check(n1)
+        self.__check(n2)
+        return self.graph.get_weight(n1, n2)
+
+    def get_indegree(self, n1):
+        return len(self.get_predecessors(n1))
+
+    def get_outdegree(self, n1):
+        return len(self.get_neighbors(n1))
+
+class QueryCache(object):
+    """
+    Memoizes the results of queries on a graph. Every result is remembered
+    against the version of the graph; as soon as the version moves, everything
+    remembered is dropped. At most maxsize results are kept (None for no
+    limit), evicting the least recently used first.
+
+    Results are handed out as they were computed, not copied, so don't modify
+    them.
+    """
+
+    def __init__(self, graph, maxsize=1024):
+        self.graph = graph
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__results = OrderedDict()
+        self.__version = graph.version
+
+    def __len__(self):
+        return len(self.__results)
+
+    def clear(self):
+        self.__results.clear()
+        self.__version = self.graph.version
+
+    def get(self, key, compute):
+        """
+        Returns the result remembered for key, or calls compute() for it if
+        there is none for the current version of the graph. key must be
+        hashable.
+        """
+        if self.__version != self.graph.version:
+            self.clear()
+
+        results = self.__results
+
+        if key in results:
+            self.hits += 1
+            results.move_to_end(key)
+            return results[key]
+
+        self.misses += 1
+        result = compute()
+        results[key] = result
+
+        if self.maxsize is not None and len(results) > self.maxsize:
+            results.popitem(last=False)
+
+        return result
+
+    def memoize(self, function, *args):
+        """
+        Returns function(graph, *args), calling it only if it has not been
+        called with these args since the graph last changed. For example,
+        cache.memoize(shortest_paths, source).
+        """
+        return self.get((function, args), lambda: function(self.graph, *args))
+
+class CachedView(GraphView):
+    """
+    The graph itself, with get_neighbors, get_predecessors and the degrees
+    memoized in a QueryCache. Worth it for graphs that are read much more often
+    than they change, especially those whose neighbor lookups are not O(1),
+    like AdjacencyMatrix or the other views. The lists returned are shared
+    between calls, so don't modify them.
+
+    cache is open for memoizing anything else about the graph, e.g.
+    view.cache.memoize(strongly_connected_components).
+    """
+
+    def __init__(self, graph, maxsize=1024):
+        super(CachedView, self).__init__(graph)
+        self.cache = QueryCache(graph, maxsize)
+
+    @property
+    def added_nodes(self):
+        return self.graph.added_nodes
+
+    @property
+    def edge_count(self):
+        return self.graph.edge_count
+
+    def get_neighbors(self, n1):
+        return self.cache.get(("get_neighbors", n1), lambda: self.graph.get_neighbors(n1))
+
+    def get_predecessors(self, n1):
+        return self.cache.get(("get_predecessors", n1), lambda: self.graph.get_predecessors(n1))
+
+    def get_outdegree(self, n1):
+        return self.cache.get(("get_outdegree", n1), lambda: self.graph.get_outdegree(n1))
+
+    def get_indegree(self, n1):
+        return self.cache.get(("get_indegree", n1), lambda: self.graph.get_indegree(n1))
+
+    def is_reachable(self, n1, n2):
+        return self.graph.is_reachable(n1, n2)
+
+    def get_weight(self, n1, n2):
+        return self.graph.get_weight(n1, n2)
+
+############## HERE BE ITERATORS ##############
+
+class GraphTraversal(object):
+    """
+    Common machinery for iterators that enumerate all the nodes in a graph,
+    island by island.
+
+    Whenever an island is exhausted, the next one starts from the first node in
+    order that has not been visited yet. If no order is given, every node in
+    the graph is a candidate, in the random order the graph's _shuffled_nodes
+    gives, using rng if given (pass a seeded random.Random for repeatable
+    runs). Only the islands
+    reachable from the nodes in order are enumerated.
+
+    By default iteration yields nodes. If with_metadata is True, it yields
+    (node, depth, parent) tuples instead, where depth counts edges from the
+    start of the island and parent is the node we came from (None at the
+    start of an island).
+
+    Avoid modifying the graph structure while iteration. This will lead to
+    undefined behaviors; it will not be guaranteed that the modifications will
+    be reflected in the graph.
+    """
+
+    def __init__(self, graph, rng=None, order=None, with_metadata=False):
+        self.graph = graph
+        self.visited = set()
+        self.current_node = None
+        self.with_metadata = with_metadata
+
+        if order is None:
+            order = graph._shuffled_nodes(rng if rng is not None else random)
+
+        # The unvisited cursor. Each node is looked at once over the whole
+        # iteration so picking islands costs O(V) in total.
+        self.__start_cursor = iter(order)
+
+    def __iter__(self):
+        return self
+
+    def _next_start(self):
+        """
+        Returns the node to start the next island from. Raises StopIteration if
+        there are no more islands.
+        """
+        for node in self.__start_cursor:
+            if node not in self.visited:
+                if node not in self.graph.added_nodes:
+                    raise NotInNodesException(node)
+
+                return node
+
+        raise StopIteration
+
+    def _visit(self, node, depth, parent):
+        self.visited.add(node)
+        self.current_node = node
+
+        if self.with_metadata:
+            return node, depth, parent
+        else:
+            return node
+
+class DFSIterator(GraphTraversal):
+    """
+    Enumerates all the nodes in the graph via depth-first search, in O(V + E).
+    This is not concerened with path finding; see GraphTraversal for how the
+    start of each island is picked.
+    """
+
+    def __init__(self, graph, rng=None, order=None, with_metadata=False):
+        super(DFSIterator, self).__init__(graph, rng, order, with_metadata)
+        # Entries are (node, depth, parent)
+        self.traversal_stack = []
+
+    def __next__(self):
+        """
+        A DFS driver method, incidentally designed to work for the iterator.
+        """
+        while self.traversal_stack:
+            node, depth, parent = self.traversal_stack.pop()
+
+            if node not in self.visited:
+                return self._dfs(node, depth, parent)
+
+        return self._dfs(self._next_start(), 0, None)
+
+    def _dfs(self, node, depth, parent):
+        """
+        Visit node and schedule its unvisited neighbors. They are pushed in
+        reverse so they are popped in the order get_neighbors gives them.
+        """
+        neighbors = self.graph.get_neighbors(node)
+
+        for neighbor in reversed(neighbors):
+            if neighbor not in self.visited:
+                self.traversal_stack.append((neighbor, depth + 1, node))
+
+        return self._visit(node, depth, parent)
+
+class DFSIslandIterator(DFSIterator):
+    """
+    Traverses the graph in a depth-first manner and allows you to specify where
+    to start. If the given graph has islands, only the nodes in the start_node's
+    island will be enumerated by this iterator.
+
+    As with DFIterator, modifications done on the graph while traversal is
+    taking place may or may not reflect in the traversal.
+    """
+
+    def __init__(self, graph, start_node, with_metadata=False):
+        if start_node not in graph.added_nodes:
+            raise NotInNodesException(start_node)
+
+        super(DFSIslandIterator, self).__init__(graph, order=(start_node,),
+          with_metadata=with_metadata)
+
+class BFSIterator(GraphTraversal):
+    """
+    Enumerates all the nodes in the graph via breadth-first search, in
+    O(V + E). See GraphTraversal for how the start of each island is picked.
+    """
+
+    def __init__(self, graph, rng=None, order=None, with_metadata=False):
+        super(BFSIterator, self).__init__(graph, rng, order, with_metadata)
+        # Entries are (node, depth, parent)
+        self.traversal_queue = deque()
+        # Nodes are marked as seen once queued, so each is queued once.
+        self.__seen = set()
+
+    def __next__(self):
+        if not self.traversal_queue:
+            start_node = self._next_start()
+            self.__seen.add(start_node)
+            self.traversal_queue.append((start_node, 0, None))
+
+        node, depth, parent = self.traversal_queue.popleft()
+
+        for neighbor in self.graph.get_neighbors(node):
+            if neighbor not in self.__seen:
+                self.__seen.add(neighbor)
+                self.traversal_queue.append((neighbor, depth + 1, node))
+
+        return self._visit(node, depth, parent)
+
+class BFSIslandIterator(BFSIterator):
+    """
+    Breadth-first search starting from start_node. Only the nodes in the
+    start_node's island will be enumerated.
+    """
+
+    def __init__(self, graph, start_node, with_metadata=False):
+        if start_node not in graph.added_nodes:
+            raise NotInNodesException(start_node)
+
+        super(BFSIslandIterator, self).__init__(graph, order=(start_node,),
+          with_metadata=with_metadata)
+
+class FrontierIterator(object):
+    """
+    Level-synchronous breadth-first search. Starting with the given sources as
+    level 0, each iteration yields the whole next level as a list: the
+    unvisited nodes reachable in one step from the previous level. Only the
+    nodes reachable from the sources are enumerated, in O(V + E).
+    """
+
+    def __init__(self, graph, sources):
+        self.graph = graph
+        self.visited = set()
+        self.frontier = []
+
+        for source in sources:
+            if source not in graph.added_nodes:
+                raise NotInNodesException(source)
+
+            if source not in self.visited:
+                self.visited.add(source)
+                self.frontier.append(source)
+
+        self.depth = -1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.frontier:
+            raise StopIteration
+
+        level = self.frontier
+        next_frontier = []
+
+        for node in level:
+            for neighbor in self.graph.get_neighbors(node):
+                if neighbor not in self.visited:
+                    self.visited.add(neighbor)
+                    next_frontier.append(neighbor)
+
+        self.frontier = next_frontier
+        self.depth += 1
+        return level
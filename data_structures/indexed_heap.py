@@ -0,0 +1,112 @@
+#! /usr/bin/env python3
+
+from .errors import DuplicateNodeException, NotInNodesException
+
+"""
+A binary min-heap that knows where each of its items is, so that the key of
+any item can be decreased in O(log n).
+"""
+
+class IndexedMinHeap(object):
+    """
+    Items must be hashable and may appear in the heap at most once. Only keys
+    are ever compared, never the items themselves.
+    """
+
+    def __init__(self):
+        self.__heap = []
+        self.__keys = {}
+        self.__positions = {}
+
+    def __len__(self):
+        return len(self.__heap)
+
+    def __contains__(self, item):
+        return item in self.__positions
+
+    def key_of(self, item):
+        if item not in self.__positions:
+            raise NotInNodesException(item)
+
+        return self.__keys[item]
+
+    def push(self, item, key):
+        if item in self.__positions:
+            raise DuplicateNodeException(item)
+
+        self.__heap.append(item)
+        self.__keys[item] = key
+        self.__positions[item] = len(self.__heap) - 1
+        self.__sift_up(len(self.__heap) - 1)
+
+    def decrease_key(self, item, key):
+        """
+        Lower the key of an item already in the heap. Keys that are not lower
+        than the current one are ignored.
+        """
+        if key < self.key_of(item):
+            self.__keys[item] = key
+            self.__sift_up(self.__positions[item])
+
+    def peek(self):
+        """
+        Returns the (item, key) pair with the smallest key without removing it.
+        """
+        item = self.__heap[0]
+        return item, self.__keys[item]
+
+    def pop(self):
+        """
+        Removes and returns the (item, key) pair with the smallest key.
+        """
+        top = self.__heap[0]
+        last = self.__heap.pop()
+
+        if self.__heap:
+            self.__heap[0] = last
+            self.__positions[last] = 0
+            self.__sift_down(0)
+
+        self.__positions.pop(top)
+        return top, self.__keys.pop(top)
+
+    def __swap(self, i, j):
+        heap = self.__heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.__positions[heap[i]] = i
+        self.__positions[heap[j]] = j
+
+    def __sift_up(self, position):
+        keys = self.__keys
+        heap = self.__heap
+
+        while position > 0:
+            parent = (position - 1) // 2
+
+            if keys[heap[position]] < keys[heap[parent]]:
+                self.__swap(position, parent)
+                position = parent
+            else:
+                break
+
+    def __sift_down(self, position):
+        keys = self.__keys
+        heap = self.__heap
+        limit = len(heap)
+
+        while True:
+            smallest = position
+            left = 2 * position + 1
+            right = left + 1
+
+            if left < limit and keys[heap[left]] < keys[heap[smallest]]:
+                smallest = left
+
+            if right < limit and keys[heap[right]] < keys[heap[smallest]]:
+                smallest = right
+
+            if smallest == position:
+                break
+
+            self.__swap(position, smallest)
+            position = smallest
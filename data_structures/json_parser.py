@@ -1,6 +1,9 @@
 import json
+import os
+import time
 
 from .binary_tree import BinaryTree
+from .errors import GraphFormatException
 from .graphs import Graph, AdjacencyLists, AdjacencyMatrix
 
 """
@@ -8,6 +11,16 @@ Load a json from (as from EPiQueue) and transform it into an instance of one of
 the data structure classes in this package.
 """
 
+def tuplify(decoded):
+    """
+    JSON has no tuples. Turn lists back into them, however deeply nested, so
+    that nodes like (row, col) come back hashable.
+    """
+    if isinstance(decoded, list):
+        return tuple(tuplify(item) for item in decoded)
+
+    return decoded
+
 class JSONLoader(object):
     """
     All modules meant to parse JSON should extend this.
@@ -15,7 +28,8 @@ class JSONLoader(object):
     A typical pattern is as follows:
      - The subclass would take a filename for its constructor. The subclass
        would then invoke the constructor of JSONLoader (it would know its
-       return_class, of course).
+       return_class, of course). The file is only parsed once the subclass
+       first uses self._parsed_json.
      - The subclass needs to implement the load method. The parsed JSON object
        can be referenced via self._parsed_json. The load method should return
        an instance of the specified return_class.
@@ -23,10 +37,19 @@ class JSONLoader(object):
     
     def __init__(self, filename, return_class):
         self._return_class = return_class
-        self._parsed_json = None
+        self._filename = filename
+        self.__parsed_json = None
+
+    @property
+    def _parsed_json(self):
+        """
+        The whole JSON document, parsed the first time it is asked for.
+        """
+        if self.__parsed_json is None:
+            with open(self._filename) as json_file:
+                self.__parsed_json = json.load(json_file)
 
-        with open(filename) as json_file:
-            self._parsed_json = json.load(json_file)
+        return self.__parsed_json
     
     @property
     def return_class(self):
@@ -90,33 +113,173 @@ class BinaryTreeParser(JSONLoader):
 
 class GraphParser(JSONLoader):
     """
-    Parse graphs encoded in JSON. Can be used for both adjacency lists and
-    adjacency matrix representation.
+    Parse graphs from files. Three formats are understood:
+
+    json - A single JSON document with a "representation" mapping every node
+      to a list of its neighbors, and an "is_matrix" flag telling whether to
+      load it as an AdjacencyMatrix or as AdjacencyLists if no graph_class is
+      given. The whole document is parsed at once.
+    ndjson - One edge per line, as a JSON array [n1, n2] or [n1, n2, weight],
+      or an object with "source", "target" and optionally "weight".
+    edgelist - One edge per line, as whitespace-separated n1 n2 and optionally
+      a weight. Blank lines and lines starting with # or % are skipped. Nodes
+      are strings unless node_type says otherwise.
+
+    If no file_format is given it is guessed from the file extension: .json,
+    .ndjson or .jsonl, and edgelist for anything else.
+
+    ndjson and edgelist files are streamed: they are read chunk_size bytes at a
+    time and each chunk's edges go into the graph, an instance of graph_class
+    (AdjacencyLists if not given), through add_nodes and add_edges before the next one is read. Memory use
+    hence stays proportional to the graph and not to the file. If given,
+    progress(edges_so_far, edges_per_second) is called after every chunk.
+    Lines that hold no edge throw a GraphFormatException.
     """
+
+    FORMATS = ("json", "ndjson", "edgelist")
+    EXTENSION_FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+    DEFAULT_CHUNK_SIZE = 1 << 20
+    COMMENT_PREFIXES = (b"#", b"%")
     
-    def __init__(self, filename):
-        super(self, JSONLoader).__init(filename, Graph)
+    def __init__(self, filename, file_format=None, graph_class=None,
+      chunk_size=DEFAULT_CHUNK_SIZE, node_type=str, progress=None):
+        super(GraphParser, self).__init__(filename, Graph)
+
+        if file_format is None:
+            extension = os.path.splitext(filename)[1].lower()
+            file_format = GraphParser.EXTENSION_FORMATS.get(extension, "edgelist")
+
+        if file_format not in GraphParser.FORMATS:
+            raise ValueError("Unknown graph file format: %s" % file_format)
 
-    def __load_adjancency_list(self):
-        graph = AdjacencyLists()
+        self.file_format = file_format
+        self.graph_class = graph_class
+        self.chunk_size = chunk_size
+        self.node_type = node_type
+        self.progress = progress
+
+    def __load_adjacency_list(self, graph):
         representation = self._parsed_json["representation"]
         graph.add_nodes(representation.keys())
+        graph.add_edges(
+            (node, neighbor) for node in representation for neighbor in representation[node]
+        )
 
-        for node in representation.keys():
-            neighbors = representation[node]
+        return graph
 
-            for n in neighbors:
-                graph.make_neighbor(node, n)
+    def __parse_ndjson(self, line, line_number):
+        try:
+            edge = json.loads(line)
+        except ValueError as error:
+            raise GraphFormatException(line_number, error)
 
-        return graph
+        if isinstance(edge, dict):
+            if "source" not in edge or "target" not in edge:
+                raise GraphFormatException(line_number, "needs a source and a target")
 
-    def __load_adjacency_matrix(self):
-        graph = AdjacencyMatrix()
-        representation = self._parsed_json["representation"]
-        graph.add_nodes(representation.keys())
+            edge = [edge["source"], edge["target"]] + ([edge["weight"]] if "weight" in edge else [])
+
+        if not isinstance(edge, list) or len(edge) not in (2, 3):
+            raise GraphFormatException(line_number, "expected [n1, n2] or [n1, n2, weight]")
+
+        # JSON has no tuples but we need hashable nodes.
+        edge = tuplify(edge)
+
+        for node in edge[0:2]:
+            try:
+                hash(node)
+            except TypeError:
+                raise GraphFormatException(line_number, "node %r can't be hashed" % (node,))
+
+        return edge
+
+    def __parse_edgelist(self, line, line_number):
+        tokens = line.split()
+
+        if not tokens or tokens[0].startswith(GraphParser.COMMENT_PREFIXES):
+            return None
+
+        if len(tokens) < 2:
+            raise GraphFormatException(line_number, "expected n1 n2 [weight]")
+
+        try:
+            n1 = self.node_type(tokens[0].decode("utf-8"))
+            n2 = self.node_type(tokens[1].decode("utf-8"))
+        except ValueError as error:
+            raise GraphFormatException(line_number, error)
+
+        if len(tokens) > 2:
+            weight = tokens[2].decode("utf-8")
+
+            try:
+                return n1, n2, int(weight)
+            except ValueError:
+                pass
+
+            try:
+                return n1, n2, float(weight)
+            except ValueError as error:
+                raise GraphFormatException(line_number, error)
+
+        return n1, n2
+
+    def __add_batch(self, graph, edges):
+        added_nodes = graph.added_nodes
+        new_nodes = []
+        new_node_set = set()
+
+        for edge in edges:
+            for node in edge[0:2]:
+                if node not in added_nodes and node not in new_node_set:
+                    new_node_set.add(node)
+                    new_nodes.append(node)
+
+        graph.add_nodes(new_nodes)
+        graph.add_edges(edges)
+
+    def __stream_edges(self, graph):
+        parse = self.__parse_ndjson if self.file_format == "ndjson" else self.__parse_edgelist
+        edge_total = 0
+        start = time.perf_counter()
+        leftover = b""
+        line_number = 0
+
+        with open(self._filename, "rb") as edge_file:
+            while True:
+                chunk = edge_file.read(self.chunk_size)
+                lines = (leftover + chunk).split(b"\n")
+                # The last line may continue in the next chunk. If there is no
+                # next chunk, it is a complete line without a newline.
+                leftover = lines.pop() if chunk else b""
+
+                edges = []
+                for line in lines:
+                    line_number += 1
+
+                    if line.strip():
+                        edge = parse(line, line_number)
+
+                        if edge is not None:
+                            edges.append(edge)
+
+                self.__add_batch(graph, edges)
+                edge_total += len(edges)
+
+                if self.progress is not None:
+                    elapsed = time.perf_counter() - start
+                    self.progress(edge_total, edge_total / elapsed if elapsed > 0 else 0.0)
+
+                if not chunk:
+                    break
+
+        return graph
 
     def load(self):
-        if self._parsed_json["is_matrix"]:
-            return self.__load_adjacency_matrix()
+        if self.file_format != "json":
+            return self.__stream_edges((self.graph_class or AdjacencyLists)())
+        elif self.graph_class is not None:
+            return self.__load_adjacency_list(self.graph_class())
+        elif self._parsed_json["is_matrix"]:
+            return self.__load_adjacency_list(AdjacencyMatrix())
         else:
-            return self.__load_adjacency_list()
+            return self.__load_adjacency_list(AdjacencyLists())
@@ -1,5 +1,6 @@
-from ..binary_tree import NaiveBinaryTree, InorderIterator, PreorderIterator
+from ..binary_tree import NaiveBinaryTree, InorderIterator, PreorderIterator, AVLTree
 
+import random
 import unittest
 
 class NaiveBinaryTreeTest(unittest.TestCase):
@@ -226,5 +227,91 @@ class StructureTest(unittest.TestCase):
 
         self.assertEqual(["D", "B", "E", "A", "C"], [node.node_data for node in iterator_order])
 
+class AVLTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(25)
+        self.tree = AVLTree()
+        self.reference = {}
+
+        for _ in range(500):
+            key = self.rng.randrange(1000)
+            self.tree[key] = -key
+            self.reference[key] = -key
+
+    def __check_balanced(self, node):
+        """
+        Returns the height of the subtree, checking every node on the way.
+        """
+        if node is None:
+            return 0
+
+        left = self.__check_balanced(node.left_son)
+        right = self.__check_balanced(node.right_son)
+        self.assertTrue(abs(left - right) <= 1)
+        self.assertEqual(1 + max(left, right), node.height)
+        return node.height
+
+    def test_insert(self):
+        self.assertEqual(len(self.reference), len(self.tree))
+        self.assertEqual(sorted(self.reference), list(self.tree))
+        self.assertEqual(sorted(self.reference.items()), list(self.tree.items()))
+        self.__check_balanced(self.tree.root)
+
+        # Sorted inserts are the worst case for a naive tree.
+        ascending = AVLTree()
+
+        for key in range(1024):
+            ascending.insert(key)
+
+        self.assertEqual(11, self.__check_balanced(ascending.root))
+
+    def test_search(self):
+        for key in range(1000):
+            self.assertEqual(key in self.reference, key in self.tree)
+            self.assertEqual(key in self.reference, self.tree.root.search(key))
+            self.assertEqual(self.reference.get(key), self.tree.get(key))
+
+        self.assertRaises(KeyError, self.tree.__getitem__, 1000)
+        self.assertFalse(1 in AVLTree())
+        self.assertEqual([], list(AVLTree()))
+
+    def test_delete(self):
+        keys = list(self.reference)
+        self.rng.shuffle(keys)
+
+        for key in keys[:300]:
+            del self.tree[key]
+            del self.reference[key]
+
+        self.assertEqual(sorted(self.reference), list(self.tree))
+        self.assertEqual(len(self.reference), len(self.tree))
+        self.__check_balanced(self.tree.root)
+        self.assertRaises(KeyError, self.tree.delete, keys[0])
+        self.assertEqual(len(self.reference), len(self.tree))
+
+        for key in keys[300:]:
+            self.tree.delete(key)
+
+        self.assertEqual(None, self.tree.root)
+        self.assertEqual(0, len(self.tree))
+
+    def test_floor_ceiling(self):
+        keys = sorted(self.reference)
+
+        for query in range(-5, 1005):
+            floors = [key for key in keys if key <= query]
+            ceilings = [key for key in keys if key >= query]
+            self.assertEqual(floors[-1] if floors else None, self.tree.floor(query))
+            self.assertEqual(ceilings[0] if ceilings else None, self.tree.ceiling(query))
+
+    def test_range(self):
+        items = sorted(self.reference.items())
+
+        for low, high in ((100, 200), (None, 50), (950, None), (None, None), (300, 299)):
+            expected = [(key, value) for key, value in items
+              if (low is None or key >= low) and (high is None or key <= high)]
+            self.assertEqual(expected, list(self.tree.range(low, high)))
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,14 @@
-from ..graphs import AdjacencyLists
-from ..graph_algorithms import is_acyclic
+from ..graphs import AdjacencyLists, AdjacencyMatrix, UndirectedAdjList, GridGraph
+from ..graph_algorithms import is_acyclic, find_cycle, topological_sort, strongly_connected_components, \
+  shortest_paths, multi_source_shortest_paths, reconstruct_path, dijkstra, \
+  astar, bidirectional_dijkstra, manhattan, octile, euclidean, all_pairs_shortest_paths, \
+  ReachabilityIndex
+from .. import graph_algorithms
+from ..errors import CyclicGraphException, NotInNodesException
 
+from unittest import mock
+
+import random
 import unittest
 
 class FunctionsTest(unittest.TestCase):
@@ -16,5 +24,430 @@ class FunctionsTest(unittest.TestCase):
 
         self.assertFalse(is_acyclic(acyclic_graph))
 
+        cycle = find_cycle(acyclic_graph)
+        self.assertEqual(4, len(cycle))
+
+        for i in range(len(cycle)):
+            self.assertTrue(acyclic_graph.is_reachable(cycle[i - 1], cycle[i]))
+
+        # Break the circle
+        acyclic_graph.remove_node("node4")
+        self.assertTrue(is_acyclic(acyclic_graph))
+        self.assertEqual(None, find_cycle(acyclic_graph))
+
+    def test_acyclic_diamond(self):
+        """
+        Reaching an already-finished node through another path is not a cycle.
+        """
+        diamond = AdjacencyLists()
+        diamond.add_nodes(("top", "left", "right", "bottom"))
+        diamond.add_edges((("top", "left"), ("top", "right"), ("left", "bottom"),
+          ("right", "bottom")))
+        self.assertTrue(is_acyclic(diamond))
+
+        diamond.make_neighbor("bottom", "bottom")
+        self.assertEqual(["bottom"], find_cycle(diamond))
+
+    def test_topological_sort(self):
+        """
+        Professor Bumstead getting dressed, from CLRS 3e Figure 22.7.
+        """
+        clothes = AdjacencyLists()
+        clothes.add_nodes(("undershorts", "pants", "belt", "shirt", "tie",
+          "jacket", "socks", "shoes", "watch"))
+        clothes.add_edges((("undershorts", "pants"), ("undershorts", "shoes"),
+          ("pants", "belt"), ("pants", "shoes"), ("belt", "jacket"),
+          ("shirt", "belt"), ("shirt", "tie"), ("tie", "jacket"), ("socks", "shoes")))
+        order = topological_sort(clothes)
+        position = dict((node, i) for i, node in enumerate(order))
+        self.assertEqual(clothes.added_nodes, set(order))
+
+        for node in clothes.added_nodes:
+            for neighbor in clothes.get_neighbors(node):
+                self.assertTrue(position[node] < position[neighbor])
+
+        clothes.make_neighbor("jacket", "shirt")
+        self.assertRaises(CyclicGraphException, topological_sort, clothes)
+
+    def test_strongly_connected_components(self):
+        """
+        The example from CLRS 3e Figure 22.9.
+        """
+        graph = AdjacencyLists()
+        graph.add_nodes("abcdefgh")
+        graph.add_edges((("a", "b"), ("b", "c"), ("b", "e"), ("b", "f"),
+          ("c", "d"), ("c", "g"), ("d", "c"), ("d", "h"), ("e", "a"), ("e", "f"),
+          ("f", "g"), ("g", "f"), ("g", "h"), ("h", "h")))
+        components = strongly_connected_components(graph)
+        self.assertEqual(set((frozenset("abe"), frozenset("cd"), frozenset("fg"), frozenset("h"))),
+          set(frozenset(component) for component in components))
+
+        # Reverse topological order: nothing reaches back into an earlier one
+        component_of = {}
+        for i, component in enumerate(components):
+            for node in component:
+                component_of[node] = i
+
+        for node in graph.added_nodes:
+            for neighbor in graph.get_neighbors(node):
+                self.assertTrue(component_of[node] >= component_of[neighbor])
+
+    def test_deep_graphs(self):
+        """
+        None of these should hit the recursion limit.
+        """
+        length = 50000
+        chain = AdjacencyLists()
+        chain.add_nodes(range(length))
+        chain.add_edges((i, i + 1) for i in range(length - 1))
+
+        self.assertTrue(is_acyclic(chain))
+        self.assertEqual(list(range(length)), topological_sort(chain))
+        self.assertEqual(length, len(strongly_connected_components(chain)))
+
+        chain.make_neighbor(length - 1, 0)
+        self.assertEqual(length, len(find_cycle(chain)))
+        self.assertEqual(1, len(strongly_connected_components(chain)))
+
+class ShortestPathsTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        The example from CLRS 3e, Figure 24.6.
+        """
+        self.clrs_edges = (("s", "t", 10), ("s", "y", 5), ("t", "x", 1),
+          ("t", "y", 2), ("y", "t", 3), ("y", "x", 9), ("y", "z", 2),
+          ("x", "z", 4), ("z", "x", 6), ("z", "s", 7))
+        self.graph = AdjacencyLists()
+        self.graph.add_nodes(("s", "t", "x", "y", "z"))
+        self.graph.add_edges(self.clrs_edges)
+
+    def test_shortest_paths(self):
+        distances, predecessors = shortest_paths(self.graph, "s")
+        self.assertEqual({"s": 0, "t": 8, "x": 9, "y": 5, "z": 7}, distances)
+        self.assertEqual(["s", "y", "t", "x"], reconstruct_path(predecessors, "x"))
+        self.assertEqual(["s"], reconstruct_path(predecessors, "s"))
+        self.assertRaises(NotInNodesException, shortest_paths, self.graph, "nowhere")
+
+    def test_unreachable(self):
+        self.graph.add_node("island")
+        distances, predecessors = shortest_paths(self.graph, "s")
+        self.assertFalse("island" in distances)
+        self.assertEqual(None, reconstruct_path(predecessors, "island"))
+
+    def test_targets(self):
+        distances, predecessors = shortest_paths(self.graph, "s", targets=("y",))
+        self.assertEqual(0, distances["s"])
+        self.assertEqual(5, distances["y"])
+        # y is settled right after s so the search should stop there
+        self.assertEqual(set(("s", "y")), set(distances))
+
+    def test_multi_source(self):
+        distances, predecessors = multi_source_shortest_paths(self.graph, ("s", "x"))
+        self.assertEqual({"s": 0, "t": 8, "x": 0, "y": 5, "z": 4}, distances)
+        self.assertEqual(["x", "z"], reconstruct_path(predecessors, "z"))
+
+    def test_undirected(self):
+        for graph in (UndirectedAdjList(), AdjacencyMatrix()):
+            graph.add_nodes(("a", "b", "c", "d"))
+            graph.make_neighbor("a", "b", 1)
+            graph.make_neighbor("b", "c", 1)
+            graph.make_neighbor("a", "c", 5)
+            graph.make_neighbor("c", "d", 1)
+
+            distances, predecessors = shortest_paths(graph, "d")
+            self.assertEqual({"a": 3, "b": 2, "c": 1, "d": 0}, distances)
+            self.assertEqual(["d", "c", "b", "a"], reconstruct_path(predecessors, "a"))
+
+    def test_grid(self):
+        maze = [[0, 0, 0, 0],
+                [1, 1, 1, 0],
+                [0, 0, 0, 0],
+                [0, 1, 1, 1],
+                [0, 0, 0, 0]]
+        self.assertEqual(14, dijkstra(maze))
+        self.assertEqual(float("inf"), dijkstra([[0, 1], [1, 0]]))
+        self.assertEqual(float("inf"), dijkstra([[1, 0], [0, 0]]))
+
+        grid = GridGraph(5, 4, obstacles=maze)
+        distances, predecessors = shortest_paths(grid, (0, 0))
+        self.assertEqual(13, distances[(4, 3)])
+        path = reconstruct_path(predecessors, (4, 3))
+        self.assertEqual(14, len(path))
+
+        for i in range(1, len(path)):
+            self.assertTrue(grid.is_reachable(path[i - 1], path[i]))
+
+    def test_weight_fn(self):
+        distances, _ = shortest_paths(self.graph, "s", weight_fn=lambda n1, n2: 1)
+        self.assertEqual({"s": 0, "t": 1, "x": 2, "y": 1, "z": 2}, distances)
+
+class PointToPointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maze = GridGraph(5, 4, obstacles=[[0, 0, 0, 0],
+                                               [1, 1, 1, 0],
+                                               [0, 0, 0, 0],
+                                               [0, 1, 1, 1],
+                                               [0, 0, 0, 0]])
+
+    def __check_path(self, graph, result, source, target):
+        self.assertEqual(source, result.path[0])
+        self.assertEqual(target, result.path[-1])
+        cost = 0
+
+        for i in range(1, len(result.path)):
+            self.assertTrue(graph.is_reachable(result.path[i - 1], result.path[i]))
+            cost += graph.get_weight(result.path[i - 1], result.path[i])
+
+        self.assertAlmostEqual(result.distance, cost)
+
+    def test_astar_maze(self):
+        for heuristic in (None, manhattan, euclidean):
+            result = astar(self.maze, (0, 0), (4, 3), heuristic)
+            self.assertEqual(13, result.distance)
+            self.__check_path(self.maze, result, (0, 0), (4, 3))
+
+        self.maze.remove_node((4, 2))
+        result = astar(self.maze, (0, 0), (4, 3), manhattan)
+        self.assertEqual(None, result.path)
+        self.assertEqual(float("inf"), result.distance)
+        self.assertRaises(NotInNodesException, astar, self.maze, (0, 0), (4, 2))
+
+    def test_astar_expansions(self):
+        open_grid = GridGraph(30, 30)
+        blind = astar(open_grid, (0, 0), (0, 29))
+        informed = astar(open_grid, (0, 0), (0, 29), manhattan)
+        self.assertEqual(29, blind.distance)
+        self.assertEqual(29, informed.distance)
+        # Ties on f go to the cell closest to the goal, so only the path gets
+        # expanded.
+        self.assertEqual(30, informed.expanded)
+        self.assertTrue(blind.expanded > 400)
+
+        adjacent = astar(open_grid, (15, 15), (15, 16), manhattan)
+        self.assertEqual(2, adjacent.expanded)
+
+    def test_astar_octile(self):
+        rng = random.Random(14)
+        weights = [[rng.randint(1, 9) for _ in range(12)] for _ in range(12)]
+        grid = GridGraph(12, 12, connectivity=8, weights=weights)
+
+        for target in ((11, 11), (0, 11), (7, 3)):
+            distances, _ = shortest_paths(grid, (0, 0), targets=(target,))
+            result = astar(grid, (0, 0), target, octile)
+            self.assertAlmostEqual(distances[target], result.distance)
+            self.__check_path(grid, result, (0, 0), target)
+
+    def test_bidirectional(self):
+        rng = random.Random(2)
+        graph = AdjacencyLists(reverse_index=True)
+        graph.add_nodes(range(60))
+
+        for _ in range(240):
+            graph.make_neighbor(rng.randrange(60), rng.randrange(60), rng.randint(1, 20))
+
+        distances, _ = shortest_paths(graph, 0)
+
+        for target in range(60):
+            result = bidirectional_dijkstra(graph, 0, target)
+
+            if target in distances:
+                self.assertEqual(distances[target], result.distance)
+                self.__check_path(graph, result, 0, target)
+            else:
+                self.assertEqual(None, result.path)
+                self.assertEqual(float("inf"), result.distance)
+
+    def test_bidirectional_grid(self):
+        result = bidirectional_dijkstra(self.maze, (0, 0), (4, 3))
+        self.assertEqual(13, result.distance)
+        self.__check_path(self.maze, result, (0, 0), (4, 3))
+
+        open_grid = GridGraph(41, 41)
+        one_way = shortest_paths(open_grid, (20, 0), targets=((20, 40),))[0]
+        both_ways = bidirectional_dijkstra(open_grid, (20, 0), (20, 40))
+        self.assertEqual(40, both_ways.distance)
+        self.assertTrue(both_ways.expanded < len(one_way))
+
+        self.assertEqual([(0, 0)], bidirectional_dijkstra(self.maze, (0, 0), (0, 0)).path)
+
+    def test_bidirectional_ties(self):
+        # Both ways round are as short; the backward search sees b first but
+        # the forward search reached a before anything else.
+        graph = AdjacencyLists(reverse_index=True)
+        graph.add_nodes(["s", "a", "b", "t"])
+
+        for n1, n2 in (("s", "a"), ("s", "b"), ("b", "t"), ("a", "t")):
+            graph.make_neighbor(n1, n2, 1)
+
+        self.assertEqual(["b", "a"], list(graph.get_predecessors("t")))
+        result = bidirectional_dijkstra(graph, "s", "t")
+        self.assertEqual(["s", "a", "t"], result.path)
+        self.assertEqual(2, result.distance)
+
+class AllPairsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(15)
+        self.matrix = AdjacencyMatrix()
+        self.matrix.add_nodes(range(23))
+
+        for _ in range(50):
+            self.matrix.make_neighbor(rng.randrange(23), rng.randrange(23), rng.randint(0, 9))
+
+        # Leave a tombstone and an island behind.
+        self.matrix.remove_node(5)
+        self.matrix.add_node("island")
+
+        self.directed = AdjacencyLists()
+        self.directed.add_nodes("abcde")
+        self.directed.add_edges((("a", "b", 4), ("b", "c", 1), ("a", "c", 7), ("c", "d", 2), ("d", "a", 1)))
+
+    def __check(self, graph, **kwargs):
+        result = all_pairs_shortest_paths(graph, **kwargs)
+        self.assertEqual(set(graph.added_nodes), set(result.nodes))
+
+        for source in graph.added_nodes:
+            distances, _ = shortest_paths(graph, source)
+
+            for target in graph.added_nodes:
+                expected = distances.get(target, float("inf"))
+                self.assertEqual(expected, result.distance(source, target))
+
+                if not kwargs.get("next_hops"):
+                    continue
+
+                path = result.path(source, target)
+
+                if expected == float("inf"):
+                    self.assertEqual(None, path)
+                    continue
+
+                self.assertEqual([source, target], [path[0], path[-1]])
+                cost = 0
+
+                for i in range(1, len(path)):
+                    cost += graph.get_weight(path[i - 1], path[i])
+
+                self.assertEqual(expected, cost)
+
+    def __check_all(self):
+        for graph in (self.matrix, self.directed):
+            for block_size in (None, 1, 4, 100):
+                self.__check(graph, block_size=block_size)
+                self.__check(graph, block_size=block_size, next_hops=True)
+
+    def test_pure_python(self):
+        with mock.patch.object(graph_algorithms, "numpy", None):
+            self.__check_all()
+            self.assertTrue(isinstance(all_pairs_shortest_paths(self.directed).matrix, list))
+
+    @unittest.skipIf(graph_algorithms.numpy is None, "needs NumPy")
+    def test_numpy(self):
+        self.__check_all()
+
+    def test_misuse(self):
+        result = all_pairs_shortest_paths(self.directed)
+        self.assertRaises(ValueError, result.path, "a", "b")
+        self.assertRaises(NotInNodesException, result.distance, "a", "z")
+        self.assertRaises(ValueError, all_pairs_shortest_paths, self.directed, block_size=0)
+
+    def test_export_matrix(self):
+        graph = AdjacencyMatrix()
+        graph.add_nodes(("a", "b", "c"))
+        graph.make_neighbor("a", "c", 2)
+        graph.remove_node("b")
+        nodes, cells = graph.export_matrix()
+        self.assertEqual(["a", "c"], nodes)
+        self.assertEqual([0, 2, 2, 0], list(cells))
+
+class ReachabilityIndexTest(unittest.TestCase):
+
+    def __reachable_from(self, graph, source):
+        seen = set((source,))
+        work = [source]
+
+        while work:
+            for neighbor in graph.get_neighbors(work.pop()):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    work.append(neighbor)
+
+        return seen
+
+    def __check(self, graph, index):
+        for source in graph.added_nodes:
+            reachable = self.__reachable_from(graph, source)
+
+            for target in graph.added_nodes:
+                self.assertEqual(target in reachable, index.has_path(source, target))
+
+    def test_bitsets(self):
+        rng = random.Random(16)
+        graph = AdjacencyLists()
+        graph.add_nodes(range(40))
+
+        for _ in range(70):
+            graph.make_neighbor(rng.randrange(40), rng.randrange(40))
+
+        index = ReachabilityIndex(graph)
+        self.assertEqual(ReachabilityIndex.BITSET, index.labelling)
+        self.__check(graph, index)
+
+        for component in strongly_connected_components(graph):
+            self.assertTrue(index.same_component(component[0], component[-1]))
+
+    def test_intervals(self):
+        tree = AdjacencyLists()
+        tree.add_nodes(range(15))
+        tree.add_edges((i, 2 * i + 1) for i in range(7))
+        tree.add_edges((i, 2 * i + 2) for i in range(7))
+        # A cycle collapses into a single component and keeps it a tree.
+        tree.make_neighbor(14, 6)
+
+        index = ReachabilityIndex(tree)
+        self.assertEqual(ReachabilityIndex.INTERVAL, index.labelling)
+        self.__check(tree, index)
+
+        undirected = UndirectedAdjList()
+        undirected.add_nodes("abcd")
+        undirected.add_edges((("a", "b"), ("c", "d")))
+        index = ReachabilityIndex(undirected)
+        self.assertEqual(ReachabilityIndex.INTERVAL, index.labelling)
+        self.__check(undirected, index)
+
+    def test_mutation(self):
+        graph = AdjacencyLists()
+        graph.add_nodes("abc")
+        graph.make_neighbor("a", "b")
+        index = ReachabilityIndex(graph)
+        self.assertFalse(index.has_path("a", "c"))
+
+        graph.make_neighbor("b", "c")
+        self.assertTrue(index.has_path("a", "c"))
+
+        graph.add_node("d")
+        graph.make_neighbor("d", "b")
+        self.__check(graph, index)
+        self.assertEqual(ReachabilityIndex.BITSET, index.labelling)
+
+        graph.remove_node("b")
+        self.assertFalse(index.has_path("a", "c"))
+        self.assertRaises(NotInNodesException, index.has_path, "a", "b")
+
+    def test_version(self):
+        for graph in (AdjacencyLists(), AdjacencyMatrix(), UndirectedAdjList()):
+            versions = [graph.version]
+            graph.add_nodes((1, 2))
+            versions.append(graph.version)
+            graph.make_neighbor(1, 2)
+            versions.append(graph.version)
+            graph.make_neighbor(1, 2)
+            self.assertEqual(versions[-1], graph.version)
+            graph.remove_node(2)
+            versions.append(graph.version)
+            self.assertEqual(sorted(set(versions)), versions)
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,114 @@
+from ..graphs import AdjacencyLists, AdjacencyMatrix, CSRGraph, UndirectedAdjList, BitsetGraph
+from ..graph_hashing import structural_hash, find_isomorphism, is_isomorphic, GraphKey
+
+import random
+import unittest
+
+class GraphHashingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(23)
+
+    def __random_graph(self, GraphType, node_count, edge_count, weighted=False):
+        graph = GraphType()
+        graph.add_nodes(range(node_count))
+
+        for _ in range(edge_count):
+            weight = self.rng.randint(1, 3) if weighted else 0
+            graph.make_neighbor(self.rng.randrange(node_count), self.rng.randrange(node_count), weight)
+
+        return graph
+
+    def __relabel(self, graph, GraphType):
+        """
+        The same graph with shuffled, renamed nodes, built in another order.
+        """
+        nodes = list(graph.added_nodes)
+        names = ["n%d" % i for i in range(len(nodes))]
+        self.rng.shuffle(names)
+        renamed = dict(zip(nodes, names))
+        copy = GraphType()
+        copy.add_nodes(sorted(names))
+        edges = [(renamed[n1], renamed[n2], graph.get_weight(n1, n2))
+          for n1 in nodes for n2 in graph.get_neighbors(n1)]
+        self.rng.shuffle(edges)
+        copy.add_edges(edges)
+        return copy
+
+    def __check_mapping(self, g1, g2, mapping):
+        self.assertEqual(set(g2.added_nodes), set(mapping.values()))
+
+        for n1 in g1.added_nodes:
+            self.assertEqual(set(mapping[n] for n in g1.get_neighbors(n1)),
+              set(g2.get_neighbors(mapping[n1])))
+
+    def test_relabeled(self):
+        for GraphType, weighted in ((AdjacencyLists, True), (UndirectedAdjList, False)):
+            for _ in range(10):
+                graph = self.__random_graph(GraphType, 30, 60, weighted)
+                copy = self.__relabel(graph, GraphType)
+                self.assertEqual(structural_hash(graph), structural_hash(copy))
+                self.__check_mapping(graph, copy, find_isomorphism(graph, copy))
+
+    def test_not_isomorphic(self):
+        graph = self.__random_graph(AdjacencyLists, 20, 40, weighted=True)
+        n1 = next(node for node in graph.added_nodes if graph.get_neighbors(node))
+        n2 = graph.get_neighbors(n1)[0]
+        heavier = AdjacencyLists()
+        heavier.add_nodes(graph.added_nodes)
+
+        for node in graph.added_nodes:
+            for neighbor in graph.get_neighbors(node):
+                weight = graph.get_weight(node, neighbor)
+                heavier.make_neighbor(node, neighbor, weight + 10 if (node, neighbor) == (n1, n2) else weight)
+
+        self.assertFalse(is_isomorphic(graph, self.__relabel(heavier, AdjacencyLists)))
+        self.assertFalse(is_isomorphic(graph, AdjacencyLists()))
+
+        graph.make_neighbor(n2, n1, 1)
+        self.assertFalse(is_isomorphic(graph, self.__relabel(heavier, AdjacencyLists)))
+
+    def test_refinement_blind_spot(self):
+        """
+        A hexagon and two triangles: every node has two neighbors, so color
+        refinement can't tell them apart, but they are different.
+        """
+        hexagon = UndirectedAdjList()
+        hexagon.add_nodes(range(6))
+        hexagon.add_edges((i, (i + 1) % 6) for i in range(6))
+        triangles = UndirectedAdjList()
+        triangles.add_nodes(range(6))
+        triangles.add_edges(((0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)))
+
+        self.assertEqual(structural_hash(hexagon), structural_hash(triangles))
+        self.assertFalse(is_isomorphic(hexagon, triangles))
+        self.assertTrue(is_isomorphic(hexagon, self.__relabel(hexagon, UndirectedAdjList)))
+        self.assertEqual(2, len(set((GraphKey(hexagon), GraphKey(triangles)))))
+
+    def test_dedup(self):
+        shapes = [self.__random_graph(AdjacencyLists, 12, 20) for _ in range(5)]
+        graphs = []
+
+        for shape in shapes:
+            graphs.append(shape)
+            graphs.append(self.__relabel(shape, AdjacencyLists))
+            graphs.append(self.__relabel(shape, CSRGraph))
+
+        unique = {}
+
+        for graph in graphs:
+            unique.setdefault(GraphKey(graph), graph)
+
+        self.assertEqual(5, len(unique))
+        self.assertEqual(GraphKey(AdjacencyLists()), GraphKey(CSRGraph()))
+        self.assertRaises(TypeError, GraphKey, "not a graph")
+
+    def test_unweighted(self):
+        graph = self.__random_graph(BitsetGraph, 15, 30)
+        copy = BitsetGraph()
+        copy.add_nodes(range(15))
+        copy.add_edges((14 - n1, 14 - n2) for n1 in range(15) for n2 in graph.get_neighbors(n1))
+        self.__check_mapping(graph, copy, find_isomorphism(graph, copy))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+from ..graphs import AdjacencyLists, CSRGraph, UndirectedAdjList
+from ..graph_snapshot import load_snapshot, write_snapshot
+from ..errors import NotInNodesException, SnapshotFormatException
+
+import os
+import shutil
+import tempfile
+import unittest
+
+class GraphSnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "graph.snapshot")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def __assert_same_graph(self, expected, actual):
+        """
+        Compares edges one by one rather than edge_count since snapshots are
+        directed; an undirected edge comes back as two.
+        """
+        self.assertEqual(expected.added_nodes, actual.added_nodes)
+
+        for node in expected.added_nodes:
+            self.assertEqual(set(expected.get_neighbors(node)), set(actual.get_neighbors(node)))
+
+            for neighbor in expected.get_neighbors(node):
+                self.assertEqual(expected.get_weight(node, neighbor),
+                  actual.get_weight(node, neighbor))
+
+    def test_int_nodes(self):
+        graph = CSRGraph.from_edges(((i, (i * 7) % 50, i / 4.0) for i in range(50)),
+          nodes=range(-5, 0))
+        write_snapshot(graph, self.filename)
+        loaded = load_snapshot(self.filename)
+        self.__assert_same_graph(graph, loaded)
+        self.assertTrue(isinstance(loaded.neighbor_indices(3), memoryview))
+
+    def test_json_nodes(self):
+        graph = UndirectedAdjList()
+        graph.add_nodes(("a", (0, 1), 2.5, "été", None))
+        graph.add_edges(((("a", (0, 1), 3), ((0, 1), 2.5, 1), ("été", "a", 2))))
+        write_snapshot(graph, self.filename)
+        loaded = load_snapshot(self.filename)
+        self.__assert_same_graph(graph, loaded)
+        self.assertEqual(6, loaded.edge_count)
+        self.assertEqual([], loaded.get_neighbors(None))
+
+    def test_loaded_graph_can_change(self):
+        graph = AdjacencyLists()
+        graph.add_nodes(range(4))
+        graph.add_edges(((0, 1), (1, 2), (2, 3)))
+        write_snapshot(graph, self.filename)
+
+        loaded = load_snapshot(self.filename)
+        loaded.add_node(4)
+        loaded.make_neighbor(3, 4, 1)
+        loaded.remove_node(0)
+        self.assertEqual(set((1, 2, 3, 4)), loaded.added_nodes)
+        self.assertEqual([4], loaded.get_neighbors(3))
+        self.assertRaises(NotInNodesException, loaded.get_neighbors, 0)
+
+        # The file is left alone
+        self.__assert_same_graph(graph, load_snapshot(self.filename))
+
+    def test_close(self):
+        graph = CSRGraph.from_edges(((1, 2), ("a", 3)))
+        write_snapshot(graph, self.filename)
+
+        with load_snapshot(self.filename) as loaded:
+            self.__assert_same_graph(graph, loaded)
+
+        self.assertRaises(ValueError, loaded.get_neighbors, 1)
+        loaded.close()
+
+        loaded = load_snapshot(self.filename)
+        neighbors = loaded.neighbor_indices(1)
+        self.assertRaises(BufferError, loaded.close)
+        neighbors.release()
+        loaded.close()
+
+    def test_empty_graph(self):
+        write_snapshot(CSRGraph(), self.filename)
+        loaded = load_snapshot(self.filename)
+        self.assertEqual(set(), loaded.added_nodes)
+        self.assertEqual(0, loaded.edge_count)
+
+    def test_bad_files(self):
+        with open(self.filename, "wb") as bad_file:
+            bad_file.write(b"NOTAGRAPH" * 10)
+
+        self.assertRaises(SnapshotFormatException, load_snapshot, self.filename)
+
+        open(self.filename, "wb").close()
+        self.assertRaises(SnapshotFormatException, load_snapshot, self.filename)
+
+        graph = CSRGraph.from_edges(((1, 2), (2, 3)))
+        write_snapshot(graph, self.filename)
+
+        with open(self.filename, "rb") as snapshot:
+            contents = snapshot.read()
+
+        with open(self.filename, "wb") as snapshot:
+            snapshot.write(contents[:-8])
+
+        self.assertRaises(SnapshotFormatException, load_snapshot, self.filename)
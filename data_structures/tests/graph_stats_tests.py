@@ -0,0 +1,74 @@
+from ..graph_stats import erdos_renyi, power_law, grid, complete, run, compare, fastest_backends
+
+import random
+import unittest
+
+class GeneratorTests(unittest.TestCase):
+
+    def test_erdos_renyi(self):
+        node_count, edges = erdos_renyi(100, random.Random(24))
+        self.assertEqual(100, node_count)
+        self.assertEqual(400, len(set(edges)))
+
+        for n1, n2 in edges:
+            self.assertNotEqual(n1, n2)
+            self.assertFalse((n2, n1) in edges)
+            self.assertTrue(0 <= n1 < 100 and 0 <= n2 < 100)
+
+        # Capped at every pair
+        self.assertEqual(10, len(erdos_renyi(5, random.Random(24))[1]))
+        # Isolated nodes still count
+        self.assertEqual((7, []), erdos_renyi(7, random.Random(24), average_degree=0))
+
+    def test_power_law(self):
+        node_count, edges = power_law(50, random.Random(24), attachments=3)
+        self.assertEqual(50, node_count)
+        self.assertEqual(47 * 3, len(set(edges)))
+
+        for n1, n2 in edges:
+            self.assertTrue(n2 < n1)
+
+    def test_grid(self):
+        node_count, edges = grid(30)
+        self.assertEqual(25, node_count)
+        self.assertEqual(2 * 5 * 4, len(edges))
+        self.assertEqual((1, []), grid(1))
+
+    def test_complete(self):
+        self.assertEqual((4, [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]), complete(4))
+
+class ReportTests(unittest.TestCase):
+
+    def __row(self, backend, operation, seconds, size=10):
+        return {"family": "grid", "size": size, "edges": 0, "backend": backend,
+          "operation": operation, "seconds": seconds, "per_operation": seconds}
+
+    def test_run(self):
+        results = run(["erdos_renyi", "complete"], [12], ["AdjacencyLists", "AdjacencyMatrix"],
+          1, 0, max_complete=5)
+        self.assertEqual(set([("erdos_renyi", 12)]),
+          set((row["family"], row["size"]) for row in results))
+        self.assertEqual(set(["AdjacencyLists", "AdjacencyMatrix"]),
+          set(row["backend"] for row in results))
+
+    def test_compare(self):
+        previous = [self.__row("A", "dfs", 1.0), self.__row("A", "add_node", 1.0),
+          self.__row("B", "dfs", 0.0), self.__row("A", "dfs", 1.0, size=20)]
+        current = [self.__row("A", "dfs", 3.0), self.__row("A", "add_node", 1.1),
+          self.__row("B", "dfs", 5.0), self.__row("C", "dfs", 9.0),
+          self.__row("A", "dfs", 0.5, size=20)]
+        changes = compare(previous, current, 1.25)
+
+        self.assertEqual([("grid", 10, "A", "dfs"), ("grid", 20, "A", "dfs")],
+          [change[0] for change in changes])
+        self.assertEqual(3.0, changes[0][3])
+        self.assertEqual(0.5, changes[1][3])
+
+    def test_fastest_backends(self):
+        results = [self.__row("A", "dfs", 1.0), self.__row("B", "dfs", 0.5),
+          self.__row("A", "dfs", 0.1, size=20), self.__row("B", "dfs", 0.2, size=20)]
+        self.assertEqual({("grid", 10, "dfs"): "B", ("grid", 20, "dfs"): "A"},
+          fastest_backends(results))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
-from ..graphs import AdjacencyLists, AdjacencyMatrix, UndirectedAdjList, DFSIterator, DFSIslandIterator
+from ..graphs import AdjacencyLists, AdjacencyMatrix, UndirectedAdjList, CSRGraph, DFSIterator, \
+  DFSIslandIterator, BFSIterator, BFSIslandIterator, FrontierIterator, TransposedView, \
+  InducedSubgraphView, GridGraph, CachedView, QueryCache, BitsetGraph, UndirectedBitsetGraph
 from ..errors import DuplicateNodeException, NotInNodesException
 
+from fractions import Fraction
+
+import math
 import random
 import unittest
 
@@ -52,6 +57,58 @@ class AdjacencyListTest(unittest.TestCase):
         self.test_graph.make_neighbor("node3", "node4")
         self.test_graph.make_neighbor("node4", "node3")
 
+    def test_version(self):
+        """
+        Every mutation moves the version up, and nothing else does.
+        """
+        version = self.test_graph.version
+        self.test_graph.add_node("node5")
+        self.assertTrue(self.test_graph.version > version)
+
+        version = self.test_graph.version
+        self.test_graph.make_neighbor("node1", "node5")
+        self.assertTrue(self.test_graph.version > version)
+
+        version = self.test_graph.version
+        self.test_graph.make_neighbor("node1", "node5")
+        self.test_graph.get_neighbors("node1")
+        self.test_graph.get_indegree("node5")
+        self.assertEqual(version, self.test_graph.version)
+
+        self.test_graph.remove_node("node5")
+        self.assertTrue(self.test_graph.version > version)
+
+    def test_cache_invalidation(self):
+        """
+        A QueryCache over the graph forgets its answers once the graph changes.
+        """
+        cache = QueryCache(self.test_graph)
+        neighbors = lambda: set(self.test_graph.get_neighbors("node1"))
+        self.assertEqual(set(), cache.get("node1", neighbors))
+        self.test_graph.make_neighbor("node1", "node2")
+        self.assertEqual(set(["node2"]), cache.get("node1", neighbors))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+    def test_eq(self):
+        self._construct_test_graph()
+        copy = self._get_graph_instance()
+        copy.add_nodes(self.test_graph.added_nodes)
+
+        for node in self.test_graph.added_nodes:
+            for neighbor in self.test_graph.get_neighbors(node):
+                copy.make_neighbor(node, neighbor)
+
+        self.assertEqual(self.test_graph, copy)
+        self.assertNotEqual(self.test_graph, "node1")
+
+        copy.add_node("node5")
+        self.assertNotEqual(self.test_graph, copy)
+        copy.remove_node("node5")
+        self.assertEqual(self.test_graph, copy)
+
+        copy.make_neighbor("node2", "node3")
+        self.assertNotEqual(self.test_graph, copy)
+
     def test_add_node(self):
         """
         Test cases:
@@ -102,6 +159,36 @@ class AdjacencyListTest(unittest.TestCase):
         self.assertFalse(self.test_graph.is_reachable("node2", "node1"))
         self.assertRaises(NotInNodesException, self.test_graph.make_neighbor, self.test_node, "node1")
 
+    def test_remove_node_incoming(self):
+        """
+        Removing a node should also remove the connections going into it.
+        """
+        self._construct_test_graph()
+        self.test_graph.remove_node("node2")
+        self.assertEqual(set(["node3", "node4"]), set(self.test_graph.get_neighbors("node1")))
+        self.assertEqual(set(["node1", "node3"]), set(self.test_graph.get_neighbors("node4")))
+        self.assertRaises(NotInNodesException, self.test_graph.remove_node, "node2")
+
+    def test_add_edges(self):
+        self.test_graph.add_edges((("node1", "node2", 5), ("node3", "node4"), ("node1", "node3", 2)))
+        self.assertTrue(self.test_graph.is_reachable("node1", "node2"))
+        self.assertTrue(self.test_graph.is_reachable("node3", "node4"))
+        self.assertEqual(5, self.test_graph.get_weight("node1", "node2"))
+        self.assertEqual(2, self.test_graph.get_weight("node1", "node3"))
+        self.assertEqual(0, self.test_graph.get_weight("node3", "node4"))
+
+        # Nothing gets connected if an endpoint is missing
+        self.assertRaises(NotInNodesException, self.test_graph.add_edges,
+          (("node2", "node3"), ("node4", "does not exist")))
+        self.assertFalse(self.test_graph.is_reachable("node2", "node3"))
+
+    def test_get_predecessors(self):
+        self._construct_test_graph()
+        self.assertEqual(set(["node2", "node3", "node4"]),
+          set(self.test_graph.get_predecessors("node1")))
+        self.assertEqual(set(["node1", "node4"]), set(self.test_graph.get_predecessors("node3")))
+        self.assertRaises(NotInNodesException, self.test_graph.get_predecessors, "does not exist")
+
     def test_get_weight(self):
         """
         Almost the same as _construct_test_graph except that it generates random
@@ -206,6 +293,194 @@ class AdjacencyListTest(unittest.TestCase):
         n1_neighbors = self.test_graph.get_neighbors("node1")
         self.assertEqual(self.test_graph.get_outdegree("node1"), len(n1_neighbors))
 
+class ReverseIndexedAdjacencyListTest(AdjacencyListTest):
+
+    def _get_graph_instance(self):
+        return AdjacencyLists(reverse_index=True)
+
+    def test_directed_predecessors(self):
+        self.test_graph.make_neighbor("node1", "node2")
+        self.test_graph.make_neighbor("node3", "node2")
+        self.test_graph.make_neighbor("node2", "node4")
+        self.assertEqual(["node1", "node3"], self.test_graph.get_predecessors("node2"))
+        self.assertEqual([], self.test_graph.get_predecessors("node1"))
+        self.assertEqual(2, self.test_graph.get_indegree("node2"))
+        self.assertEqual(0, self.test_graph.get_indegree("node1"))
+
+    def test_remove_node_edge_count(self):
+        self._construct_test_graph()
+        self.test_graph.remove_node("node1")
+        self.assertEqual(4, self.test_graph.edge_count)
+        self.assertEqual(["node4"], self.test_graph.get_predecessors("node2"))
+        self.assertEqual(1, self.test_graph.get_indegree("node3"))
+
+class CSRGraphTest(AdjacencyListTest):
+
+    def _get_graph_instance(self):
+        return CSRGraph()
+
+    def test_from_edges(self):
+        graph = CSRGraph.from_edges(
+          (("a", "b", 3), ("a", "c"), ("b", "c", 1), ("a", "b", 7)), nodes=("d",)
+        )
+        self.assertEqual(set(("a", "b", "c", "d")), graph.added_nodes)
+        self.assertEqual(3, graph.edge_count)
+        self.assertEqual(["b", "c"], graph.get_neighbors("a"))
+        self.assertEqual(3, graph.get_weight("a", "b"))
+        self.assertEqual(0, graph.get_weight("a", "c"))
+        self.assertEqual([], graph.get_neighbors("d"))
+        self.assertEqual(2, graph.get_indegree("c"))
+
+    def test_neighbor_indices(self):
+        self._construct_test_graph()
+        indices = self.test_graph.neighbor_indices("node1")
+        self.assertTrue(isinstance(indices, memoryview))
+        self.assertEqual(set(["node2", "node3", "node4"]),
+          set(self.test_graph.node_at(i) for i in indices))
+        self.assertEqual(len(indices), len(self.test_graph.neighbor_weights("node1")))
+
+    def test_mixed_build(self):
+        """
+        Nodes and edges added after the arrays have been built should show up.
+        """
+        self._construct_test_graph()
+        self.test_graph.get_neighbors("node1")
+        self.test_graph.add_node("node5")
+        self.test_graph.make_neighbor("node5", "node1", 4)
+        self.test_graph.make_neighbor("node1", "node5")
+        self.assertTrue(self.test_graph.is_reachable("node5", "node1"))
+        self.assertEqual(4, self.test_graph.get_weight("node5", "node1"))
+        self.assertEqual(set(["node2", "node3", "node4", "node5"]),
+          set(self.test_graph.get_neighbors("node1")))
+        self.assertEqual(12, self.test_graph.edge_count)
+
+    def test_remove_node_connections(self):
+        self._construct_test_graph()
+        self.test_graph.remove_node("node2")
+        self.assertEqual(set(["node3", "node4"]), set(self.test_graph.get_neighbors("node1")))
+        self.assertEqual(set(["node1", "node3"]), set(self.test_graph.get_neighbors("node4")))
+        self.assertEqual(6, self.test_graph.edge_count)
+        self.assertRaises(NotInNodesException, self.test_graph.get_neighbors, "node2")
+
+    def test_weight_types(self):
+        """
+        Weights come back exactly as they went in, whatever their type, through
+        from_edges, make_neighbor and remove_node alike.
+        """
+        graph = CSRGraph.from_edges((("a", "b", 3), ("b", "c", 2 ** 60 + 1)))
+        self.assertTrue(type(graph.get_weight("a", "b")) is int)
+        self.assertEqual(2 ** 60 + 1, graph.get_weight("b", "c"))
+
+        graph.add_nodes(("d", "e"))
+        graph.make_neighbor("c", "d", Fraction(1, 3))
+        graph.make_neighbor("d", "e", "heavy")
+        self.assertEqual([], graph.get_neighbors("e"))
+        self.assertEqual(1, graph.get_outdegree("b"))
+        graph.remove_node("a")
+
+        for n1, n2, weight in (("b", "c", 2 ** 60 + 1), ("c", "d", Fraction(1, 3)),
+          ("d", "e", "heavy")):
+            self.assertEqual(weight, graph.get_weight(n1, n2))
+            self.assertTrue(type(graph.get_weight(n1, n2)) is type(weight))
+
+        self.assertEqual(("heavy",), graph.neighbor_weights("d"))
+        self.assertRaises(TypeError, graph.export_arrays)
+
+        # Exported weights are floats either way.
+        graph = CSRGraph.from_edges((("a", "b", 3), ("b", "c", Fraction(1, 2))))
+        self.assertEqual([3.0, 0.5], list(graph.export_arrays()[3]))
+
+class BitsetGraphTest(AdjacencyListTest):
+
+    def _get_graph_instance(self):
+        return BitsetGraph()
+
+    def test_get_weight(self):
+        self._construct_test_graph()
+        self.assertRaises(NotImplementedError, self.test_graph.get_weight, "node1", "node2")
+
+    def test_add_edges(self):
+        self.test_graph.add_edges((("node1", "node2", 5), ("node3", "node4")))
+        self.assertTrue(self.test_graph.is_reachable("node1", "node2"))
+        self.assertTrue(self.test_graph.is_reachable("node3", "node4"))
+        self.assertRaises(NotInNodesException, self.test_graph.add_edges,
+          (("node2", "node3"), ("node4", "does not exist")))
+        self.assertFalse(self.test_graph.is_reachable("node2", "node3"))
+
+    def test_bits(self):
+        self._construct_test_graph()
+        graph = self.test_graph
+        self.assertEqual(set(("node2", "node3", "node4")), set(graph.nodes_in(graph.neighbor_bits("node1"))))
+        self.assertEqual(set(("node1", "node4")), set(graph.common_neighbors("node2", "node3")))
+        self.assertEqual(2, graph.count_common_neighbors("node1", "node4"))
+        self.assertEqual(3, graph.get_indegree("node1"))
+        self.assertEqual(graph.neighbor_bits("node2"), graph.predecessor_bits("node2"))
+
+    def test_slot_reuse(self):
+        self._construct_test_graph()
+        self.test_graph.make_neighbor("node2", "node2")
+        self.assertEqual(11, self.test_graph.edge_count)
+        slot = self.test_graph.index_of("node2")
+        self.test_graph.remove_node("node2")
+        self.assertEqual(self.test_graph.edge_count, sum(
+          self.test_graph.get_outdegree(node) for node in self.test_graph.added_nodes
+        ))
+
+        self.test_graph.add_node("node5")
+        self.assertEqual(slot, self.test_graph.index_of("node5"))
+        self.assertEqual([], self.test_graph.get_neighbors("node5"))
+        self.assertEqual([], self.test_graph.get_predecessors("node5"))
+        self.assertFalse(self.test_graph.is_reachable("node1", "node5"))
+
+    def test_matches_adjacency_lists(self):
+        rng = random.Random(22)
+        bitsets = self._get_graph_instance()
+        lists = AdjacencyLists() if type(bitsets) is BitsetGraph else UndirectedAdjList()
+
+        for graph in (bitsets, lists):
+            graph.add_nodes(range(100))
+
+        for _ in range(600):
+            n1 = rng.randrange(100)
+            n2 = rng.randrange(100)
+            bitsets.make_neighbor(n1, n2)
+            lists.make_neighbor(n1, n2)
+
+        for node in range(0, 100, 3):
+            bitsets.remove_node(node)
+            lists.remove_node(node)
+
+        self.assertEqual(lists.edge_count, bitsets.edge_count)
+
+        for node in lists.added_nodes:
+            self.assertEqual(set(lists.get_neighbors(node)), set(bitsets.get_neighbors(node)))
+            self.assertEqual(set(lists.get_predecessors(node)), set(bitsets.get_predecessors(node)))
+            self.assertEqual(lists.get_indegree(node), bitsets.get_indegree(node))
+
+class UndirectedBitsetGraphTest(BitsetGraphTest):
+
+    def _get_graph_instance(self):
+        return UndirectedBitsetGraph()
+
+    def test_neighbor(self):
+        self.test_graph.make_neighbor("node1", "node2")
+        self.assertTrue(self.test_graph.is_reachable("node1", "node2"))
+        self.assertTrue(self.test_graph.is_reachable("node2", "node1"))
+
+    def test_edge_count(self):
+        self._construct_test_graph()
+        self.assertEqual(5, self.test_graph.edge_count)
+
+        self.test_graph.remove_node("node4")
+        self.assertEqual(2, self.test_graph.edge_count)
+
+    def test_slot_reuse(self):
+        self._construct_test_graph()
+        self.test_graph.make_neighbor("node2", "node2")
+        self.assertEqual(6, self.test_graph.edge_count)
+        self.test_graph.remove_node("node2")
+        self.assertEqual(3, self.test_graph.edge_count)
+
 class Route(object):
     """
     Super special class just for the heck of test_get_weight below.
@@ -236,6 +511,10 @@ class UndirectedAdjListTest(AdjacencyListTest):
         self._construct_test_graph()
         self.assertEqual(self.test_graph.edge_count, 5)
 
+        self.test_graph.remove_node("node4")
+        self.assertEqual(self.test_graph.edge_count, 2)
+        self.assertEqual(set(["node2", "node3"]), set(self.test_graph.get_predecessors("node1")))
+
     def test_get_weight(self):
         """
         Almost the same as _construct_test_graph except that it generates random
@@ -293,6 +572,303 @@ class UndirectedAdjListTest(AdjacencyListTest):
         for n in nodes:
             self.assertEqual(self.test_graph.get_indegree(n), self.test_graph.get_outdegree(n))
 
+class GridGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        . # .
+        . # .
+        . . .
+        """
+        self.obstacles = [[0, 1, 0], [0, 1, 0], [0, 0, 0]]
+        self.grid = GridGraph(3, 3, obstacles=self.obstacles)
+
+    def test_nodes(self):
+        self.assertEqual(7, len(self.grid.added_nodes))
+        self.assertEqual(set([(0, 0), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)]),
+          set(self.grid.added_nodes))
+        self.assertTrue((2, 1) in self.grid.added_nodes)
+        self.assertFalse((0, 1) in self.grid.added_nodes)
+        self.assertFalse((3, 0) in self.grid.added_nodes)
+        self.assertFalse("node" in self.grid.added_nodes)
+        self.assertEqual(6, self.grid.edge_count)
+
+    def test_four_connected(self):
+        self.assertEqual(set([(1, 0)]), set(self.grid.get_neighbors((0, 0))))
+        self.assertEqual(set([(2, 0), (2, 2)]), set(self.grid.get_neighbors((2, 1))))
+        self.assertTrue(self.grid.is_reachable((2, 1), (2, 2)))
+        self.assertFalse(self.grid.is_reachable((1, 0), (1, 2)))
+        self.assertEqual(1, self.grid.get_weight((2, 0), (2, 1)))
+        self.assertEqual(2, self.grid.get_indegree((2, 1)))
+        self.assertRaises(NotInNodesException, self.grid.get_neighbors, (0, 1))
+        self.assertRaises(NotInNodesException, self.grid.get_weight, (0, 0), (2, 2))
+
+    def test_eight_connected(self):
+        weights = [[1, 1, 1], [1, 1, 1], [1, 5, 1]]
+        grid = GridGraph(3, 3, connectivity=8, obstacles=self.obstacles, weights=weights)
+        self.assertEqual(set([(0, 0), (2, 0), (2, 1)]), set(grid.get_neighbors((1, 0))))
+        self.assertEqual(5, grid.get_weight((2, 0), (2, 1)))
+        self.assertAlmostEqual(5 * math.sqrt(2), grid.get_weight((1, 0), (2, 1)))
+        self.assertEqual(1, grid.get_weight((2, 1), (2, 0)))
+        self.assertRaises(ValueError, GridGraph, 3, 3, connectivity=6)
+
+    def test_remove_and_add(self):
+        version = self.grid.version
+        self.grid.remove_node((2, 1))
+        self.assertTrue(self.grid.version > version)
+        self.assertFalse((2, 1) in self.grid.added_nodes)
+        self.assertEqual([(1, 2)], self.grid.get_neighbors((2, 2)))
+        self.assertRaises(NotInNodesException, self.grid.remove_node, (2, 1))
+
+        version = self.grid.version
+        self.grid.add_node((0, 1))
+        self.assertTrue(self.grid.version > version)
+        self.assertEqual(set([(0, 0), (0, 2)]), set(self.grid.get_neighbors((0, 1))))
+        self.assertEqual(7, len(self.grid.added_nodes))
+
+        version = self.grid.version
+        self.assertRaises(DuplicateNodeException, self.grid.add_node, (0, 0))
+        self.assertRaises(NotImplementedError, self.grid.add_node, (5, 5))
+        self.assertRaises(NotImplementedError, self.grid.make_neighbor, (0, 0), (1, 0))
+        self.assertEqual(version, self.grid.version)
+
+    def test_traversal(self):
+        bfs = list(BFSIslandIterator(self.grid, (0, 0), with_metadata=True))
+        self.assertEqual(7, len(bfs))
+        self.assertEqual(((0, 2), 6, (1, 2)), bfs[-1])
+
+        # Every open cell once, island by island, whatever cell it starts at.
+        islands = GridGraph(4, 5, obstacles=[[0, 0, 1, 0, 0]] * 4)
+
+        for seed in range(10):
+            for Traversal in (DFSIterator, BFSIterator):
+                cells = list(Traversal(islands, rng=random.Random(seed)))
+                self.assertEqual(16, len(cells))
+                self.assertEqual(set(islands.added_nodes), set(cells))
+                left = [col < 2 for _, col in cells]
+                self.assertTrue(left == sorted(left) or left == sorted(left, reverse=True))
+
+        # Starting costs nothing per cell.
+        huge = GridGraph(3000, 3000)
+        self.assertTrue(next(DFSIterator(huge, rng=random.Random(0))) in huge.added_nodes)
+        self.assertEqual([], list(BFSIterator(GridGraph(0, 0))))
+
+class ViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = AdjacencyLists(reverse_index=True)
+        self.graph.add_nodes(("a", "b", "c", "d"))
+        self.graph.add_edges((("a", "b", 1), ("a", "c", 2), ("b", "c", 3), ("c", "d", 4)))
+
+    def test_transposed_view(self):
+        transpose = TransposedView(self.graph)
+        self.assertEqual(self.graph.added_nodes, transpose.added_nodes)
+        self.assertEqual(4, transpose.edge_count)
+        self.assertEqual(set(("a", "b")), set(transpose.get_neighbors("c")))
+        self.assertEqual(["d"], transpose.get_predecessors("c"))
+        self.assertTrue(transpose.is_reachable("b", "a"))
+        self.assertFalse(transpose.is_reachable("a", "b"))
+        self.assertEqual(3, transpose.get_weight("c", "b"))
+        self.assertEqual(2, transpose.get_outdegree("c"))
+        self.assertEqual(0, transpose.get_outdegree("a"))
+        self.assertEqual(2, transpose.get_indegree("a"))
+        self.assertRaises(NotInNodesException, transpose.is_reachable, "nowhere", "a")
+
+        # Changes to the underlying graph show through.
+        self.graph.make_neighbor("d", "a", 5)
+        self.assertEqual(["d"], transpose.get_neighbors("a"))
+        self.assertEqual(["a"], TransposedView(transpose).get_neighbors("d"))
+
+    def test_read_only(self):
+        for view in (TransposedView(self.graph), InducedSubgraphView(self.graph, ("a", "b"))):
+            self.assertRaises(NotImplementedError, view.add_node, "e")
+            self.assertRaises(NotImplementedError, view.make_neighbor, "a", "b")
+            self.assertRaises(NotImplementedError, view.remove_node, "a")
+
+    def test_induced_subgraph_view(self):
+        subgraph = InducedSubgraphView(self.graph, ("a", "c", "d"))
+        self.assertEqual(frozenset(("a", "c", "d")), subgraph.added_nodes)
+        self.assertEqual(2, subgraph.edge_count)
+        self.assertEqual(["c"], subgraph.get_neighbors("a"))
+        self.assertEqual(["a"], subgraph.get_predecessors("c"))
+        self.assertFalse(subgraph.is_reachable("a", "b"))
+        self.assertEqual(1, subgraph.get_indegree("c"))
+        self.assertEqual(4, subgraph.get_weight("c", "d"))
+        self.assertRaises(NotInNodesException, subgraph.get_neighbors, "b")
+        self.assertRaises(NotInNodesException, subgraph.get_weight, "a", "b")
+        self.assertRaises(NotInNodesException, InducedSubgraphView, self.graph, ("a", "e"))
+
+    def test_materialize(self):
+        transpose = TransposedView(InducedSubgraphView(self.graph, ("a", "b", "c"))).materialize(AdjacencyLists)
+        self.assertEqual(set(("a", "b", "c")), transpose.added_nodes)
+        self.assertEqual(3, transpose.edge_count)
+        self.assertEqual(3, transpose.get_weight("c", "b"))
+        self.assertTrue(transpose.is_reachable("c", "a"))
+        # And it can be modified
+        transpose.add_node("e")
+        transpose.make_neighbor("a", "e")
+        self.assertFalse("e" in self.graph.added_nodes)
+
+class CachedViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = AdjacencyMatrix()
+        self.graph.add_nodes(range(6))
+        self.graph.add_edges(((0, 1, 1), (1, 2, 2), (2, 3, 3), (4, 5, 4)))
+        self.view = CachedView(self.graph, maxsize=4)
+
+    def test_memoized(self):
+        cache = self.view.cache
+        self.assertEqual(set((0, 2)), set(self.view.get_neighbors(1)))
+        self.assertEqual(2, self.view.get_outdegree(1))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+        self.assertTrue(self.view.get_neighbors(1) is self.view.get_neighbors(1))
+        self.assertEqual(2, self.view.get_indegree(1))
+        self.assertEqual((2, 3), (cache.hits, cache.misses))
+        self.assertEqual(self.graph.get_predecessors(4), self.view.get_predecessors(4))
+        self.assertEqual(2, self.view.get_weight(1, 2))
+        self.assertRaises(NotInNodesException, self.view.get_neighbors, 6)
+        self.assertRaises(NotImplementedError, self.view.add_node, 6)
+
+    def test_invalidation(self):
+        self.assertEqual([5], self.view.get_neighbors(4))
+        self.graph.make_neighbor(4, 0)
+        self.assertEqual(set((0, 5)), set(self.view.get_neighbors(4)))
+        self.assertEqual(1, len(self.view.cache))
+
+        self.graph.remove_node(5)
+        self.assertEqual([0], self.view.get_neighbors(4))
+        self.assertEqual(self.graph.version, self.view.version)
+
+        # Any change to the graph drops everything, even answers it can't
+        # have changed.
+        cache = QueryCache(self.graph)
+        self.assertEqual(1, cache.get("key", lambda: 1))
+        self.assertEqual(1, cache.get("key", lambda: 2))
+        self.graph.add_node(6)
+        self.assertEqual(3, cache.get("key", lambda: 3))
+        self.assertEqual(1, len(cache))
+        self.assertEqual((1, 2), (cache.hits, cache.misses))
+
+    def test_lru(self):
+        cache = QueryCache(self.graph, maxsize=2)
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+        cache.get("a", lambda: None)
+        cache.get("c", lambda: 3)
+        # b was the least recently used.
+        self.assertEqual(1, cache.get("a", lambda: None))
+        self.assertEqual(None, cache.get("b", lambda: None))
+        self.assertEqual(2, len(cache))
+
+        unbounded = QueryCache(self.graph, maxsize=None)
+
+        for i in range(100):
+            unbounded.get(i, lambda: i)
+
+        self.assertEqual(100, len(unbounded))
+
+    def test_memoize(self):
+        calls = []
+
+        def component_of(graph, node):
+            calls.append(node)
+            return set(DFSIslandIterator(graph, node))
+
+        self.assertEqual(set((4, 5)), self.view.cache.memoize(component_of, 4))
+        self.assertEqual(set((4, 5)), self.view.cache.memoize(component_of, 4))
+        self.assertEqual([4], calls)
+
+        self.graph.make_neighbor(3, 4)
+        self.assertEqual(set(range(6)), self.view.cache.memoize(component_of, 4))
+        self.assertEqual([4, 4], calls)
+
+class EqualityTest(unittest.TestCase):
+
+    def test_across_representations(self):
+        edges = (("a", "b", 1), ("b", "c", 2), ("c", "a", 3))
+        graphs = (UndirectedAdjList(), AdjacencyMatrix(), AdjacencyLists())
+
+        for graph in graphs:
+            graph.add_nodes("abc")
+            graph.add_edges(edges)
+
+        graphs[2].add_edges((n2, n1, weight) for n1, n2, weight in edges)
+        self.assertEqual(graphs[0], graphs[1])
+        self.assertEqual(graphs[1], graphs[2])
+        self.assertEqual(graphs[0], CSRGraph.from_graph(graphs[0]))
+
+        lighter = UndirectedAdjList()
+        lighter.add_nodes("abc")
+        lighter.add_edges((n1, n2, 1) for n1, n2, _ in edges)
+        self.assertNotEqual(graphs[0], lighter)
+
+        # Weights only count if both graphs have them.
+        unweighted = UndirectedBitsetGraph()
+        unweighted.add_nodes("abc")
+        unweighted.add_edges(edges)
+        self.assertEqual(lighter, unweighted)
+        self.assertRaises(TypeError, hash, lighter)
+
+class ComponentTrackingAdjListTest(UndirectedAdjListTest):
+
+    def _get_graph_instance(self):
+        return UndirectedAdjList(track_components=True)
+
+    def __islands(self, graph):
+        islands = {}
+
+        for node in graph.added_nodes:
+            if not any(node in island for island in islands.values()):
+                islands[node] = set(DFSIslandIterator(graph, node))
+
+        return list(islands.values())
+
+    def __check_components(self, graph):
+        islands = self.__islands(graph)
+        self.assertEqual(len(islands), graph.component_count)
+
+        for island in islands:
+            self.assertEqual(1, len(set(graph.component_of(node) for node in island)))
+
+    def test_streamed_edges(self):
+        rng = random.Random(17)
+        graph = self._get_graph_instance()
+        graph.add_nodes(range(60))
+        self.assertEqual(60, graph.component_count)
+
+        for _ in range(80):
+            n1 = rng.randrange(60)
+            n2 = rng.randrange(60)
+            graph.make_neighbor(n1, n2)
+            self.assertTrue(graph.same_component(n1, n2))
+            self.__check_components(graph)
+
+    def test_components_after_removal(self):
+        graph = self._get_graph_instance()
+        graph.add_nodes("abcde")
+        graph.add_edges((("a", "b"), ("b", "c"), ("d", "e")))
+        self.assertEqual(2, graph.component_count)
+        self.assertTrue(graph.same_component("a", "c"))
+
+        graph.remove_node("b")
+        self.assertFalse(graph.same_component("a", "c"))
+        self.assertEqual(3, graph.component_count)
+
+        graph.add_node("f")
+        graph.make_neighbor("f", "a")
+        graph.make_neighbor("f", "c")
+        self.assertTrue(graph.same_component("a", "c"))
+        self.__check_components(graph)
+        self.assertRaises(NotInNodesException, graph.component_of, "b")
+
+    def test_untracked(self):
+        graph = UndirectedAdjList()
+        graph.add_nodes("ab")
+        self.assertFalse(graph.tracks_components)
+        self.assertRaises(NotImplementedError, graph.same_component, "a", "b")
+
 class IteratorTest(unittest.TestCase):
     
     def test_dfs_iterator(self):
@@ -331,6 +907,60 @@ class IteratorTest(unittest.TestCase):
         self.assertEqual(["node3"], islander("node3"))
         self.assertEqual(["node4"], islander("node4"))
 
+    def __make_tree(self):
+        """
+        A binary tree on 1..7 where the children of i are 2i and 2i + 1, plus
+        an island made of 8 and 9.
+        """
+        tree = UndirectedAdjList()
+        tree.add_nodes(range(1, 10))
+
+        for i in range(2, 8):
+            tree.make_neighbor(i // 2, i)
+
+        tree.make_neighbor(8, 9)
+        return tree
+
+    def test_dfs_island_traversal(self):
+        tree = self.__make_tree()
+        self.assertEqual([1, 2, 4, 5, 3, 6, 7], list(DFSIslandIterator(tree, 1)))
+        self.assertEqual([8, 9], list(DFSIslandIterator(tree, 8)))
+        self.assertRaises(NotInNodesException, DFSIslandIterator, tree, 10)
+
+    def test_deterministic_order(self):
+        tree = self.__make_tree()
+        self.assertEqual([8, 9, 1, 2, 4, 5, 3, 6, 7], list(DFSIterator(tree, order=(8, 1))))
+        self.assertEqual([1, 2, 3, 4, 5, 6, 7, 9, 8], list(BFSIterator(tree, order=(1, 9))))
+
+        seeded = lambda: list(DFSIterator(tree, rng=random.Random(42)))
+        self.assertEqual(seeded(), seeded())
+        self.assertEqual(set(range(1, 10)), set(seeded()))
+
+    def test_metadata(self):
+        tree = self.__make_tree()
+        dfs = list(DFSIterator(tree, order=(1, 8), with_metadata=True))
+        self.assertEqual((1, 0, None), dfs[0])
+        self.assertEqual((4, 2, 2), dfs[2])
+        self.assertEqual((8, 0, None), dfs[7])
+
+        bfs = list(BFSIslandIterator(tree, 1, with_metadata=True))
+        self.assertEqual([(1, 0, None), (2, 1, 1), (3, 1, 1), (4, 2, 2), (5, 2, 2),
+          (6, 2, 3), (7, 2, 3)], bfs)
+
+    def test_frontier(self):
+        tree = self.__make_tree()
+        self.assertEqual([[1], [2, 3], [4, 5, 6, 7]], list(FrontierIterator(tree, (1,))))
+        self.assertEqual([[4, 8], [2, 9], [1, 5], [3], [6, 7]], list(FrontierIterator(tree, (4, 8))))
+
+    def test_sparse_forest(self):
+        """
+        Lots of islands. This used to be quadratic.
+        """
+        forest = AdjacencyLists()
+        forest.add_nodes(range(20000))
+        self.assertEqual(20000, len(list(DFSIterator(forest))))
+        self.assertEqual(20000, len(list(BFSIterator(forest))))
+
 class UndirectedAdjMatTest(AdjacencyListTest):
     
     def _get_graph_instance(self):
@@ -389,6 +1019,34 @@ class UndirectedAdjMatTest(AdjacencyListTest):
         self.test_graph.make_neighbor("node5", "node6")
         self.assertEqual(self.test_graph.get_weight("node5", "node6"), 0)
 
+    def test_weight_types(self):
+        """
+        Weights come back exactly as they went in, whatever their type, also
+        after the matrix grows or gets compacted.
+        """
+        self.test_graph.make_neighbor("node1", "node2", 7)
+        self.assertTrue(type(self.test_graph.get_weight("node1", "node2")) is int)
+
+        self.test_graph.make_neighbor("node1", "node3", 2.5)
+        self.test_graph.make_neighbor("node1", "node4", Fraction(1, 3))
+        self.test_graph.make_neighbor("node2", "node3", 2 ** 70)
+        self.test_graph.add_nodes(range(10))
+        self.test_graph.remove_node("node4")
+
+        for n1, n2, weight in (("node1", "node2", 7), ("node1", "node3", 2.5),
+          ("node2", "node3", 2 ** 70)):
+            self.assertEqual(weight, self.test_graph.get_weight(n1, n2))
+            self.assertTrue(type(self.test_graph.get_weight(n2, n1)) is type(weight))
+
+        self.test_graph.add_node("node4")
+        self.test_graph.make_neighbor("node4", "node1", Fraction(1, 3))
+        self.assertEqual(Fraction(1, 3), self.test_graph.get_weight("node1", "node4"))
+        self.assertEqual(AdjacencyMatrix.DISCONNECTED, self.test_graph.get_weight("node2", "node4"))
+
+        nodes, cells = self.test_graph.export_matrix()
+        row = nodes.index("node1")
+        self.assertEqual(2.5, cells[row * len(nodes) + nodes.index("node3")])
+
     def test_neighbor(self):
         """
         Tests both make_neighbor and is_reachable functionality.
@@ -398,6 +1056,54 @@ class UndirectedAdjMatTest(AdjacencyListTest):
         self.assertTrue(self.test_graph.is_reachable("node2", "node1"))
         self.assertRaises(NotInNodesException, self.test_graph.make_neighbor, self.test_node, "node1")
 
+    def test_growth(self):
+        """
+        Go past the initial capacity a few times and check that nothing got
+        lost while the matrix was resized.
+        """
+        nodes = ["grown%d" % i for i in range(40)]
+        self.test_graph.add_nodes(nodes)
+
+        for i in range(1, len(nodes)):
+            self.test_graph.make_neighbor(nodes[i - 1], nodes[i], i)
+
+        for i in range(1, len(nodes)):
+            self.assertEqual(i, self.test_graph.get_weight(nodes[i - 1], nodes[i]))
+            self.assertEqual(i, self.test_graph.get_weight(nodes[i], nodes[i - 1]))
+
+        self.assertEqual(set([nodes[0], nodes[2]]), set(self.test_graph.get_neighbors(nodes[1])))
+        self.assertEqual(len(nodes) - 1, self.test_graph.edge_count)
+
+    def test_remove_node_compaction(self):
+        """
+        Remove enough nodes to trigger a compaction and check that the survivors
+        keep their connections.
+        """
+        self._construct_test_graph()
+        nodes = ["removable%d" % i for i in range(10)]
+        self.test_graph.add_nodes(nodes)
+
+        for node in nodes:
+            self.test_graph.make_neighbor("node1", node, 9)
+
+        self.test_graph.remove_node("node2")
+        self.assertEqual(set(["node1", "node3"]), set(self.test_graph.get_neighbors("node4")))
+        self.assertEqual(2, self.test_graph.get_indegree("node4"))
+
+        for node in nodes:
+            self.test_graph.remove_node(node)
+
+        self.assertEqual(set(["node1", "node3", "node4"]), self.test_graph.added_nodes)
+        self.assertEqual(set(["node3", "node4"]), set(self.test_graph.get_neighbors("node1")))
+        self.assertEqual(3, self.test_graph.edge_count)
+        self.assertEqual(0, self.test_graph.get_weight("node3", "node4"))
+        self.assertEqual(0, self.test_graph.get_weight("node3", "node3"))
+        self.assertRaises(NotInNodesException, self.test_graph.get_neighbors, "node2")
+
+        # Slots freed by compaction can be used again.
+        self.test_graph.add_node("node2")
+        self.assertEqual([], self.test_graph.get_neighbors("node2"))
+
     def test_notinnodes(self):
         """
         Test all the instances that will throw a NotInNodesException.
@@ -0,0 +1,55 @@
+from ..indexed_heap import IndexedMinHeap
+from ..errors import DuplicateNodeException, NotInNodesException
+
+import random
+import unittest
+
+class IndexedMinHeapTests(unittest.TestCase):
+
+    def test_heap_order(self):
+        heap = IndexedMinHeap()
+        keys = list(range(100))
+        random.shuffle(keys)
+
+        for key in keys:
+            heap.push("item%d" % key, key)
+
+        self.assertEqual(100, len(heap))
+        self.assertEqual(("item0", 0), heap.peek())
+        popped = [heap.pop() for _ in range(100)]
+        self.assertEqual([("item%d" % key, key) for key in range(100)], popped)
+        self.assertEqual(0, len(heap))
+
+    def test_decrease_key(self):
+        heap = IndexedMinHeap()
+        heap.push("a", 5)
+        heap.push("b", 3)
+        heap.push("c", 4)
+        heap.decrease_key("a", 1)
+        # Not a decrease, should be ignored
+        heap.decrease_key("b", 10)
+        self.assertEqual(3, heap.key_of("b"))
+        self.assertEqual(("a", 1), heap.pop())
+        self.assertFalse("a" in heap)
+        self.assertTrue("b" in heap)
+        self.assertEqual(("b", 3), heap.pop())
+        self.assertEqual(("c", 4), heap.pop())
+
+    def test_errors(self):
+        heap = IndexedMinHeap()
+        heap.push("a", 1)
+        self.assertRaises(DuplicateNodeException, heap.push, "a", 2)
+        self.assertRaises(NotInNodesException, heap.decrease_key, "b", 0)
+        self.assertRaises(NotInNodesException, heap.key_of, "b")
+
+    def test_uncomparable_items(self):
+        """
+        Items with equal keys should never be compared with each other.
+        """
+        heap = IndexedMinHeap()
+        items = [object() for _ in range(10)]
+
+        for item in items:
+            heap.push(item, 0)
+
+        self.assertEqual(set(items), set(heap.pop()[0] for _ in range(10)))
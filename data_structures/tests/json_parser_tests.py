@@ -0,0 +1,97 @@
+from ..json_parser import GraphParser
+from ..errors import GraphFormatException
+from ..graphs import AdjacencyLists, AdjacencyMatrix, CSRGraph, UndirectedAdjList
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+class GraphParserTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def __write(self, name, contents):
+        filename = os.path.join(self.directory, name)
+
+        with open(filename, "w") as graph_file:
+            graph_file.write(contents)
+
+        return filename
+
+    def test_json(self):
+        document = {"is_matrix": False, "representation": {"a": ["b", "c"], "b": ["c"], "c": []}}
+        graph = GraphParser(self.__write("graph.json", json.dumps(document))).load()
+        self.assertTrue(isinstance(graph, AdjacencyLists))
+        self.assertEqual(set(("b", "c")), set(graph.get_neighbors("a")))
+        self.assertEqual(3, graph.edge_count)
+
+        document["is_matrix"] = True
+        graph = GraphParser(self.__write("matrix.json", json.dumps(document))).load()
+        self.assertTrue(isinstance(graph, AdjacencyMatrix))
+        self.assertTrue(graph.is_reachable("c", "b"))
+
+        graph = GraphParser(self.__write("csr.json", json.dumps(document)), graph_class=CSRGraph).load()
+        self.assertTrue(isinstance(graph, CSRGraph))
+        self.assertEqual(3, graph.edge_count)
+
+    def test_edgelist(self):
+        contents = "# a comment\n1 2 5\n2 3 0.5\n\n% another\n3\t1\n1 3"
+        progress = []
+        # Tiny chunks so that lines get split across them
+        parser = GraphParser(self.__write("graph.txt", contents), chunk_size=4, node_type=int,
+          progress=lambda edges, rate: progress.append(edges))
+        graph = parser.load()
+
+        self.assertEqual(set((1, 2, 3)), graph.added_nodes)
+        self.assertEqual(4, graph.edge_count)
+        self.assertEqual(5, graph.get_weight(1, 2))
+        self.assertEqual(0.5, graph.get_weight(2, 3))
+        self.assertEqual(0, graph.get_weight(3, 1))
+        self.assertTrue(graph.is_reachable(1, 3))
+        self.assertEqual(4, progress[-1])
+        self.assertEqual(sorted(progress), progress)
+
+    def test_ndjson(self):
+        lines = ('["a", "b"]', '{"source": "b", "target": [0, 1], "weight": 2}',
+          '["a", [0, 1], 7]', '[[[0, 1], 2], "b"]')
+        filename = self.__write("graph.ndjson", "\n".join(lines) + "\n")
+
+        for chunk_size in (3, 1 << 20):
+            graph = GraphParser(filename, graph_class=UndirectedAdjList, chunk_size=chunk_size).load()
+            self.assertTrue(isinstance(graph, UndirectedAdjList))
+            self.assertEqual(set(("a", "b", (0, 1), ((0, 1), 2))), graph.added_nodes)
+            self.assertEqual(4, graph.edge_count)
+            self.assertEqual(2, graph.get_weight((0, 1), "b"))
+
+    def test_explicit_format(self):
+        filename = self.__write("graph.data", '["x", "y"]\n')
+        graph = GraphParser(filename, file_format="ndjson", graph_class=CSRGraph).load()
+        self.assertEqual(["y"], graph.get_neighbors("x"))
+        self.assertRaises(ValueError, GraphParser, filename, file_format="xml")
+
+    def test_bad_lines(self):
+        bad_files = (
+          ("graph.txt", "1 2\n\n1\n"),
+          ("graph.ndjson", '["a", "b"]\n\n["a"]\n'),
+          ("graph.jsonl", '["a", "b"]\n\n{"source": "a"}\n'),
+          ("graph.ndjson", '["a", "b"]\n\n["a", \n'),
+          ("graph.ndjson", '["a", "b"]\n\n[{"a": 1}, "b"]\n'),
+          ("graph.txt", "1 2\n\n1 2 heavy\n"),
+        )
+
+        for name, contents in bad_files:
+            with self.assertRaises(GraphFormatException) as context:
+                GraphParser(self.__write(name, contents), chunk_size=4).load()
+
+            self.assertEqual(3, context.exception.line_number)
+
+        with self.assertRaises(GraphFormatException) as context:
+            GraphParser(self.__write("graph.txt", "1 2\n\nx 2\n"), node_type=int).load()
+
+        self.assertEqual(3, context.exception.line_number)
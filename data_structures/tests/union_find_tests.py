@@ -21,3 +21,31 @@ class DataNodeTests(unittest.TestCase):
         self.assertTrue(self.union_find.is_equal("bb", "bbb"))
         self.assertTrue(self.union_find.is_equal("bbbb", "bb"))
         self.assertFalse(self.union_find.is_equal("a", "b"))
+
+    def test_long_chain(self):
+        """
+        Neither union nor find should recurse.
+        """
+        for i in range(1, 20000):
+            self.union_find.make_equal(i - 1, i)
+
+        self.assertTrue(self.union_find.is_equal(0, 19999))
+        self.union_find.make_equal("x", "y")
+        self.assertFalse(self.union_find.is_equal(0, "x"))
+
+    def test_union_into_non_root(self):
+        """
+        Merging through nodes that are not the ultimate parents of their sets.
+        """
+        self.union_find.make_equal("a", "b")
+        self.union_find.make_equal("c", "d")
+        self.union_find.make_equal("c", "e")
+        self.union_find.make_equal("b", "d")
+        self.assertTrue(self.union_find.is_equal("a", "e"))
+
+    def test_find(self):
+        self.assertTrue(self.union_find.make_equal("a", "b"))
+        self.assertFalse(self.union_find.make_equal("b", "a"))
+        self.assertEqual(self.union_find.find("a"), self.union_find.find("b"))
+        self.union_find.add_object("c")
+        self.assertEqual("c", self.union_find.find("c"))
@@ -12,21 +12,44 @@ class DataNode(object):
         """
         Find the ultimate parent of this node.
 
-        Haha it is "recursive". I wonder if this is good.
+        Everything on the way up is made to point straight at the ultimate
+        parent (path compression) so the next find is faster. Iterative so deep
+        chains don't hit the recursion limit.
         """
-        if self.parent:
-            return self.parent.find()
-        else:
-            return self
+        root = self
+
+        while root.parent is not None:
+            root = root.parent
+
+        node = self
+        while node.parent is not None and node.parent is not root:
+            next_node = node.parent
+            node.parent = root
+            node = next_node
+
+        return root
 
     def union(self, other_node):
-        if self.weight > other_node.weight:
-            other_parent = other_node.find()
-            other_parent.parent = self.parent
-            other_parent.weight += self.weight
+        """
+        Merge the sets of this node and other_node. The ultimate parent of the
+        lighter set is made to point to that of the heavier one.
+
+        Returns False if they were already in the same set, True otherwise.
+        """
+        own_root = self.find()
+        other_root = other_node.find()
+
+        if own_root is other_root:
+            return False
+
+        if own_root.weight >= other_root.weight:
+            other_root.parent = own_root
+            own_root.weight += other_root.weight
         else:
-            self.parent = other_node.find()
-            self.weight += other_node.weight
+            own_root.parent = other_root
+            other_root.weight += own_root.weight
+
+        return True
 
 class UnionFind(object):
     """
@@ -46,13 +69,24 @@ class UnionFind(object):
             self.data2node[data] = DataNode(data)
 
     def make_equal(self, d1, d2):
+        """
+        Puts d1 and d2 in the same set, adding them first if needed. Returns
+        True if this merged two sets.
+        """
         if not self.data2node.get(d1):
             self.add_object(d1)
 
         if not self.data2node.get(d2):
             self.add_object(d2)
 
-        self.data2node[d1].union(self.data2node[d2])
+        return self.data2node[d1].union(self.data2node[d2])
+
+    def find(self, data):
+        """
+        Returns the data of the ultimate parent of the set data is in. Two
+        pieces of data are equal iff they have the same ultimate parent.
+        """
+        return self.data2node[data].find().data
 
     def is_equal(self, d1, d2):
         """